@@ -4,6 +4,7 @@ import automatedtournaments.arranger
 
 TOURNAMENT_APP_BASE_URL = os.getenv("TOURNAMENTAPPBASEURL", "http://localhost:23444")
 TOURNAMENT_BOT_BASE_URL = os.getenv("TOURNAMENTBOTBASEURL", "http://localhost:23445")
+TOURNAMENT_KEY = os.getenv("TOURNAMENTKEY", "")
 
 
 def main():
@@ -11,7 +12,8 @@ def main():
         TOURNAMENT_APP_BASE_URL,
         TOURNAMENT_BOT_BASE_URL,
         datetime.timedelta(hours=1),
-        True).arrange_tournament()
+        True,
+        TOURNAMENT_KEY).arrange_tournament()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,21 @@
-from .tournament import start_tournament_app
-from .db import UserDatabase
-from .bot import start_tournament_bot
-from .arranger import start_arranger_app
+from .db import UserDatabase, RestUserDatabase
+
+
+# Each process only imports its own package. The bot is pinned to discord.py 0.16 and the aiohttp 1.0 it requires,
+# while the tournament app and the arranger need aiohttp 3, so they are installed into separate environments.
+def start_tournament_app(*args, **kwargs) -> None:
+    from .tournament import start_tournament_app as _start_tournament_app
+
+    _start_tournament_app(*args, **kwargs)
+
+
+def start_tournament_bot(*args, **kwargs) -> None:
+    from .bot import start_tournament_bot as _start_tournament_bot
+
+    _start_tournament_bot(*args, **kwargs)
+
+
+def start_arranger_app(*args, **kwargs) -> None:
+    from .arranger import start_arranger_app as _start_arranger_app
+
+    _start_arranger_app(*args, **kwargs)
@@ -0,0 +1,25 @@
+from aiohttp.web import Request
+
+try:
+    from aiohttp.web import middleware
+except ImportError:
+    # aiohttp 1.0, which discord.py 0.16 pins the bot to, only knows middleware factories.
+    def middleware(handler_middleware):
+        async def factory(_, handler):
+            async def handle(request: Request):
+                return await handler_middleware(request, handler)
+
+            return handle
+
+        return factory
+
+
+def route_name(request: Request) -> str:
+    resource = request.match_info.route.resource
+
+    if resource is None:
+        return "unmatched"
+
+    resource_info = resource.get_info()
+
+    return resource_info.get("formatter", resource_info.get("path", "unmatched"))
@@ -0,0 +1,72 @@
+import asyncio
+import datetime
+import itertools
+import logging
+from typing import List, Tuple
+
+import aiohttp
+
+from .arrangetournament import TournamentArranger
+
+logger = logging.getLogger(__name__)
+
+
+# Runs each arrangement as a task on the app's event loop, all sharing one ClientSession and its connection pool.
+class ArrangementScheduler:
+
+    def __init__(self, web_client: aiohttp.ClientSession, max_concurrent_arrangements: int=8):
+        self._web_client = web_client
+        self._max_concurrent_arrangements = max_concurrent_arrangements
+
+        self._ids = itertools.count(1)
+        self._arrangements = {}
+
+    def schedule(self, tournament_arranger: TournamentArranger) -> Tuple[str, str]:
+        if len(self._arrangements) >= self._max_concurrent_arrangements:
+            return "", "ARRANGEMENT_LIMIT_REACHED"
+
+        arrangement_id = str(next(self._ids))
+        task = asyncio.ensure_future(tournament_arranger.run(self._web_client))
+        task.add_done_callback(lambda finished_task: self._finish(arrangement_id, finished_task))
+
+        self._arrangements[arrangement_id] = {
+            "task": task,
+            "scheduled_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "start_in": tournament_arranger.start_in.total_seconds(),
+            "tournament_key": tournament_arranger.tournament_key,
+        }
+
+        return arrangement_id, ""
+
+    def list_arrangements(self) -> List[dict]:
+        return [
+            {
+                "id": arrangement_id,
+                "tournament_key": arrangement["tournament_key"],
+                "scheduled_at": arrangement["scheduled_at"],
+                "start_in": arrangement["start_in"],
+            }
+            for arrangement_id, arrangement
+            in self._arrangements.items()]
+
+    def cancel(self, arrangement_id: str) -> Tuple[bool, str]:
+        arrangement = self._arrangements.pop(arrangement_id, None)
+
+        if not arrangement:
+            return False, "ARRANGEMENT_NOT_FOUND"
+
+        arrangement["task"].cancel()
+
+        return True, ""
+
+    def cancel_all(self) -> None:
+        for arrangement_id in list(self._arrangements):
+            self.cancel(arrangement_id)
+
+    def _finish(self, arrangement_id: str, task: asyncio.Future) -> None:
+        arrangement = self._arrangements.pop(arrangement_id, None)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Arrangement %s for tournament key %r failed",
+                arrangement_id, arrangement["tournament_key"] if arrangement else "", exc_info=task.exception())
@@ -1,26 +1,66 @@
 import datetime
 
-import asyncio
-from aiohttp.web import Application, Request, Response
+import aiohttp
+from aiohttp.web import Application, Request, Response, json_response
 
+from automatedtournaments.metrics import instrument_app
 from . import TournamentArranger
+from .arrangementscheduler import ArrangementScheduler
 
 
 class ArrangerApp(Application):
 
-    def __init__(self, tournament_app_base_url: str, tournament_bot_base_url: str):
+    def __init__(
+            self,
+            tournament_app_base_url: str,
+            tournament_bot_base_url: str,
+            web_client: aiohttp.ClientSession,
+            max_concurrent_arrangements: int=8):
         super().__init__()
+        instrument_app(self)
 
         self.tournament_app_base_url = tournament_app_base_url
         self.tournament_bot_base_url = tournament_bot_base_url
+        self._scheduler = ArrangementScheduler(web_client, max_concurrent_arrangements)
+
         self.router.add_post("/arrange", self.arrange)
+        self.router.add_get("/arrangements", self.arrangements)
+        self.router.add_post("/arrangements/{arrangement_id}/cancel", self.cancel)
+
+        self.on_shutdown.append(self._cancel_arrangements)
+
+    async def arrange(self, request: Request) -> Response:
 
-    async def arrange(self, _: Request) -> Response:
-        asyncio.get_event_loop().run_in_executor(
-            None,
+        if "application/json" in request.content_type:
+            request_data = await request.json()
+        else:
+            request_data = {}
+
+        tournament_key = request_data.get("tournament_key", "") if request_data else ""
+
+        arrangement_id, error = self._scheduler.schedule(
             TournamentArranger(
                 self.tournament_app_base_url,
                 self.tournament_bot_base_url,
                 datetime.timedelta(minutes=20),
-                False).arrange_tournament)
-        return Response()
+                False,
+                tournament_key))
+
+        if arrangement_id:
+            return json_response(data={"arrangement_id": arrangement_id})
+
+        return json_response(data={"error": error}, status=409)
+
+    async def arrangements(self, _: Request) -> Response:
+        return json_response(data={"arrangements": self._scheduler.list_arrangements()})
+
+    async def cancel(self, request: Request) -> Response:
+        status, error = self._scheduler.cancel(request.match_info.get("arrangement_id", ""))
+
+        if status:
+            return json_response()
+
+        return json_response(data={"error": error}, status=409)
+
+    async def _cancel_arrangements(self, _: Application) -> None:
+        self._scheduler.cancel_all()
@@ -1,8 +1,11 @@
 import asyncio
 import datetime
+from typing import Awaitable, Callable, List
 
 import aiohttp
 
+from .eventsubscriber import TournamentEventSubscriber
+from .tournamentpoller import TournamentPoller
 from .util import is_success, round_to_closest_hour
 
 ANNOUNCEMENT_CHANNEL_NAME = "events"
@@ -16,51 +19,76 @@ class TournamentArranger:
             tournament_app_base_url: str,
             tournament_bot_base_url: str,
             start_in: datetime.timedelta,
-            round_to_nearest_hour: bool):
+            round_to_nearest_hour: bool,
+            tournament_key: str=""):
 
         self.tournament_app_base_url = tournament_app_base_url
         self.tournament_bot_base_url = tournament_bot_base_url
         self.start_in = start_in
         self.round_to_nearest_hour = round_to_nearest_hour
+        self.tournament_key = tournament_key
+
+        # Without a key the arranger uses the tournament app's default tournament and announces to every server.
+        if tournament_key:
+            self.tournament_url = tournament_app_base_url + "/tournaments/" + tournament_key
+        else:
+            self.tournament_url = tournament_app_base_url
 
     def arrange_tournament(self) -> None:
+        loop = asyncio.new_event_loop()
+        web_client = aiohttp.ClientSession(loop=loop)
+
+        loop.run_until_complete(self.run(web_client))
+
+        web_client.close()
+
+    async def run(self, web_client: aiohttp.ClientSession) -> None:
         time_scheduled = datetime.datetime.now(datetime.timezone.utc)
         start_time = time_scheduled + self.start_in
 
         if self.round_to_nearest_hour:
             start_time = round_to_closest_hour(start_time)
 
-        loop = asyncio.new_event_loop()
-        web_client = aiohttp.ClientSession(loop=loop)
-
-        tournament_data = loop.run_until_complete(self.create_tournament(web_client, start_time))
+        tournament_data = await self.create_tournament(web_client, start_time)
         if not tournament_data:
             return
 
-        loop.run_until_complete(self.announce_tournament(web_client, tournament_data))
+        await self.announce_tournament(web_client, tournament_data)
 
-        asyncio.ensure_future(
-            self.announce_pre_start_tournament(web_client, tournament_data, start_time, loop=loop), loop=loop)
-        asyncio.ensure_future(self.start_tournament(web_client, tournament_data, start_time, loop=loop), loop=loop)
-        asyncio.ensure_future(self.announce_opened_matches(web_client, loop=loop), loop=loop)
-        asyncio.ensure_future(self.finish_tournament_once_all_matches_completed(web_client, loop=loop), loop=loop)
+        poller = TournamentPoller(web_client, self.tournament_url)
+        poller.add_listener(self.opened_matches_announcer(web_client))
+        poller.add_listener(self.tournament_finisher(web_client, poller))
 
-        loop.run_until_complete(self.wait_till_tournament_finished(web_client, loop=loop))
+        event_subscriber = TournamentEventSubscriber(web_client, self.tournament_url, poller)
+        event_subscriber.add_listener("intent_failed", self.failed_intent_reporter(web_client))
 
-        loop.run_until_complete(self.announce_champion(web_client, tournament_data))
+        tasks = [
+            asyncio.ensure_future(self.announce_pre_start_tournament(web_client, tournament_data, start_time)),
+            asyncio.ensure_future(self.start_tournament(web_client, tournament_data, start_time, poller)),
+            asyncio.ensure_future(event_subscriber.run()),
+        ]
 
-        web_client.close()
+        try:
+            await poller.run()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        await self.announce_champion(web_client, tournament_data)
 
     async def create_tournament(self, web_client: aiohttp.ClientSession, start_time: datetime.datetime) -> dict:
         async with web_client.post(
-                self.tournament_app_base_url + "/create", json={"start_time": start_time.isoformat()}) as resp:
+                self.tournament_url + "/create", json={"start_time": start_time.isoformat()}) as resp:
             success = is_success(resp.status)
+            resp_data = await resp.json() if success else None
     
         if not success:
             return {}
-    
-        async with web_client.get(self.tournament_app_base_url + "/") as resp:
-            resp_data = await resp.json()
+
+        # Older tournament apps answer /create without the tournament, which then has to be fetched separately.
+        if not resp_data or "tournament" not in resp_data:
+            async with web_client.get(self.tournament_url + "/") as resp:
+                resp_data = await resp.json()
     
         if not resp_data or "tournament" not in resp_data:
             return {}
@@ -90,17 +118,15 @@ class TournamentArranger:
                 tournament_name, start_in_str, tournament_url))
     
         announcement_data = {
+            "server": self.tournament_key,
             "channel": ANNOUNCEMENT_CHANNEL_NAME,
             "message": message
         }
         async with web_client.post(self.tournament_bot_base_url + "/announce", json=announcement_data) as _:
             pass
 
-    async def announce_pre_start_tournament(self, web_client, tournament_data, start_time, loop=None) -> None:
-        announcement_time = start_time - datetime.timedelta(minutes=15)
-    
-        while datetime.datetime.now(datetime.timezone.utc) < announcement_time:
-            await asyncio.sleep(30, loop=loop)
+    async def announce_pre_start_tournament(self, web_client, tournament_data, start_time) -> None:
+        await sleep_until(start_time - datetime.timedelta(minutes=15))
     
         tournament_name = tournament_data.get("name", "The tournament")
         tournament_url = tournament_data.get("full_challonge_url", "the Challonge page")
@@ -111,12 +137,14 @@ class TournamentArranger:
                 tournament_name, tournament_url))
     
         async with web_client.post(self.tournament_bot_base_url + "/announce", json={
+            "server": self.tournament_key,
             "channel": ANNOUNCEMENT_CHANNEL_NAME,
             "message": "@here " + message
         }) as _:
             pass
     
         async with web_client.post(self.tournament_bot_base_url + "/announce", json={
+            "server": self.tournament_key,
             "channel": SECONDARY_ANNOUNCEMENT_CHANNEL_NAME,
             "message": message
         }) as _:
@@ -127,121 +155,119 @@ class TournamentArranger:
             web_client: aiohttp.ClientSession,
             tournament_data: dict,
             start_time: datetime.datetime,
-            loop: asyncio.BaseEventLoop=None) -> None:
-    
-        while datetime.datetime.now(datetime.timezone.utc) < start_time:
-            await asyncio.sleep(30, loop=loop)
+            poller: TournamentPoller) -> None:
+
+        await sleep_until(start_time)
     
         tournament_name = tournament_data.get("name", "The tournament")
         tournament_url = tournament_data.get("full_challonge_url", "the Challonge page")
     
-        async with web_client.post(self.tournament_app_base_url + "/start") as _:
+        async with web_client.post(self.tournament_url + "/start") as _:
             pass
     
-        async with web_client.get(self.tournament_app_base_url + "/") as resp:
+        async with web_client.get(self.tournament_url + "/") as resp:
             resp_data = await resp.json()
     
         if resp_data.get("tournament", {}).get("started_at", None):
+            poller.refresh()
+
             message = (
                 "@here {} is starting now! Please check {} to find out who your opponent is.".format(
                     tournament_name, tournament_url))
         else:
-            async with web_client.post(self.tournament_app_base_url + "/destroy") as _:
+            async with web_client.post(self.tournament_url + "/destroy") as _:
                 pass
     
+            poller.refresh()
+
             message = "{} has been cancelled due to lack of participants 🙁".format(tournament_name)
     
         announcement_data = {
+            "server": self.tournament_key,
             "channel": ANNOUNCEMENT_CHANNEL_NAME,
             "message": message
         }
         async with web_client.post(self.tournament_bot_base_url + "/announce", json=announcement_data) as _:
             pass
 
-    async def announce_opened_matches(
-            self, web_client: aiohttp.ClientSession, loop: asyncio.BaseEventLoop=None) -> None:
+    def opened_matches_announcer(self, web_client: aiohttp.ClientSession) -> Callable[[List[dict]], Awaitable[None]]:
         announced_matches = set()
-    
-        while True:
-            await asyncio.sleep(15, loop=loop)
-    
-            async with web_client.get(self.tournament_app_base_url + "/matches") as resp:
-                resp_data = await resp.json()
-    
+
+        async def announce_opened_matches(matches: List[dict]) -> None:
             message = ""
-    
-            if "matches" in resp_data:
-                matches = resp_data["matches"]
-    
-                for match in matches:
-                    match_inner = match.get("match", {})
-    
-                    if "id" not in match_inner or match_inner["id"] in announced_matches:
-                        continue
-    
-                    if (match_inner.get("state", "") == "open" and
-                            "player1_discord_id" in match_inner and
-                            "player2_discord_id" in match_inner):
-    
-                        player1_mention = "<@{}>".format(match_inner["player1_discord_id"])
-                        player2_mention = "<@{}>".format(match_inner["player2_discord_id"])
-    
-                        message += "{}, your next opponent is {}!\n".format(player1_mention, player2_mention)
-    
-                        announced_matches.add(match_inner["id"])
-    
+
+            for match in matches:
+                match_inner = match.get("match", {})
+
+                if "id" not in match_inner or match_inner["id"] in announced_matches:
+                    continue
+
+                if (match_inner.get("state", "") == "open" and
+                        "player1_discord_id" in match_inner and
+                        "player2_discord_id" in match_inner):
+
+                    player1_mention = "<@{}>".format(match_inner["player1_discord_id"])
+                    player2_mention = "<@{}>".format(match_inner["player2_discord_id"])
+
+                    message += "{}, your next opponent is {}!\n".format(player1_mention, player2_mention)
+
+                    announced_matches.add(match_inner["id"])
+
             if message:
                 announcement_data = {
+                    "server": self.tournament_key,
                     "channel": ANNOUNCEMENT_CHANNEL_NAME,
                     "message": message
                 }
                 async with web_client.post(self.tournament_bot_base_url + "/announce", json=announcement_data) as _:
                     pass
 
-    async def finish_tournament_once_all_matches_completed(
-            self, web_client: aiohttp.ClientSession, loop: asyncio.BaseEventLoop=None) -> None:
-        matches_remaining = True
-    
-        while matches_remaining:
-            await asyncio.sleep(15, loop=loop)
-    
-            async with web_client.get(self.tournament_app_base_url + "/matches") as resp:
-                resp_data = await resp.json()
-    
-            if "matches" in resp_data:
-                matches = resp_data["matches"]
-    
-                matches_remaining = not all(match.get("match", {}).get("state", "") == "complete" for match in matches)
-    
-        success = False
-    
-        while not success:
-            async with web_client.post(self.tournament_app_base_url + "/finish") as resp:
-                success = is_success(resp.status)
-    
-            await asyncio.sleep(5, loop=loop)
+        return announce_opened_matches
+
+    def failed_intent_reporter(self, web_client: aiohttp.ClientSession) -> Callable[[dict], Awaitable[None]]:
+
+        async def report_failed_intent(event_data: dict) -> None:
+            if not event_data.get("discord_id", ""):
+                return
 
-    async def wait_till_tournament_finished(
+            player_mention = "<@{}>".format(event_data["discord_id"])
+
+            if event_data.get("action", "") == "sign_up":
+                message = "{} Sorry, your sign up didn't go through! Please use the *;signup* command again.".format(
+                    player_mention)
+            else:
+                message = "{} Sorry, your check in didn't go through! Please try again.".format(player_mention)
+
+            announcement_data = {
+                "server": self.tournament_key,
+                "channel": ANNOUNCEMENT_CHANNEL_NAME,
+                "message": message
+            }
+            async with web_client.post(self.tournament_bot_base_url + "/announce", json=announcement_data) as _:
+                pass
+
+        return report_failed_intent
+
+    def tournament_finisher(
             self,
             web_client: aiohttp.ClientSession,
-            loop: asyncio.BaseEventLoop=None) -> None:
-        while True:
-            await asyncio.sleep(60, loop=loop)
-    
-            async with web_client.get(self.tournament_app_base_url + "/") as resp:
-                resp_data = await resp.json()
-    
-            if "tournament" not in resp_data:
-                break
-    
-            tournament = resp_data["tournament"]
-            finished = tournament.get("completed_at", None)
-    
-            if finished:
-                break
-    
+            poller: TournamentPoller) -> Callable[[List[dict]], Awaitable[None]]:
+
+        async def finish_tournament_once_all_matches_completed(matches: List[dict]) -> None:
+            if not all(match.get("match", {}).get("state", "") == "complete" for match in matches):
+                return
+
+            async with web_client.post(self.tournament_url + "/finish") as resp:
+                success = is_success(resp.status)
+
+            # A failed finish is retried on the poller's next tick.
+            if success:
+                poller.refresh()
+
+        return finish_tournament_once_all_matches_completed
+
     async def announce_champion(self, web_client: aiohttp.ClientSession, tournament_data: dict) -> None:
-        async with web_client.get(self.tournament_app_base_url + "/participants") as resp:
+        async with web_client.get(self.tournament_url + "/participants") as resp:
             resp_data = await resp.json()
     
         winner_discord_id = ""
@@ -259,9 +285,16 @@ class TournamentArranger:
                 winner_discord_id, tournament_data.get("name", "the tournament"))
     
             announcement_data = {
+                "server": self.tournament_key,
                 "channel": ANNOUNCEMENT_CHANNEL_NAME,
                 "message": message
             }
             async with web_client.post(self.tournament_bot_base_url + "/announce", json=announcement_data) as _:
                 pass
 
+
+async def sleep_until(wake_time: datetime.datetime) -> None:
+    delay = (wake_time - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+    if delay > 0:
+        await asyncio.sleep(delay)
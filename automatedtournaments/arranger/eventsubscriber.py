@@ -0,0 +1,94 @@
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+import aiohttp
+
+from .tournamentpoller import TournamentPoller
+from .util import is_success
+
+REFRESH_EVENTS = {"match_opened", "match_completed", "tournament_started", "tournament_finished"}
+
+
+# Follows the tournament app's event stream and wakes the poller as soon as something it cares about happens, so
+# announcements go out straight away. While the stream is up the poller only runs as a slow safety net.
+class TournamentEventSubscriber:
+
+    def __init__(
+            self,
+            web_client: aiohttp.ClientSession,
+            tournament_app_base_url: str,
+            poller: TournamentPoller,
+            reconnect_delay: float=1.0,
+            max_reconnect_delay: float=60.0):
+        self._web_client = web_client
+        self._tournament_app_base_url = tournament_app_base_url
+        self._poller = poller
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+
+        self._last_event_id = ""
+        self._listeners = {}
+
+    def add_listener(self, event_type: str, listener: Callable[[dict], Awaitable[None]]) -> None:
+        self._listeners.setdefault(event_type, []).append(listener)
+
+    async def run(self) -> None:
+        delay = self._reconnect_delay
+
+        while not self._poller.finished:
+            headers = {"Last-Event-ID": self._last_event_id} if self._last_event_id else {}
+
+            try:
+                async with self._web_client.get(
+                        self._tournament_app_base_url + "/events", headers=headers, timeout=None) as resp:
+                    if is_success(resp.status):
+                        self._poller.push_connected = True
+                        delay = self._reconnect_delay
+
+                        await self._read_events(resp)
+            # A line longer than the stream's read buffer raises ValueError; the stream is reconnected like any other
+            # broken connection.
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                pass
+            finally:
+                # Anything missed while reconnecting is picked up by polling straight away.
+                if self._poller.push_connected:
+                    self._poller.push_connected = False
+                    self._poller.refresh()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    async def _read_events(self, resp: aiohttp.ClientResponse) -> None:
+        event_type = ""
+        event_data = ""
+
+        async for line in resp.content:
+            line = line.decode("utf-8").rstrip("\r\n")
+
+            if not line:
+                if event_type in REFRESH_EVENTS:
+                    self._poller.refresh()
+
+                if event_type in self._listeners:
+                    self._notify(event_type, event_data)
+
+                event_type = ""
+                event_data = ""
+            elif line.startswith("id:"):
+                self._last_event_id = line[3:].strip()
+            elif line.startswith("event:"):
+                event_type = line[6:].strip()
+            elif line.startswith("data:"):
+                event_data += line[5:].strip()
+
+    def _notify(self, event_type: str, event_data: str) -> None:
+        try:
+            data = json.loads(event_data) if event_data else {}
+        except ValueError:
+            return
+
+        # Listeners post to other services, which must not hold up reading the stream.
+        for listener in self._listeners[event_type]:
+            asyncio.ensure_future(listener(data))
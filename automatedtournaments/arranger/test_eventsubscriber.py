@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+
+from .eventsubscriber import TournamentEventSubscriber
+
+
+class StubPoller:
+
+    def __init__(self):
+        self.finished = False
+        self.push_connected = False
+        self.refreshes = 0
+
+    def refresh(self) -> None:
+        self.refreshes += 1
+
+
+class StubContent:
+
+    def __init__(self, lines):
+        self._lines = list(lines)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if not self._lines:
+            raise StopAsyncIteration
+
+        line = self._lines.pop(0)
+
+        if isinstance(line, Exception):
+            raise line
+
+        return line
+
+
+class StubResponse:
+
+    def __init__(self, lines):
+        self.status = 200
+        self.content = StubContent(lines)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+
+# Serves one scripted event stream per connection and finishes the tournament once the script runs out.
+class StubWebClient:
+
+    def __init__(self, poller: StubPoller, *streams):
+        self.poller = poller
+        self.streams = list(streams)
+        self.requests = []
+
+    def get(self, url: str, headers: dict=None, timeout: float=None) -> StubResponse:
+        self.requests.append(headers)
+
+        if len(self.streams) == 1:
+            self.poller.finished = True
+
+        return StubResponse(self.streams.pop(0))
+
+
+class TournamentEventSubscriberTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.poller = StubPoller()
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_subscriber(self, *streams) -> TournamentEventSubscriber:
+        self.web_client = StubWebClient(self.poller, *streams)
+        subscriber = TournamentEventSubscriber(self.web_client, "http://tournaments", self.poller, reconnect_delay=0.0)
+        self.received = []
+
+        async def listener(data: dict) -> None:
+            self.received.append(data)
+
+        subscriber.add_listener("participant_signed_up", listener)
+        self.loop.run_until_complete(asyncio.wait_for(subscriber.run(), 1.0))
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        return subscriber
+
+    def test_events_are_parsed_from_the_stream_and_resumed_after_a_reconnect(self):
+        self.run_subscriber(
+            [
+                b": keepalive\n",
+                b"\n",
+                b"id: epoch-1\n",
+                b"event: participant_signed_up\n",
+                b'data: {"discord_id": "42"}\n',
+                b"\n",
+                b"id: epoch-2\n",
+                b"event: match_opened\n",
+                b"data: {}\n",
+                b"\n",
+            ],
+            [])
+
+        self.assertEqual(self.received, [{"discord_id": "42"}])
+        self.assertEqual(self.web_client.requests, [{}, {"Last-Event-ID": "epoch-2"}])
+        # Once for the opened match, and once after each disconnect to pick up anything missed.
+        self.assertEqual(self.poller.refreshes, 3)
+
+    def test_oversized_line_reconnects_the_stream(self):
+        self.run_subscriber(
+            [b"id: epoch-1\n", ValueError("Line is too long")],
+            [b"event: participant_signed_up\n", b"data: {}\n", b"\n"])
+
+        self.assertEqual(self.received, [{}])
+        self.assertEqual(self.web_client.requests, [{}, {"Last-Event-ID": "epoch-1"}])
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+
+import aiohttp
+
+from .tournamentpoller import TournamentPoller
+
+
+def matches(*states: str) -> dict:
+    return {"matches": [{"match": {"id": match_id, "state": state}} for match_id, state in enumerate(states)]}
+
+
+class StubResponse:
+
+    def __init__(self, resp_data):
+        self._resp_data = resp_data
+
+    async def json(self):
+        if isinstance(self._resp_data, Exception):
+            raise self._resp_data
+
+        return self._resp_data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+
+# Answers each GET of /matches with the next scripted response body.
+class StubWebClient:
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def get(self, url: str, headers: dict=None) -> StubResponse:
+        self.requests += 1
+        return StubResponse(self.responses.pop(0))
+
+
+class TournamentPollerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def poll(self, poller: TournamentPoller, times: int) -> None:
+        for _ in range(times):
+            self.loop.run_until_complete(poller.poll())
+
+    def new_poller(self, web_client: StubWebClient) -> TournamentPoller:
+        return TournamentPoller(
+            web_client,
+            "http://tournaments",
+            min_interval=5.0,
+            open_interval=30.0,
+            idle_interval=60.0,
+            pushed_interval=300.0,
+            backoff_factor=2.0)
+
+    def test_quiet_open_matches_back_off_to_the_open_interval(self):
+        poller = self.new_poller(StubWebClient(*([matches("open", "pending")] * 5)))
+
+        self.poll(poller, 1)
+        self.assertEqual(poller.interval, 5.0)
+
+        self.poll(poller, 4)
+        self.assertEqual(poller.interval, 30.0)
+
+    def test_changed_match_drops_to_the_min_interval(self):
+        poller = self.new_poller(StubWebClient(
+            matches("open", "pending"), matches("open", "pending"), matches("complete", "open")))
+
+        self.poll(poller, 2)
+        self.assertEqual(poller.interval, 10.0)
+
+        self.poll(poller, 1)
+        self.assertEqual(poller.interval, 5.0)
+
+    def test_unreachable_app_backs_off_to_the_idle_interval(self):
+        poller = self.new_poller(StubWebClient(*([aiohttp.ClientError()] * 5)))
+
+        self.poll(poller, 5)
+
+        self.assertEqual(poller.interval, 60.0)
+        self.assertFalse(poller.finished)
+
+    def test_connected_event_stream_backs_polling_off_further(self):
+        poller = self.new_poller(StubWebClient(*([matches("open")] * 8)))
+        poller.push_connected = True
+
+        self.poll(poller, 8)
+
+        self.assertEqual(poller.interval, 300.0)
+
+    def test_listeners_get_every_poll_and_finished_tournament_stops_polling(self):
+        web_client = StubWebClient(matches("open"), {"error": "TOURNAMENT_FINISHED"})
+        poller = self.new_poller(web_client)
+        polled = []
+
+        async def listener(polled_matches: list) -> None:
+            polled.append(polled_matches)
+            poller.refresh()
+
+        poller.add_listener(listener)
+        poller.refresh()
+
+        self.loop.run_until_complete(asyncio.wait_for(poller.run(), 1.0))
+
+        self.assertTrue(poller.finished)
+        self.assertEqual(polled, [matches("open")["matches"]])
+        self.assertEqual(web_client.requests, 2)
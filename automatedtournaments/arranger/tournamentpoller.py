@@ -0,0 +1,100 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+import aiohttp
+
+# Polling is background traffic, so the tournament app lets interactive player commands overtake it.
+BACKGROUND_REQUEST_HEADERS = {"X-Request-Priority": "background"}
+
+FINAL_ERRORS = {"TOURNAMENT_FINISHED", "TOURNAMENT_NOT_CREATED"}
+
+
+# Fetches the matches of one arranged tournament once per tick and hands them to every listener. The interval
+# drops to min_interval whenever a match changes state and backs off towards open_interval while matches are open
+# but quiet, or towards idle_interval while there is nothing to play. While push_connected is set an event stream is
+# calling refresh() on every change, so polling backs off as far as pushed_interval.
+class TournamentPoller:
+
+    def __init__(
+            self,
+            web_client: aiohttp.ClientSession,
+            tournament_app_base_url: str,
+            min_interval: float=5.0,
+            open_interval: float=30.0,
+            idle_interval: float=60.0,
+            pushed_interval: float=300.0,
+            backoff_factor: float=1.5):
+        self._web_client = web_client
+        self._tournament_app_base_url = tournament_app_base_url
+        self._min_interval = min_interval
+        self._open_interval = open_interval
+        self._idle_interval = idle_interval
+        self._pushed_interval = pushed_interval
+        self._backoff_factor = backoff_factor
+
+        self._listeners = []
+        self._interval = min_interval
+        self._match_states = {}
+        self._refresh_requested = asyncio.Event()
+
+        self.finished = False
+        self.push_connected = False
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def add_listener(self, listener: Callable[[List[dict]], Awaitable[None]]) -> None:
+        self._listeners.append(listener)
+
+    def refresh(self) -> None:
+        self._interval = self._min_interval
+        self._refresh_requested.set()
+
+    async def run(self) -> None:
+        while not self.finished:
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._refresh_requested.clear()
+            await self.poll()
+
+    async def poll(self) -> None:
+        try:
+            async with self._web_client.get(
+                    self._tournament_app_base_url + "/matches", headers=BACKGROUND_REQUEST_HEADERS) as resp:
+                resp_data = await resp.json()
+        except (aiohttp.ClientError, ValueError):
+            self._back_off(self._idle_interval)
+            return
+
+        if resp_data.get("error", "") in FINAL_ERRORS:
+            self.finished = True
+            return
+
+        if "matches" not in resp_data:
+            self._back_off(self._idle_interval)
+            return
+
+        matches = resp_data["matches"]
+        match_states = dict(
+            (match.get("match", {}).get("id", None), match.get("match", {}).get("state", "")) for match in matches)
+
+        if match_states != self._match_states:
+            self._match_states = match_states
+            self._interval = self._min_interval
+        elif "open" in match_states.values():
+            self._back_off(self._open_interval)
+        else:
+            self._back_off(self._idle_interval)
+
+        for listener in self._listeners:
+            await listener(matches)
+
+    def _back_off(self, ceiling: float) -> None:
+        if self.push_connected:
+            ceiling = max(ceiling, self._pushed_interval)
+
+        self._interval = min(max(self._interval * self._backoff_factor, self._min_interval), ceiling)
@@ -0,0 +1,115 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+import discord
+
+from automatedtournaments.ratelimit import TokenBucket
+
+MAX_MESSAGE_LENGTH = 2000
+
+
+def split_message(message: str, max_length: int=MAX_MESSAGE_LENGTH) -> List[str]:
+    chunks = []
+    chunk = ""
+
+    for line in message.split("\n"):
+        # A single line over the limit has no better place to break than the limit itself.
+        while len(line) > max_length:
+            if chunk:
+                chunks.append(chunk)
+                chunk = ""
+
+            chunks.append(line[:max_length])
+            line = line[max_length:]
+
+        if chunk and len(chunk) + 1 + len(line) > max_length:
+            chunks.append(chunk)
+            chunk = line
+        else:
+            chunk = chunk + "\n" + line if chunk else line
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+# Queues announcements per channel and delivers them in the background. Messages for a channel that arrive within
+# coalesce_window are merged into one, split again at Discord's message size limit, and sent no faster than the
+# per-channel and global rate limits allow.
+class AnnouncementOutbox:
+
+    def __init__(
+            self,
+            send_message: Callable[[discord.Channel, str], Awaitable],
+            coalesce_window: float=0.5,
+            channel_rate: float=1.0,
+            channel_burst: float=5.0,
+            global_rate: float=50.0,
+            max_concurrent_sends: int=8):
+        self._send_message = send_message
+        self._coalesce_window = coalesce_window
+        self._channel_rate = channel_rate
+        self._channel_burst = channel_burst
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._send_semaphore = asyncio.Semaphore(max_concurrent_sends)
+
+        self._pending = {}
+        self._workers = {}
+        self._channel_buckets = {}
+
+    def enqueue(self, channel: discord.Channel, message: str) -> None:
+        self._pending.setdefault(channel.id, []).append(message)
+
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.ensure_future(self._deliver(channel))
+
+    def pending_count(self) -> int:
+        return sum(len(messages) for messages in self._pending.values())
+
+    async def drain(self, timeout: float) -> None:
+        workers = list(self._workers.values())
+
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    def close(self) -> None:
+        for worker in self._workers.values():
+            worker.cancel()
+
+        if self.pending_count():
+            print("Dropped {} undelivered announcements".format(self.pending_count()))
+
+    async def _deliver(self, channel: discord.Channel) -> None:
+        try:
+            while self._pending.get(channel.id, None):
+                await asyncio.sleep(self._coalesce_window)
+
+                messages = self._pending.pop(channel.id)
+                merged_message = "\n".join(message.rstrip("\n") for message in messages)
+
+                for chunk in split_message(merged_message):
+                    await self._take(self._get_channel_bucket(channel.id))
+                    await self._take(self._global_bucket)
+
+                    try:
+                        async with self._send_semaphore:
+                            await self._send_message(channel, chunk)
+                    except discord.DiscordException as error:
+                        print("Failed to send announcement to channel {}: {}".format(channel.id, error))
+        finally:
+            self._workers.pop(channel.id, None)
+
+    def _get_channel_bucket(self, channel_id: str) -> TokenBucket:
+        if channel_id not in self._channel_buckets:
+            self._channel_buckets[channel_id] = TokenBucket(self._channel_rate, self._channel_burst)
+
+        return self._channel_buckets[channel_id]
+
+    @staticmethod
+    async def _take(bucket: TokenBucket) -> None:
+        wait = bucket.try_take()
+
+        while wait:
+            await asyncio.sleep(wait)
+            wait = bucket.try_take()
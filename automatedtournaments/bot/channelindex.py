@@ -0,0 +1,50 @@
+from typing import Iterable, List
+
+import discord
+from discord import ChannelType
+
+
+# Text channels by name, kept current from Discord's channel and server events so an announcement finds its channels
+# without walking every channel of every server the bot is in.
+class ChannelIndex:
+
+    def __init__(self):
+        self._channels_by_name = {}
+
+    def rebuild(self, channels: Iterable[discord.Channel]) -> None:
+        self._channels_by_name = {}
+
+        for channel in channels:
+            self.add(channel)
+
+    def add(self, channel: discord.Channel) -> None:
+        if channel.is_private or channel.type != ChannelType.text:
+            return
+
+        self._channels_by_name.setdefault(channel.name, {})[channel.id] = channel
+
+    def remove(self, channel: discord.Channel) -> None:
+        channels = self._channels_by_name.get(channel.name, {})
+        channels.pop(channel.id, None)
+
+        if not channels:
+            self._channels_by_name.pop(channel.name, None)
+
+    def update(self, before: discord.Channel, after: discord.Channel) -> None:
+        self.remove(before)
+        self.add(after)
+
+    def add_server(self, server: discord.Server) -> None:
+        for channel in server.channels:
+            self.add(channel)
+
+    def remove_server(self, server: discord.Server) -> None:
+        for channel in server.channels:
+            self.remove(channel)
+
+    def find(self, channel_name: str, server_id: str="") -> List[discord.Channel]:
+        return [
+            channel
+            for channel
+            in self._channels_by_name.get(channel_name, {}).values()
+            if not server_id or channel.server.id == server_id]
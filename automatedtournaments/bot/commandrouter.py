@@ -0,0 +1,65 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple
+
+import discord
+
+COMMAND_PREFIX = ";"
+
+
+# Maps the first word of a message to its handler with one dict lookup and runs handlers as tracked tasks, so a slow
+# command never holds up the next message. At most max_concurrent_commands run at once and at most
+# max_pending_commands are admitted in total. A message repeated by a user in the same channel while the previous one
+# is still in flight is dropped rather than queued, so spamming ;victory reaches the tournament app once. The first
+# repeat is reported back so the user knows why nothing happened, and later ones are dropped quietly.
+class CommandRouter:
+
+    def __init__(
+            self,
+            handlers: Dict[str, Callable[[discord.Message], Awaitable[None]]],
+            max_concurrent_commands: int=32,
+            max_pending_commands: int=256):
+        self._handlers = handlers
+        self._max_pending_commands = max_pending_commands
+        self._semaphore = asyncio.Semaphore(max_concurrent_commands)
+
+        self._in_flight = {}
+        self._repeated = set()
+
+    def route(self, message: discord.Message) -> str:
+        if not message.content.startswith(COMMAND_PREFIX):
+            return ""
+
+        words = message.content[len(COMMAND_PREFIX):].split(None, 1)
+        command = words[0] if words else ""
+
+        return command if command in self._handlers else ""
+
+    def submit(self, command: str, message: discord.Message) -> Tuple[bool, str]:
+        key = (message.author.id, message.channel.id, " ".join(message.content.split()))
+
+        if key in self._in_flight:
+            if key in self._repeated:
+                return False, ""
+
+            self._repeated.add(key)
+            return False, "COMMAND_IN_PROGRESS"
+
+        if len(self._in_flight) >= self._max_pending_commands:
+            return False, "TOO_MANY_COMMANDS"
+
+        task = asyncio.ensure_future(self._run(self._handlers[command], message))
+        task.add_done_callback(lambda finished_task: self._finish(key, finished_task))
+        self._in_flight[key] = task
+
+        return True, ""
+
+    async def _run(self, handler: Callable[[discord.Message], Awaitable[None]], message: discord.Message) -> None:
+        async with self._semaphore:
+            await handler(message)
+
+    def _finish(self, key: tuple, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        self._repeated.discard(key)
+
+        if not task.cancelled() and task.exception() is not None:
+            print("Command {!r} from {} failed: {!r}".format(key[2], key[0], task.exception()))
@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+
+from .announcementoutbox import AnnouncementOutbox, split_message
+
+
+class FakeChannel:
+
+    def __init__(self, channel_id: str):
+        self.id = channel_id
+
+
+class SplitMessageTest(unittest.TestCase):
+
+    def test_lines_are_kept_whole_when_they_fit(self):
+        self.assertEqual(split_message("first\nsecond\nthird", max_length=12), ["first\nsecond", "third"])
+
+    def test_line_over_the_limit_is_cut_at_the_limit(self):
+        self.assertEqual(split_message("ab\n" + "x" * 7, max_length=3), ["ab", "xxx", "xxx", "x"])
+
+
+class AnnouncementOutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.sent = []
+
+        async def send_message(channel: FakeChannel, message: str) -> None:
+            self.sent.append((channel.id, message))
+
+        self.outbox = AnnouncementOutbox(send_message, coalesce_window=0.01, channel_rate=1000.0, global_rate=1000.0)
+
+    def tearDown(self):
+        self.outbox.close()
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_messages_for_a_channel_within_the_window_are_sent_as_one(self):
+        first_channel = FakeChannel("1")
+        second_channel = FakeChannel("2")
+
+        self.outbox.enqueue(first_channel, "Match 1 is open\n")
+        self.outbox.enqueue(second_channel, "Welcome")
+        self.outbox.enqueue(first_channel, "Match 2 is open")
+        self.loop.run_until_complete(self.outbox.drain(1.0))
+
+        self.assertEqual(sorted(self.sent), [("1", "Match 1 is open\nMatch 2 is open"), ("2", "Welcome")])
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_message_enqueued_after_a_send_starts_a_new_batch(self):
+        channel = FakeChannel("1")
+
+        self.outbox.enqueue(channel, "first")
+        self.loop.run_until_complete(self.outbox.drain(1.0))
+        self.outbox.enqueue(channel, "second")
+        self.loop.run_until_complete(self.outbox.drain(1.0))
+
+        self.assertEqual(self.sent, [("1", "first"), ("1", "second")])
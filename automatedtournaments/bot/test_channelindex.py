@@ -0,0 +1,62 @@
+import unittest
+
+from discord import ChannelType
+
+from .channelindex import ChannelIndex
+
+
+class FakeServer:
+
+    def __init__(self, server_id: str, *channels):
+        self.id = server_id
+        self.channels = []
+
+        for channel_id, name, channel_type in channels:
+            self.channels.append(FakeChannel(channel_id, name, self, channel_type))
+
+
+class FakeChannel:
+
+    def __init__(self, channel_id: str, name: str, server: FakeServer, channel_type=ChannelType.text):
+        self.id = channel_id
+        self.name = name
+        self.server = server
+        self.type = channel_type
+        self.is_private = False
+
+
+class ChannelIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.first_server = FakeServer(
+            "1", ("11", "announcements", ChannelType.text), ("12", "announcements", ChannelType.voice))
+        self.second_server = FakeServer("2", ("21", "announcements", ChannelType.text))
+
+        self.index = ChannelIndex()
+        self.index.rebuild(self.first_server.channels + self.second_server.channels)
+
+    def ids(self, channel_name: str, server_id: str="") -> list:
+        return sorted(channel.id for channel in self.index.find(channel_name, server_id))
+
+    def test_text_channels_are_found_by_name_and_server(self):
+        self.assertEqual(self.ids("announcements"), ["11", "21"])
+        self.assertEqual(self.ids("announcements", "2"), ["21"])
+        self.assertEqual(self.ids("general"), [])
+
+    def test_renamed_channel_moves_to_its_new_name(self):
+        before = self.first_server.channels[0]
+        after = FakeChannel(before.id, "general", self.first_server)
+
+        self.index.update(before, after)
+
+        self.assertEqual(self.ids("announcements"), ["21"])
+        self.assertEqual(self.ids("general"), ["11"])
+
+    def test_server_channels_leave_with_the_server(self):
+        self.index.remove_server(self.second_server)
+
+        self.assertEqual(self.ids("announcements"), ["11"])
+
+        self.index.add_server(self.second_server)
+
+        self.assertEqual(self.ids("announcements"), ["11", "21"])
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from .commandrouter import CommandRouter
+
+
+class FakeMessage:
+
+    def __init__(self, author_id: str, channel_id: str, content: str):
+        self.author = FakeDiscordObject(author_id)
+        self.channel = FakeDiscordObject(channel_id)
+        self.content = content
+
+
+class FakeDiscordObject:
+
+    def __init__(self, object_id: str):
+        self.id = object_id
+
+
+class CommandRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.release = asyncio.Event()
+        self.handled = []
+
+        async def victory(message: FakeMessage) -> None:
+            await self.release.wait()
+            self.handled.append(message.content)
+
+        self.router = CommandRouter({"victory": victory}, max_pending_commands=3)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def finish_commands(self) -> None:
+        self.release.set()
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+    def test_commands_are_routed_by_their_first_word(self):
+        self.assertEqual(self.router.route(FakeMessage("1", "1", ";victory please")), "victory")
+        self.assertEqual(self.router.route(FakeMessage("1", "1", ";unknown")), "")
+        self.assertEqual(self.router.route(FakeMessage("1", "1", "victory")), "")
+
+    def test_repeat_of_an_in_flight_command_is_reported_once_then_dropped(self):
+        self.assertEqual(self.router.submit("victory", FakeMessage("1", "1", ";victory")), (True, ""))
+        self.assertEqual(
+            self.router.submit("victory", FakeMessage("1", "1", " ;victory ")), (False, "COMMAND_IN_PROGRESS"))
+        self.assertEqual(self.router.submit("victory", FakeMessage("1", "1", ";victory")), (False, ""))
+
+        self.finish_commands()
+
+        self.assertEqual(self.handled, [";victory"])
+        self.assertEqual(self.router.submit("victory", FakeMessage("1", "1", ";victory")), (True, ""))
+
+        self.finish_commands()
+
+    def test_same_command_from_another_user_or_channel_is_not_a_repeat(self):
+        self.assertEqual(self.router.submit("victory", FakeMessage("1", "1", ";victory")), (True, ""))
+        self.assertEqual(self.router.submit("victory", FakeMessage("2", "1", ";victory")), (True, ""))
+        self.assertEqual(self.router.submit("victory", FakeMessage("1", "2", ";victory")), (True, ""))
+
+        self.finish_commands()
+
+        self.assertEqual(self.handled, [";victory"] * 3)
+
+    def test_commands_past_the_pending_limit_are_refused(self):
+        for author_id in ("1", "2", "3"):
+            self.router.submit("victory", FakeMessage(author_id, "1", ";victory"))
+
+        self.assertEqual(
+            self.router.submit("victory", FakeMessage("4", "1", ";victory")), (False, "TOO_MANY_COMMANDS"))
+
+        self.finish_commands()
@@ -1,10 +1,15 @@
 import asyncio
+import json
+
 import discord
 import aiohttp
 import aiohttp.web
 
-from discord import ChannelType
 from automatedtournaments import UserDatabase
+from automatedtournaments.metrics import instrument_app
+from .announcementoutbox import AnnouncementOutbox
+from .channelindex import ChannelIndex
+from .commandrouter import CommandRouter
 
 ERROR_REASONS = {
     "UNREGISTERED_USER": "Please use the *;register* command to register your challonge username first.",
@@ -12,7 +17,12 @@ ERROR_REASONS = {
     "TOURNAMENT_STARTED": "The tournament has already started, and sign-ups have closed.",
     "TOURNAMENT_FINISHED": "There are no open tournaments.",
     "USER_SIGNED_UP": "You're already signed up 🙃",
-    "NO_OPEN_MATCHES_FOR_PLAYER": "You don't have any open matches."
+    "NO_OPEN_MATCHES_FOR_PLAYER": "You don't have any open matches.",
+    "UPSTREAM_ERROR": "Challonge didn't accept the request. Please try again.",
+    "UPSTREAM_UNAVAILABLE": "Challonge is busy right now. Please try again in a minute.",
+    "ARRANGEMENT_LIMIT_REACHED": "Too many tournaments are being arranged right now. Please try again later.",
+    "COMMAND_IN_PROGRESS": "I'm still working on that command, hang tight!",
+    "TOO_MANY_COMMANDS": "I'm handling a lot of commands right now. Please try again in a moment."
 }
 
 
@@ -26,7 +36,10 @@ class TournamentBot:
             user_database: UserDatabase,
             tournament_app_base_url: str,
             tournament_arranger_base_url: str,
-            web_app_port: int):
+            web_app_port: int,
+            max_concurrent_announcements: int=8,
+            max_concurrent_commands: int=32,
+            shutdown_drain_timeout: float=10.0):
         self._bot_token = bot_token
         self._discord_client = discord_client
         self._web_client = web_client
@@ -34,32 +47,77 @@ class TournamentBot:
         self._tournament_app_base_url = tournament_app_base_url
         self._tournament_arranger_base_url = tournament_arranger_base_url
         self._web_app = aiohttp.web.Application()
+        instrument_app(self._web_app)
         self._web_app_port = web_app_port
 
+        self._channel_index = ChannelIndex()
+        self._outbox = AnnouncementOutbox(
+            self._discord_client.send_message, max_concurrent_sends=max_concurrent_announcements)
+
         self._web_app.router.add_post("/announce", self.make_announcement)
 
-        _command_lookup = [
-            (func.replace("handle_", ""), getattr(self, func))
-            for func
-            in dir(self)
-            if callable(getattr(self, func)) and func.startswith("handle_")]
+        self._shutdown_drain_timeout = shutdown_drain_timeout
+        self._web_app.on_shutdown.append(self._close_outbox)
+
+        self._command_router = CommandRouter(
+            dict(
+                (func.replace("handle_", ""), getattr(self, func))
+                for func
+                in dir(self)
+                if callable(getattr(self, func)) and func.startswith("handle_")),
+            max_concurrent_commands)
 
         @discord_client.event
         async def on_ready() -> None:
+            self._channel_index.rebuild(self._discord_client.get_all_channels())
             print('Discord client connected.')
 
+        @discord_client.event
+        async def on_channel_create(channel: discord.Channel) -> None:
+            self._channel_index.add(channel)
+
+        @discord_client.event
+        async def on_channel_delete(channel: discord.Channel) -> None:
+            self._channel_index.remove(channel)
+
+        @discord_client.event
+        async def on_channel_update(before: discord.Channel, after: discord.Channel) -> None:
+            self._channel_index.update(before, after)
+
+        @discord_client.event
+        async def on_server_join(server: discord.Server) -> None:
+            self._channel_index.add_server(server)
+
+        @discord_client.event
+        async def on_server_available(server: discord.Server) -> None:
+            self._channel_index.add_server(server)
+
+        @discord_client.event
+        async def on_server_remove(server: discord.Server) -> None:
+            self._channel_index.remove_server(server)
+
+        @discord_client.event
+        async def on_server_unavailable(server: discord.Server) -> None:
+            self._channel_index.remove_server(server)
+
         @discord_client.event
         async def on_message(message: discord.Message) -> None:
             if message.author == self._discord_client.user:
                 return
 
-            for command, func in _command_lookup:
-                if message.content.startswith(";" + command):
-                    await func(message)
-                    break
-            else:
-                if self._discord_client.user.mention in message.content:
-                    await self.handle_help(message)
+            command = self._command_router.route(message)
+
+            if not command and self._discord_client.user.mention in message.content:
+                command = "help"
+
+            if not command:
+                return
+
+            _, error = self._command_router.submit(command, message)
+
+            # Replies about dropped commands go through the outbox, so a burst of them is merged and rate limited.
+            if error:
+                self._outbox.enqueue(message.channel, "{} {}".format(message.author.mention, ERROR_REASONS[error]))
 
     async def handle_help(self, message: discord.Message) -> None:
         await self._discord_client.send_message(
@@ -88,13 +146,14 @@ class TournamentBot:
         challonge_id = split_message[1]
 
         await self._user_database.set_challonge_id(message.author.id, challonge_id)
+        await self._invalidate_profile(message.author.id)
 
         await self._discord_client.send_message(
             message.channel,
             "Registered challonge username **{}** for {}".format(challonge_id, message.author.mention))
 
     async def handle_signup(self, message: discord.Message) -> None:
-        async with self._web_client.post(self._tournament_app_base_url + "/signup/" + message.author.id) as resp:
+        async with self._web_client.post(self._tournament_url(message) + "/signup/" + message.author.id) as resp:
             resp_data = await resp.json()
 
         if resp_data and "error" in resp_data:
@@ -106,7 +165,7 @@ class TournamentBot:
         await self._discord_client.send_message(message.channel, reply)
 
     async def handle_victory(self, message: discord.Message) -> None:
-        async with self._web_client.post(self._tournament_app_base_url + "/victory/" + message.author.id) as resp:
+        async with self._web_client.post(self._tournament_url(message) + "/victory/" + message.author.id) as resp:
             resp_data = await resp.json()
 
         if resp_data and "error" in resp_data:
@@ -119,7 +178,7 @@ class TournamentBot:
         await self._discord_client.send_message(message.channel, reply)
 
     async def handle_loss(self, message: discord.Message) -> None:
-        async with self._web_client.post(self._tournament_app_base_url + "/loss/" + message.author.id) as resp:
+        async with self._web_client.post(self._tournament_url(message) + "/loss/" + message.author.id) as resp:
             resp_data = await resp.json()
 
         if resp_data and "error" in resp_data:
@@ -132,7 +191,7 @@ class TournamentBot:
         await self._discord_client.send_message(message.channel, reply)
 
     async def handle_forfeit(self, message: discord.Message) -> None:
-        async with self._web_client.post(self._tournament_app_base_url + "/forfeit/" + message.author.id) as resp:
+        async with self._web_client.post(self._tournament_url(message) + "/forfeit/" + message.author.id) as resp:
             resp_data = await resp.json()
 
         if resp_data and "error" in resp_data:
@@ -150,7 +209,7 @@ class TournamentBot:
 
         discord_id = split_message[1].replace("<", "").replace(">", "").replace("@", "").replace("!", "")
 
-        async with self._web_client.post(self._tournament_app_base_url + "/forfeit/" + discord_id) as resp:
+        async with self._web_client.post(self._tournament_url(message) + "/forfeit/" + discord_id) as resp:
             resp_data = await resp.json()
 
         if resp_data and "error" in resp_data:
@@ -163,9 +222,17 @@ class TournamentBot:
         await self._discord_client.send_message(message.channel, reply)
 
     async def handle_tournament(self, message: discord.Message) -> None:
-        async with self._web_client.get(self._tournament_app_base_url + "/") as resp:
+        async with self._web_client.get(self._tournament_url(message) + "/") as resp:
             resp_data = await resp.json()
 
+        # Sign-ups and results from a server without a running tournament of its own go to the default tournament,
+        # so that is the one to describe.
+        if message.server and resp_data and (
+                resp_data.get("error", "") == "TOURNAMENT_NOT_CREATED" or
+                resp_data.get("tournament", {}).get("completed_at", "")):
+            async with self._web_client.get(self._tournament_app_base_url + "/") as resp:
+                resp_data = await resp.json()
+
         if not resp_data or "error" in resp_data:
             reply = "{} Unable to get tournament details.\n".format(message.author.mention)
             reply += ERROR_REASONS.get(resp_data.get("error", ""), "")
@@ -192,8 +259,18 @@ class TournamentBot:
         reply = "{} Attempting to start a new tournament.".format(message.author.mention)
         await self._discord_client.send_message(message.channel, reply)
 
-        async with self._web_client.post(self._tournament_arranger_base_url + "/arrange") as _:
-            pass
+        arrangement_data = {"tournament_key": message.server.id} if message.server else {}
+        # Encoded by hand, as the aiohttp that discord.py 0.16 pins has no json argument on requests.
+        async with self._web_client.post(
+                self._tournament_arranger_base_url + "/arrange",
+                data=json.dumps(arrangement_data),
+                headers={"Content-Type": "application/json"}) as resp:
+            resp_data = await resp.json()
+
+        if resp_data and "error" in resp_data:
+            reply = "{} Sorry, I couldn't arrange a tournament!\n".format(message.author.mention)
+            reply += ERROR_REASONS.get(resp_data["error"], "")
+            await self._discord_client.send_message(message.channel, reply)
 
     async def make_announcement(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
         request_data = await request.json()
@@ -211,16 +288,36 @@ class TournamentBot:
         if not message:
             return
 
-        matching_channels = [
-            channel
-            for channel
-            in self._discord_client.get_all_channels()
-            if channel.name == channel_name and not channel.is_private and channel.type == ChannelType.text]
+        for channel in self._channel_index.find(channel_name, request_data.get("server", "")):
+            self._outbox.enqueue(channel, message)
+
+        return aiohttp.web.HTTPAccepted()
+
+    # Each Discord server can run its own tournament, keyed by the server id, and the tournament app sends players to
+    # the default tournament while it has none. Direct messages always use the default one.
+    def _tournament_url(self, message: discord.Message) -> str:
+        if message.server:
+            return self._tournament_app_base_url + "/tournaments/" + message.server.id
+
+        return self._tournament_app_base_url
+
+    async def _invalidate_profile(self, discord_id: str) -> None:
+        # The tournament app caches profiles too, and would otherwise sign players up with their old username until
+        # its copy expires.
+        try:
+            async with self._web_client.post(
+                    self._tournament_app_base_url + "/profiles/" + discord_id + "/invalidate") as resp:
+                status = resp.status
+        except aiohttp.ClientError as error:
+            status = error
 
-        for channel in matching_channels:
-            await self._discord_client.send_message(channel, message)
+        if status != 200:
+            print("Failed to invalidate the tournament app's profile for {}: {}".format(discord_id, status))
 
-        return aiohttp.web.HTTPNoContent()
+    async def _close_outbox(self, _: aiohttp.web.Application) -> None:
+        # Announcements already accepted get a moment to go out before the process exits.
+        await self._outbox.drain(self._shutdown_drain_timeout)
+        self._outbox.close()
 
     def start(self):
         asyncio.ensure_future(self._discord_client.start(self._bot_token))
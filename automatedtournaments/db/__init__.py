@@ -1 +1,2 @@
-from .userdatabase import UserDatabase
\ No newline at end of file
+from .userdatabase import UserDatabase
+from .restuserdatabase import RestUserDatabase
@@ -0,0 +1,55 @@
+import collections
+import time
+from typing import Callable, Tuple
+
+
+class ProfileCache:
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float]=time.monotonic):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, discord_id: str) -> Tuple[str, str]:
+        entry = self._entries.get(discord_id, None)
+
+        if entry is not None:
+            expires_at, profile = entry
+
+            if self._clock() < expires_at:
+                self._entries.move_to_end(discord_id)
+                self.hits += 1
+                return profile
+
+            del self._entries[discord_id]
+
+        self.misses += 1
+        return None
+
+    def put(self, discord_id: str, profile: Tuple[str, str]) -> None:
+        if self._max_size <= 0 or self._ttl <= 0:
+            return
+
+        self._entries[discord_id] = (self._clock() + self._ttl, profile)
+        self._entries.move_to_end(discord_id)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def peek(self, discord_id: str) -> Tuple[str, str]:
+        entry = self._entries.get(discord_id, None)
+
+        if entry is None or self._clock() >= entry[0]:
+            return None
+
+        return entry[1]
+
+    def invalidate(self, discord_id: str) -> None:
+        self._entries.pop(discord_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
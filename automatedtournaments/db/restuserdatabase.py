@@ -0,0 +1,168 @@
+import asyncio
+import json
+from typing import Dict, Iterable, List, Tuple
+
+import aiohttp
+from pyrebase import pyrebase
+
+from automatedtournaments.validatorstore import ValidatorStore
+from .userdatabase import REQUEST_DURATION, UserDatabase
+
+# Access tokens are refreshed this long before Google says they expire, so none expires on its way to Firebase.
+ACCESS_TOKEN_EXPIRY_MARGIN = 60.0
+
+
+def firebase_key_order(key: str) -> Tuple[int, int, str]:
+    # Firebase orders keys that parse as 32-bit integers numerically, ahead of every other key in string order.
+    if key.isdigit() and int(key) < 2 ** 31:
+        return 0, int(key), ""
+
+    return 1, 0, key
+
+
+class RestUserDatabase(UserDatabase):
+
+    def __init__(
+            self,
+            db_config: dict,
+            client_session: aiohttp.ClientSession=None,
+            auth_token: str="",
+            max_connections: int=20,
+            keepalive_timeout: float=60.0,
+            profile_cache_size: int=4096,
+            profile_cache_ttl: float=3600.0,
+            max_concurrent_reads: int=16,
+            members_per_query: int=100):
+        # Without a database secret, requests are authorised with an OAuth access token for the service account in
+        # firebase.cfg, loaded the same way pyrebase loads it. Unauthenticated requests would only fail on every read.
+        if not auth_token and not db_config.get("serviceAccount", None):
+            raise ValueError("RestUserDatabase needs an auth_token or a serviceAccount in the database config")
+
+        super().__init__(db_config, profile_cache_size, profile_cache_ttl, max_concurrent_reads)
+
+        self._database_url = db_config["databaseURL"].rstrip("/")
+        self._web_client = client_session
+        self._owns_web_client = client_session is None
+        self._auth_token = auth_token
+        self._credentials = None if auth_token else pyrebase.initialize_app(db_config).credentials
+
+        self._access_token = ""
+        self._access_token_expires_at = 0.0
+        self._access_token_lock = asyncio.Lock()
+        self._max_connections = max_connections
+        self._keepalive_timeout = keepalive_timeout
+        self._members_per_query = members_per_query
+
+        self._validators = ValidatorStore(profile_cache_size)
+
+    async def close(self) -> None:
+        await super().close()
+
+        if self._owns_web_client and self._web_client is not None:
+            await self._web_client.close()
+            self._web_client = None
+
+    async def _get_member(self, discord_id: str) -> dict:
+        member_url = self._member_url(discord_id)
+        etag, cached_member = self._validators.get(member_url)
+
+        # Firebase only returns an ETag when asked to, and it is what the next read sends back as If-None-Match.
+        headers = {"X-Firebase-ETag": "true"}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        async with self._get_web_client().get(member_url, params=await self._query_params(), headers=headers) as resp:
+            if resp.status == 304:
+                self._validators.record_not_modified()
+                return cached_member if cached_member else {}
+
+            resp.raise_for_status()
+            member = await resp.json()
+
+        self._validators.put(member_url, resp.headers.get("ETag", ""), member)
+
+        return member if member else {}
+
+    async def _get_members(self, discord_ids: Iterable[str]) -> Dict[str, dict]:
+        discord_ids = sorted(set(discord_ids), key=firebase_key_order)
+
+        # A single member is cheaper to read on its own, where the read can be answered 304 Not Modified.
+        if len(discord_ids) <= 1:
+            return await super()._get_members(discord_ids)
+
+        # Firebase has no query for a set of keys, so the sorted ids are read as a few key ranges instead, each of
+        # members_per_query requested members. A range also returns any member whose key falls between the requested
+        # ones, and those are dropped.
+        chunks = [
+            discord_ids[start:start + self._members_per_query]
+            for start
+            in range(0, len(discord_ids), self._members_per_query)]
+
+        members = {}
+        for chunk_members in await asyncio.gather(*(self._get_member_range(chunk) for chunk in chunks)):
+            members.update(chunk_members)
+
+        return dict((discord_id, members.get(discord_id, None) or {}) for discord_id in discord_ids)
+
+    async def _get_member_range(self, discord_ids: List[str]) -> Dict[str, dict]:
+        query_params = await self._query_params()
+        query_params.update({
+            "orderBy": json.dumps("$key"),
+            "startAt": json.dumps(discord_ids[0]),
+            "endAt": json.dumps(discord_ids[-1]),
+        })
+
+        with REQUEST_DURATION.time(operation="get_member_range"):
+            async with self._get_web_client().get(
+                    self._database_url + "/members.json", params=query_params) as resp:
+                resp.raise_for_status()
+                members = await resp.json()
+
+        requested_discord_ids = set(discord_ids)
+
+        return dict(
+            (discord_id, member)
+            for discord_id, member
+            in (members if isinstance(members, dict) else {}).items()
+            if discord_id in requested_discord_ids)
+
+    async def _update_member(self, discord_id: str, member_data: dict) -> None:
+        # Encoded by hand, as the bot runs on the aiohttp that discord.py 0.16 pins, which has no json argument.
+        async with self._get_web_client().patch(
+                self._member_url(discord_id),
+                params=await self._query_params(),
+                data=json.dumps(member_data),
+                headers={"Content-Type": "application/json"}) as resp:
+            resp.raise_for_status()
+
+    def _member_url(self, discord_id: str) -> str:
+        return self._database_url + "/members/" + discord_id + ".json"
+
+    async def _query_params(self) -> dict:
+        if self._auth_token:
+            return {"auth": self._auth_token}
+
+        return {"access_token": await self._get_access_token()}
+
+    async def _get_access_token(self) -> str:
+        loop = asyncio.get_event_loop()
+
+        async with self._access_token_lock:
+            if loop.time() >= self._access_token_expires_at:
+                # Refreshing the token is a blocking HTTP request made by oauth2client.
+                access_token_info = await loop.run_in_executor(None, self._credentials.get_access_token)
+                expires_in = access_token_info.expires_in or 0
+
+                self._access_token = access_token_info.access_token
+                self._access_token_expires_at = loop.time() + expires_in - ACCESS_TOKEN_EXPIRY_MARGIN
+
+        return self._access_token
+
+    def _get_web_client(self) -> aiohttp.ClientSession:
+        # Created lazily so the session, and its pool of kept-alive connections, belongs to the serving event loop.
+        if self._web_client is None:
+            self._web_client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._max_connections, keepalive_timeout=self._keepalive_timeout))
+
+        return self._web_client
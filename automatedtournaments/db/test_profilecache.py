@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+
+from automatedtournaments.testing.inmemoryuserdatabase import InMemoryUserDatabase
+from .profilecache import ProfileCache
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ProfileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ProfileCache(2, 300.0, self.clock)
+
+    def test_profile_expires_after_its_ttl(self):
+        self.cache.put("1", ("challonger", "Nick"))
+
+        self.clock.now = 299.0
+        self.assertEqual(self.cache.get("1"), ("challonger", "Nick"))
+
+        self.clock.now = 300.0
+        self.assertIsNone(self.cache.get("1"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_least_recently_used_profile_is_evicted(self):
+        self.cache.put("1", ("one", ""))
+        self.cache.put("2", ("two", ""))
+        self.cache.get("1")
+
+        self.cache.put("3", ("three", ""))
+
+        self.assertIsNone(self.cache.peek("2"))
+        self.assertEqual(self.cache.peek("1"), ("one", ""))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_invalidated_profile_is_gone(self):
+        self.cache.put("1", ("challonger", ""))
+
+        self.cache.invalidate("1")
+
+        self.assertIsNone(self.cache.peek("1"))
+
+
+class UserDatabaseProfileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.user_database = InMemoryUserDatabase({"1": {"challonge_username": "old", "discord_display_name": "Nick"}})
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.user_database.close())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_profile_is_read_once(self):
+        for _ in range(3):
+            self.loop.run_until_complete(self.user_database.get_profile("1"))
+
+        self.assertEqual(self.user_database.reads, 1)
+
+    def test_unregistered_member_is_read_again(self):
+        self.loop.run_until_complete(self.user_database.get_profile("2"))
+        self.user_database.members["2"] = {"challonge_username": "new"}
+
+        self.assertEqual(self.loop.run_until_complete(self.user_database.get_profile("2")), ("new", ""))
+
+    def test_new_challonge_id_is_written_through_to_the_cache(self):
+        self.loop.run_until_complete(self.user_database.get_profile("1"))
+
+        self.loop.run_until_complete(self.user_database.set_challonge_id("1", "new"))
+
+        self.assertEqual(self.loop.run_until_complete(self.user_database.get_profile("1")), ("new", "Nick"))
+        self.assertEqual(self.user_database.reads, 1)
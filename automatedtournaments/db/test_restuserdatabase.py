@@ -0,0 +1,119 @@
+import asyncio
+import json
+import unittest
+
+from aiohttp.test_utils import TestServer
+from aiohttp.web import Application, Request, Response, json_response
+
+from .restuserdatabase import RestUserDatabase, firebase_key_order
+
+AUTH_TOKEN = "database-secret"
+
+
+# Serves a members tree the way the Firebase REST API does: single members with ETags, and key range queries over
+# all members ordered by key.
+class FakeFirebase(Application):
+
+    def __init__(self, members: dict):
+        super().__init__()
+
+        self.members = members
+        self.requests = []
+        self.not_modified = 0
+
+        self.router.add_get("/members.json", self.member_range)
+        self.router.add_get("/members/{discord_id}.json", self.member)
+
+    async def member_range(self, request: Request) -> Response:
+        self.requests.append(("range", dict(request.query)))
+
+        if request.query.get("auth", "") != AUTH_TOKEN or json.loads(request.query["orderBy"]) != "$key":
+            return json_response(data={"error": "denied"}, status=401)
+
+        start_at = firebase_key_order(json.loads(request.query["startAt"]))
+        end_at = firebase_key_order(json.loads(request.query["endAt"]))
+
+        return json_response(data=dict(
+            (discord_id, member)
+            for discord_id, member
+            in self.members.items()
+            if start_at <= firebase_key_order(discord_id) <= end_at))
+
+    async def member(self, request: Request) -> Response:
+        discord_id = request.match_info["discord_id"]
+        self.requests.append(("member", discord_id))
+
+        member = self.members.get(discord_id, None)
+        etag = '"{}"'.format(hash(json.dumps(member, sort_keys=True)))
+
+        if request.headers.get("If-None-Match", "") == etag:
+            self.not_modified += 1
+            return Response(status=304, headers={"ETag": etag})
+
+        return json_response(data=member, headers={"ETag": etag})
+
+
+class RestUserDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.firebase = FakeFirebase(dict(
+            (str(discord_id), {"challonge_username": "player{}".format(discord_id)})
+            for discord_id
+            in range(100000000000000000, 100000000000000010)))
+        self.server = TestServer(self.firebase)
+        self.loop.run_until_complete(self.server.start_server())
+        self.user_database = None
+
+    def tearDown(self):
+        if self.user_database:
+            self.loop.run_until_complete(self.user_database.close())
+        self.loop.run_until_complete(self.server.close())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def new_user_database(self, **kwargs) -> RestUserDatabase:
+        self.user_database = RestUserDatabase(
+            {"databaseURL": str(self.server.make_url("/"))}, auth_token=AUTH_TOKEN, **kwargs)
+
+        return self.user_database
+
+    def test_profiles_are_read_in_key_ranges(self):
+        user_database = self.new_user_database(members_per_query=3)
+        discord_ids = ["100000000000000001", "100000000000000003", "100000000000000004", "100000000000000008", "42"]
+
+        profiles = self.loop.run_until_complete(user_database.get_profiles(discord_ids))
+
+        self.assertEqual(profiles, {
+            "100000000000000001": ("player100000000000000001", ""),
+            "100000000000000003": ("player100000000000000003", ""),
+            "100000000000000004": ("player100000000000000004", ""),
+            "100000000000000008": ("player100000000000000008", ""),
+            "42": ("", ""),
+        })
+        self.assertEqual(
+            sorted((json.loads(query["startAt"]), json.loads(query["endAt"])) for _, query in self.firebase.requests),
+            [("100000000000000004", "100000000000000008"), ("42", "100000000000000003")])
+
+    def test_single_profile_is_read_on_its_own(self):
+        user_database = self.new_user_database()
+
+        profiles = self.loop.run_until_complete(user_database.get_profiles(["100000000000000001"]))
+
+        self.assertEqual(profiles, {"100000000000000001": ("player100000000000000001", "")})
+        self.assertEqual(self.firebase.requests, [("member", "100000000000000001")])
+
+    def test_unchanged_member_is_revalidated_with_its_etag(self):
+        user_database = self.new_user_database(profile_cache_ttl=0.0)
+
+        self.loop.run_until_complete(user_database.get_profiles(["100000000000000001"]))
+        profiles = self.loop.run_until_complete(user_database.get_profiles(["100000000000000001"]))
+
+        self.assertEqual(profiles, {"100000000000000001": ("player100000000000000001", "")})
+        self.assertEqual(self.firebase.not_modified, 1)
+
+    def test_database_without_credentials_is_refused(self):
+        with self.assertRaises(ValueError):
+            RestUserDatabase({"databaseURL": "http://localhost"})
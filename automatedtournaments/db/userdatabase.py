@@ -1,42 +1,131 @@
 import asyncio
+from typing import Dict, Iterable, Tuple
 
 from pyrebase import pyrebase
 
+from automatedtournaments.metrics import REGISTRY
+from .profilecache import ProfileCache
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "user_database_request_duration_seconds", "Time taken by member reads and writes.", ("operation",))
+
 
 class UserDatabase:
 
-    def __init__(self, db_config: dict):
+    def __init__(
+            self,
+            db_config: dict,
+            profile_cache_size: int=4096,
+            profile_cache_ttl: float=3600.0,
+            max_concurrent_reads: int=16):
         self._db_config = db_config
+        self._profile_cache = ProfileCache(profile_cache_size, profile_cache_ttl)
+        self._max_concurrent_reads = max_concurrent_reads
+
+        REGISTRY.add_collector(self._collect_metrics)
+
+    async def close(self) -> None:
+        REGISTRY.remove_collector(self._collect_metrics)
+
+    async def get_profile(self, discord_id: str) -> Tuple[str, str]:
+        profile = self._profile_cache.get(discord_id)
+
+        if profile is None:
+            profile = self._profile_from_member(await self._read_member(discord_id))
+
+            # Unregistered members are not cached, as they may register through a different process at any moment.
+            if profile[0]:
+                self._profile_cache.put(discord_id, profile)
+
+        return profile
+
+    async def get_profiles(self, discord_ids: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        profiles = {}
+        missing_discord_ids = []
+
+        for discord_id in set(discord_ids):
+            profile = self._profile_cache.get(discord_id)
+
+            if profile is None:
+                missing_discord_ids.append(discord_id)
+            else:
+                profiles[discord_id] = profile
+
+        members = await self._get_members(missing_discord_ids)
+
+        for discord_id in missing_discord_ids:
+            profile = self._profile_from_member(members.get(discord_id, {}))
+
+            if profile[0]:
+                self._profile_cache.put(discord_id, profile)
+
+            profiles[discord_id] = profile
+
+        return profiles
 
     async def get_challonge_id(self, discord_id: str) -> str:
-        return await asyncio.get_event_loop().run_in_executor(None, self._get_challonge_id_inner, discord_id)
+        challonge_id, _ = await self.get_profile(discord_id)
+
+        return challonge_id
 
     async def set_challonge_id(self, discord_id: str, challonge_id: str) -> None:
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._set_challonge_id_inner, discord_id, challonge_id)
+        with REQUEST_DURATION.time(operation="update_member"):
+            await self._update_member(discord_id, {"challonge_username": challonge_id})
+
+        cached_profile = self._profile_cache.peek(discord_id)
+        if cached_profile is not None:
+            self._profile_cache.put(discord_id, (challonge_id, cached_profile[1]))
+
+    # Other processes keep their own profile cache, and are told to drop a member's profile after it changes here.
+    def invalidate_profile(self, discord_id: str) -> None:
+        self._profile_cache.invalidate(discord_id)
 
     async def get_nickname(self, discord_id: str) -> str:
-        return await asyncio.get_event_loop().run_in_executor(None, self._get_nickname_inner, discord_id)
+        _, nickname = await self.get_profile(discord_id)
 
-    def _get_challonge_id_inner(self, discord_id: str):
-        db = pyrebase.initialize_app(self._db_config).database()
-        query_result = db.child("members").child(discord_id).get()
+        return nickname
 
-        if not query_result.pyres:
-            return ""
+    def _collect_metrics(self) -> None:
+        profile_cache_stats = REGISTRY.gauge(
+            "user_database_profile_cache", "Member profile cache hits, misses and size.", ("stat",))
+        profile_cache_stats.set(self._profile_cache.hits, stat="hits")
+        profile_cache_stats.set(self._profile_cache.misses, stat="misses")
+        profile_cache_stats.set(len(self._profile_cache), stat="size")
 
-        return query_result.val().get("challonge_username", "")
+    async def _read_member(self, discord_id: str) -> dict:
+        with REQUEST_DURATION.time(operation="get_member"):
+            return await self._get_member(discord_id)
 
-    def _set_challonge_id_inner(self, discord_id: str, challonge_id: str) -> None:
-        db = pyrebase.initialize_app(self._db_config).database()
-        db.child("members").child(discord_id).update({"challonge_username": challonge_id})
+    @staticmethod
+    def _profile_from_member(member: dict) -> Tuple[str, str]:
+        return (
+            member.get("challonge_username", ""),
+            member.get("discord_server_nick", member.get("discord_display_name", "")))
 
-    def _get_nickname_inner(self, discord_id: str) -> str:
+    async def _get_member(self, discord_id: str) -> dict:
+        return await asyncio.get_event_loop().run_in_executor(None, self._get_member_inner, discord_id)
+
+    async def _get_members(self, discord_ids: Iterable[str]) -> Dict[str, dict]:
+        semaphore = asyncio.Semaphore(self._max_concurrent_reads)
+
+        async def get_member(discord_id: str) -> Tuple[str, dict]:
+            async with semaphore:
+                return discord_id, await self._read_member(discord_id)
+
+        return dict(await asyncio.gather(*(get_member(discord_id) for discord_id in discord_ids)))
+
+    async def _update_member(self, discord_id: str, member_data: dict) -> None:
+        await asyncio.get_event_loop().run_in_executor(None, self._update_member_inner, discord_id, member_data)
+
+    def _get_member_inner(self, discord_id: str) -> dict:
         db = pyrebase.initialize_app(self._db_config).database()
         query_result = db.child("members").child(discord_id).get()
 
         if not query_result.pyres:
-            return ""
+            return {}
+
+        return query_result.val()
 
-        result_data = query_result.val()
-        return result_data.get("discord_server_nick", result_data.get("discord_display_name", ""))
\ No newline at end of file
+    def _update_member_inner(self, discord_id: str, member_data: dict) -> None:
+        db = pyrebase.initialize_app(self._db_config).database()
+        db.child("members").child(discord_id).update(member_data)
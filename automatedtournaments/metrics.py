@@ -0,0 +1,224 @@
+import asyncio
+import bisect
+import contextlib
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from aiohttp.web import Application, Request, Response
+
+from automatedtournaments.aiohttpcompat import middleware, route_name
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    formatted = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value
+        in labels)
+
+    return "{" + formatted + "}" if formatted else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Metric:
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label_name, "")) for label_name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP {} {}".format(self.name, self.documentation),
+            "# TYPE {} {}".format(self.name, self.metric_type)]
+
+        for key, value in sorted(self._values.items()):
+            lines.extend(self._render_value(zip(self.label_names, key), value))
+
+        return lines
+
+    def _render_value(self, labels: Iterable[Tuple[str, str]], value) -> List[str]:
+        return ["{}{} {}".format(self.name, _format_labels(labels), _format_value(value))]
+
+
+class Counter(_Metric):
+
+    metric_type = "counter"
+
+    def inc(self, amount: float=1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def remove(self, **labels: str) -> None:
+        self._values.pop(self._key(labels), None)
+
+
+class Histogram(_Metric):
+
+    metric_type = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]=None):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets if buckets else DEFAULT_BUCKETS))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        bucket_counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+
+        bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._values[key] = (bucket_counts, total + value)
+
+    @contextlib.contextmanager
+    def time(self, **labels: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def _render_value(self, labels: Iterable[Tuple[str, str]], value) -> List[str]:
+        labels = list(labels)
+        bucket_counts, total = value
+        lines = []
+
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+            cumulative_count += bucket_count
+            lines.append("{}_bucket{} {}".format(
+                self.name, _format_labels(labels + [("le", _format_value(upper_bound))]), cumulative_count))
+
+        lines.append("{}_sum{} {}".format(self.name, _format_labels(labels), _format_value(total)))
+        lines.append("{}_count{} {}".format(self.name, _format_labels(labels), cumulative_count))
+
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._loop_lag_monitor = None
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...]=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...]=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Tuple[str, ...]=(),
+            buckets: Tuple[float, ...]=None) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, label_names, buckets)
+
+        return self._metrics[name]
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], None]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def start_loop_lag_monitor(self, interval: float) -> None:
+        if self._loop_lag_monitor is None or self._loop_lag_monitor.done():
+            self._loop_lag_monitor = asyncio.ensure_future(monitor_event_loop_lag(self, interval))
+
+    def stop_loop_lag_monitor(self) -> None:
+        if self._loop_lag_monitor is not None:
+            self._loop_lag_monitor.cancel()
+            self._loop_lag_monitor = None
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+
+        lines = []
+        for _, metric in sorted(self._metrics.items()):
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, metric_class, name: str, documentation: str, label_names: Tuple[str, ...]):
+        if name not in self._metrics:
+            self._metrics[name] = metric_class(name, documentation, label_names)
+
+        return self._metrics[name]
+
+
+REGISTRY = MetricsRegistry()
+
+
+def instrument_app(app: Application, registry: MetricsRegistry=REGISTRY, loop_lag_interval: float=1.0) -> None:
+    request_count = registry.counter(
+        "http_requests_total", "HTTP requests handled, by route and status.", ("method", "route", "status"))
+    request_duration = registry.histogram(
+        "http_request_duration_seconds", "HTTP request handling time, by route.", ("method", "route"))
+
+    @middleware
+    async def metrics_middleware(request: Request, handler) -> Response:
+        route = route_name(request)
+        status = 500
+
+        started_at = time.perf_counter()
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except Exception as error:
+            status = getattr(error, "status", 500)
+            raise
+        finally:
+            request_duration.observe(time.perf_counter() - started_at, method=request.method, route=route)
+            request_count.inc(method=request.method, route=route, status=str(status))
+
+    async def metrics(_: Request) -> Response:
+        return Response(body=registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start_loop_lag_monitor(_: Application) -> None:
+        registry.start_loop_lag_monitor(loop_lag_interval)
+
+    async def stop_loop_lag_monitor(_: Application) -> None:
+        registry.stop_loop_lag_monitor()
+
+    app.middlewares.insert(0, metrics_middleware)
+    app.router.add_get("/metrics", metrics)
+    app.on_startup.append(start_loop_lag_monitor)
+    app.on_cleanup.append(stop_loop_lag_monitor)
+
+
+async def monitor_event_loop_lag(registry: MetricsRegistry, interval: float) -> None:
+    loop_lag = registry.histogram(
+        "event_loop_lag_seconds",
+        "How late the event loop woke up a sleeping task, sampled every interval.",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+    while True:
+        expected_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, time.perf_counter() - expected_at))
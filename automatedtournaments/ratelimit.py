@@ -0,0 +1,36 @@
+import time
+from typing import Callable
+
+
+# Hands out up to `capacity` tokens at once, refilled at `rate` per second. Used for Challonge requests and Discord
+# announcements alike, so it lives apart from either client and pulls in neither one's dependencies.
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float]=time.monotonic):
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._paused_until = 0.0
+
+    def try_take(self) -> float:
+        now = self._clock()
+
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+
+        return (1 - self._tokens) / self._rate
+
+    def pause(self, seconds: float) -> None:
+        now = self._clock()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0
+        self._updated_at = max(self._updated_at, self._paused_until)
@@ -0,0 +1,62 @@
+import unittest
+
+from .metrics import REGISTRY, MetricsRegistry
+from .tournament.tournamentpool import TournamentPool
+
+
+class MetricsRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counters_and_gauges_render_one_line_per_label_set(self):
+        requests = self.registry.counter("requests_total", "Requests handled.", ("route",))
+        requests.inc(route="/signup")
+        requests.inc(2, route="/signup")
+        requests.inc(route='/say "hi"\n')
+        self.registry.gauge("queue_depth", "Queued requests.").set(3)
+
+        self.assertEqual(self.registry.render().splitlines(), [
+            "# HELP queue_depth Queued requests.",
+            "# TYPE queue_depth gauge",
+            "queue_depth 3.0",
+            "# HELP requests_total Requests handled.",
+            "# TYPE requests_total counter",
+            'requests_total{route="/say \\"hi\\"\\n"} 1.0',
+            'requests_total{route="/signup"} 3.0',
+        ])
+
+    def test_histogram_buckets_are_cumulative(self):
+        duration = self.registry.histogram("duration_seconds", "Durations.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            duration.observe(value)
+
+        self.assertEqual(self.registry.render().splitlines()[2:], [
+            'duration_seconds_bucket{le="0.1"} 1',
+            'duration_seconds_bucket{le="1.0"} 3',
+            'duration_seconds_bucket{le="+Inf"} 4',
+            "duration_seconds_sum 6.05",
+            "duration_seconds_count 4",
+        ])
+
+    def test_collectors_run_on_every_render_until_removed(self):
+        gauge = self.registry.gauge("ready", "Ready things.")
+        ready = [1]
+
+        def collect() -> None:
+            gauge.set(ready[0])
+
+        self.registry.add_collector(collect)
+        self.assertIn("ready 1.0", self.registry.render())
+
+        self.registry.remove_collector(collect)
+        ready[0] = 2
+        self.assertIn("ready 1.0", self.registry.render())
+
+    def test_closed_owner_stops_rendering_its_series(self):
+        tournament_pool = TournamentPool(None, None, {})
+        self.assertIn("tournament_pool_ready 0.0", REGISTRY.render())
+
+        tournament_pool.close()
+
+        self.assertNotIn("tournament_pool_ready 0.0", REGISTRY.render())
@@ -0,0 +1,34 @@
+import unittest
+
+from .ratelimit import TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=2.0, capacity=2.0, clock=self.clock)
+
+    def test_burst_is_followed_by_waits_at_the_rate(self):
+        self.assertEqual([self.bucket.try_take() for _ in range(3)], [0.0, 0.0, 0.5])
+
+        self.clock.now = 0.5
+        self.assertEqual(self.bucket.try_take(), 0.0)
+
+    def test_pause_holds_every_token_until_it_ends(self):
+        self.bucket.pause(3.0)
+
+        self.clock.now = 1.0
+        self.assertEqual(self.bucket.try_take(), 2.0)
+
+        self.clock.now = 3.5
+        self.assertEqual(self.bucket.try_take(), 0.0)
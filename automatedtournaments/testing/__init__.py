@@ -0,0 +1,2 @@
+from .fakechallonge import FakeChallonge
+from .inmemoryuserdatabase import InMemoryUserDatabase
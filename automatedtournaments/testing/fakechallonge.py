@@ -0,0 +1,436 @@
+import asyncio
+import collections
+import datetime
+import hashlib
+import itertools
+import random
+
+from aiohttp.web import Application, Request, Response, json_response, middleware
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+# Serves the Challonge v1 endpoints used by ChallongeService under /v1 with single elimination brackets, adding
+# configurable latency, injected 5xx/429 responses, writes whose response is lost after they were applied and ETag
+# validated GETs.
+class FakeChallonge(Application):
+
+    def __init__(
+            self,
+            api_key: str,
+            latency: float=0.0,
+            jitter: float=0.0,
+            error_rate: float=0.0,
+            error_status: int=503,
+            throttle_rate: float=0.0,
+            retry_after: float=1.0,
+            lost_response_rate: float=0.0):
+        super().__init__(middlewares=[self._simulate_network])
+
+        self.api_key = api_key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.lost_response_rate = lost_response_rate
+
+        self.calls = collections.Counter()
+        self.not_modified = 0
+
+        self._ids = itertools.count(1)
+        self._tournaments = {}
+        self._participants = {}
+        self._matches = {}
+
+        self.router.add_post("/v1/tournaments.json", self.create_tournament)
+        self.router.add_get("/v1/tournaments/{tournament}.json", self.show_tournament)
+        self.router.add_put("/v1/tournaments/{tournament}.json", self.update_tournament)
+        self.router.add_delete("/v1/tournaments/{tournament}.json", self.destroy_tournament)
+        self.router.add_post("/v1/tournaments/{tournament}/start.json", self.start_tournament)
+        self.router.add_post("/v1/tournaments/{tournament}/finalize.json", self.finalize_tournament)
+
+        self.router.add_get("/v1/tournaments/{tournament}/participants.json", self.list_participants)
+        self.router.add_post("/v1/tournaments/{tournament}/participants.json", self.create_participant)
+        self.router.add_post("/v1/tournaments/{tournament}/participants/bulk_add.json", self.bulk_add_participants)
+        self.router.add_get("/v1/tournaments/{tournament}/participants/{participant}.json", self.show_participant)
+        self.router.add_delete(
+            "/v1/tournaments/{tournament}/participants/{participant}.json", self.destroy_participant)
+        self.router.add_post(
+            "/v1/tournaments/{tournament}/participants/{participant}/check_in.json", self.check_in_participant)
+
+        self.router.add_get("/v1/tournaments/{tournament}/matches.json", self.list_matches)
+        self.router.add_put("/v1/tournaments/{tournament}/matches/{match}.json", self.update_match)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def duplicate_participants(self) -> int:
+        return sum(
+            len(participants) - len(set(participant["misc"] for participant in participants))
+            for participants
+            in self._participants.values())
+
+    @middleware
+    async def _simulate_network(self, request: Request, handler) -> Response:
+        resource = request.match_info.route.resource
+        self.calls[request.method + " " + (resource.canonical if resource else request.path)] += 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if request.query.get("api_key", "") != self.api_key:
+            return self._error(401, "Invalid API key")
+
+        if random.random() < self.throttle_rate:
+            return json_response(
+                data={"errors": ["Rate limit exceeded"]}, status=429, headers={"Retry-After": str(self.retry_after)})
+
+        if random.random() < self.error_rate:
+            return self._error(self.error_status, "Injected failure")
+
+        response = await handler(request)
+
+        if request.method != "GET" and random.random() < self.lost_response_rate:
+            return self._error(self.error_status, "Injected failure after applying the request")
+
+        if request.method == "GET" and response.status == 200:
+            etag = '"' + hashlib.md5(response.body).hexdigest() + '"'
+
+            if request.headers.get("If-None-Match", "") == etag:
+                self.not_modified += 1
+                return Response(status=304, headers={"ETag": etag})
+
+            response.headers["ETag"] = etag
+
+        return response
+
+    async def create_tournament(self, request: Request) -> Response:
+        query = request.query
+        subdomain = query.get("tournament[subdomain]", "")
+        url = query.get("tournament[url]", "")
+        key = subdomain + "-" + url if subdomain else url
+
+        if not url or key in self._tournaments:
+            return self._error(422, "URL has already been taken")
+
+        tournament = {
+            "id": next(self._ids),
+            "name": query.get("tournament[name]", url),
+            "url": url,
+            "subdomain": subdomain or None,
+            "full_challonge_url": "https://{}challonge.com/{}".format(subdomain + "." if subdomain else "", url),
+            "state": "pending",
+            "start_at": query.get("tournament[start_at]", None),
+            "started_at": None,
+            "completed_at": None,
+            "created_at": _now(),
+            "participants_count": 0,
+        }
+        self._tournaments[key] = tournament
+        self._participants[key] = []
+        self._matches[key] = []
+
+        return json_response(data={"tournament": tournament})
+
+    async def show_tournament(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.get(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        tournament = dict(tournament)
+
+        if request.query.get("include_participants", "0") == "1":
+            tournament["participants"] = [{"participant": participant} for participant in self._participants[key]]
+
+        if request.query.get("include_matches", "0") == "1":
+            tournament["matches"] = [{"match": match} for match in self._matches[key]]
+
+        return json_response(data={"tournament": tournament})
+
+    async def update_tournament(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.get(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        if tournament["state"] != "pending":
+            return self._error(422, "Tournament cannot be edited once it has started")
+
+        tournament["name"] = request.query.get("tournament[name]", tournament["name"])
+        tournament["start_at"] = request.query.get("tournament[start_at]", tournament["start_at"])
+
+        return json_response(data={"tournament": tournament})
+
+    async def destroy_tournament(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.pop(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        del self._participants[key]
+        del self._matches[key]
+
+        return json_response(data={"tournament": tournament})
+
+    async def start_tournament(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.get(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        participants = [participant for participant in self._participants[key] if participant["active"]]
+
+        if tournament["state"] != "pending" or len(participants) < 2:
+            return self._error(422, "Tournament cannot be started")
+
+        self._matches[key] = self._build_bracket(tournament, participants)
+        tournament["state"] = "underway"
+        tournament["started_at"] = _now()
+
+        return json_response(data={"tournament": tournament})
+
+    async def finalize_tournament(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.get(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        matches = self._matches[key]
+
+        if tournament["state"] != "awaiting_review" or any(match["state"] != "complete" for match in matches):
+            return self._error(422, "Tournament cannot be finalized")
+
+        tournament["state"] = "complete"
+        tournament["completed_at"] = _now()
+
+        rounds = max(match["round"] for match in matches)
+        final_rank = dict((match["loser_id"], 2 ** (rounds - match["round"]) + 1) for match in matches)
+        final_rank[max(matches, key=lambda match: match["round"])["winner_id"]] = 1
+
+        for participant in self._participants[key]:
+            participant["final_rank"] = final_rank.get(participant["id"], None)
+
+        return json_response(data={"tournament": tournament})
+
+    async def list_participants(self, request: Request) -> Response:
+        participants = self._participants.get(request.match_info["tournament"], None)
+
+        if participants is None:
+            return self._error(404, "Tournament not found")
+
+        return json_response(data=[{"participant": participant} for participant in participants])
+
+    async def create_participant(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.get(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        if tournament["state"] != "pending":
+            return self._error(422, "Participants cannot be added once the tournament has started")
+
+        participant = self._add_participant(
+            key,
+            request.query.get("participant[name]", ""),
+            request.query.get("participant[challonge_username]", None),
+            request.query.get("participant[misc]", None))
+
+        return json_response(data={"participant": participant})
+
+    async def bulk_add_participants(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        tournament = self._tournaments.get(key, None)
+
+        if tournament is None:
+            return self._error(404, "Tournament not found")
+
+        if tournament["state"] != "pending":
+            return self._error(422, "Participants cannot be added once the tournament has started")
+
+        request_data = await request.json()
+        participants = [
+            self._add_participant(
+                key,
+                participant.get("name", ""),
+                participant.get("challonge_username", None),
+                participant.get("misc", None))
+            for participant
+            in request_data.get("participants", [])]
+
+        return json_response(data=[{"participant": participant} for participant in participants])
+
+    async def show_participant(self, request: Request) -> Response:
+        participant = self._find_participant(request)
+
+        if participant is None:
+            return self._error(404, "Participant not found")
+
+        return json_response(data={"participant": participant})
+
+    async def destroy_participant(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        participant = self._find_participant(request)
+
+        if participant is None:
+            return self._error(404, "Participant not found")
+
+        if self._tournaments[key]["state"] == "pending":
+            self._participants[key].remove(participant)
+            self._tournaments[key]["participants_count"] = len(self._participants[key])
+        else:
+            participant["active"] = False
+
+            for match in self._matches[key]:
+                if match["state"] == "open" and participant["id"] in (match["player1_id"], match["player2_id"]):
+                    winner_id = match["player2_id" if match["player1_id"] == participant["id"] else "player1_id"]
+                    self._complete_match(key, match, winner_id, "")
+
+        return json_response(data={"participant": participant})
+
+    async def check_in_participant(self, request: Request) -> Response:
+        participant = self._find_participant(request)
+
+        if participant is None:
+            return self._error(404, "Participant not found")
+
+        participant["checked_in"] = True
+        participant["checked_in_at"] = _now()
+
+        return json_response(data={"participant": participant})
+
+    async def list_matches(self, request: Request) -> Response:
+        matches = self._matches.get(request.match_info["tournament"], None)
+
+        if matches is None:
+            return self._error(404, "Tournament not found")
+
+        state = request.query.get("state", "all")
+        participant_id = request.query.get("participant_id", "")
+
+        return json_response(data=[
+            {"match": match}
+            for match
+            in matches
+            if (state == "all" or match["state"] == state) and
+            (not participant_id or participant_id in (str(match["player1_id"]), str(match["player2_id"])))])
+
+    async def update_match(self, request: Request) -> Response:
+        key = request.match_info["tournament"]
+        match = next(
+            (match for match in self._matches.get(key, []) if str(match["id"]) == request.match_info["match"]),
+            None)
+
+        if match is None:
+            return self._error(404, "Match not found")
+
+        winner_id = request.query.get("match[winner_id]", "")
+
+        if match["state"] != "open" or winner_id not in (str(match["player1_id"]), str(match["player2_id"])):
+            return self._error(422, "Match cannot be updated")
+
+        self._complete_match(key, match, int(winner_id), request.query.get("match[scores_csv]", ""))
+
+        return json_response(data={"match": match})
+
+    def _add_participant(self, key: str, name: str, challonge_username: str, misc: str) -> dict:
+        participant = {
+            "id": next(self._ids),
+            "tournament_id": self._tournaments[key]["id"],
+            "name": name,
+            "challonge_username": challonge_username,
+            "misc": misc,
+            "seed": len(self._participants[key]) + 1,
+            "active": True,
+            "checked_in": False,
+            "checked_in_at": None,
+            "final_rank": None,
+            "created_at": _now(),
+        }
+        self._participants[key].append(participant)
+        self._tournaments[key]["participants_count"] = len(self._participants[key])
+
+        return participant
+
+    def _find_participant(self, request: Request) -> dict:
+        return next(
+            (participant
+             for participant
+             in self._participants.get(request.match_info["tournament"], [])
+             if str(participant["id"]) == request.match_info["participant"]),
+            None)
+
+    def _build_bracket(self, tournament: dict, participants: list) -> list:
+        matches = []
+        bracket_size = 1 << (len(participants) - 1).bit_length()
+        entrants = [participant["id"] for participant in participants] + [None] * (bracket_size - len(participants))
+
+        round_number = 1
+        while len(entrants) > 1:
+            next_entrants = []
+
+            for first, second in zip(entrants[0::2], entrants[1::2]):
+                if first is None or second is None:
+                    next_entrants.append(first if second is None else second)
+                    continue
+
+                match = {
+                    "id": next(self._ids),
+                    "tournament_id": tournament["id"],
+                    "round": round_number,
+                    "identifier": str(len(matches) + 1),
+                    "state": "pending",
+                    "player1_id": first if isinstance(first, int) else None,
+                    "player2_id": second if isinstance(second, int) else None,
+                    "player1_prereq_match_id": first["id"] if isinstance(first, dict) else None,
+                    "player2_prereq_match_id": second["id"] if isinstance(second, dict) else None,
+                    "winner_id": None,
+                    "loser_id": None,
+                    "scores_csv": "",
+                    "updated_at": _now(),
+                }
+
+                if match["player1_id"] and match["player2_id"]:
+                    match["state"] = "open"
+
+                matches.append(match)
+                next_entrants.append(match)
+
+            entrants = next_entrants
+            round_number += 1
+
+        return matches
+
+    def _complete_match(self, key: str, match: dict, winner_id: int, scores_csv: str) -> None:
+        match["state"] = "complete"
+        match["winner_id"] = winner_id
+        match["loser_id"] = match["player2_id"] if winner_id == match["player1_id"] else match["player1_id"]
+        match["scores_csv"] = scores_csv
+        match["updated_at"] = _now()
+
+        for next_match in self._matches[key]:
+            for slot in ("player1", "player2"):
+                if next_match[slot + "_prereq_match_id"] == match["id"]:
+                    next_match[slot + "_id"] = winner_id
+
+            if next_match["state"] == "pending" and next_match["player1_id"] and next_match["player2_id"]:
+                next_match["state"] = "open"
+                next_match["updated_at"] = _now()
+
+        if all(other_match["state"] == "complete" for other_match in self._matches[key]):
+            self._tournaments[key]["state"] = "awaiting_review"
+
+    @staticmethod
+    def _error(status: int, message: str) -> Response:
+        return json_response(data={"errors": [message]}, status=status)
@@ -0,0 +1,26 @@
+import asyncio
+
+from automatedtournaments.db import UserDatabase
+
+
+class InMemoryUserDatabase(UserDatabase):
+
+    def __init__(self, members: dict=None, latency: float=0.0, **kwargs):
+        super().__init__({}, **kwargs)
+
+        self.members = members if members is not None else {}
+        self.latency = latency
+        self.reads = 0
+        self.writes = 0
+
+    async def _get_member(self, discord_id: str) -> dict:
+        self.reads += 1
+        await asyncio.sleep(self.latency)
+
+        return dict(self.members.get(discord_id, {}))
+
+    async def _update_member(self, discord_id: str, member_data: dict) -> None:
+        self.writes += 1
+        await asyncio.sleep(self.latency)
+
+        self.members.setdefault(discord_id, {}).update(member_data)
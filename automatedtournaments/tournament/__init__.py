@@ -4,9 +4,11 @@ import aiohttp.web
 from automatedtournaments.db import UserDatabase
 
 from .tournamentapp import TournamentApp as _TournamentApp
-from .tournamentcontroller import TournamentController as _TournamentController
+from .tournamentcontrollerregistry import TournamentControllerRegistry as _TournamentControllerRegistry
 from .tournamentidgenerator import TournamentIdGenerator as _TournamentIdGenerator
 from .challongeservice import ChallongeService as _ChallongeService
+from .statejournal import StateJournal as _StateJournal
+from .tournamentpool import TournamentPool as _TournamentPool
 
 
 def start_tournament_app(
@@ -14,16 +16,44 @@ def start_tournament_app(
         challonge_subdomain: str,
         challonge_api_key: str,
         user_db: UserDatabase,
-        default_tournament_settings: dict):
+        default_tournament_settings: dict,
+        journal_path: str="",
+        tournament_pool_size: int=0,
+        write_behind: bool=False):
     web_client = aiohttp.ClientSession()
+    state_journal = _StateJournal(journal_path) if journal_path else None
+    tournament_id_generator = _TournamentIdGenerator(state_journal)
+    challonge_service = _ChallongeService(web_client, challonge_subdomain, challonge_api_key)
+
+    if tournament_pool_size:
+        tournament_pool = _TournamentPool(
+            tournament_id_generator,
+            challonge_service,
+            default_tournament_settings,
+            size=tournament_pool_size,
+            state_journal=state_journal)
+    else:
+        tournament_pool = None
 
     app = _TournamentApp(
-        _TournamentController(
-            _TournamentIdGenerator(),
-            _ChallongeService(web_client, challonge_subdomain, challonge_api_key),
+        _TournamentControllerRegistry(
+            tournament_id_generator,
+            challonge_service,
             user_db,
-            default_tournament_settings))
+            default_tournament_settings,
+            state_journal=state_journal,
+            tournament_pool=tournament_pool,
+            write_behind=write_behind))
+
+    async def close_services(_: aiohttp.web.Application) -> None:
+        challonge_service.close()
+        await user_db.close()
+
+    app.on_cleanup.append(close_services)
 
     aiohttp.web.run_app(app, port=port)
 
     web_client.close()
+
+    if state_journal:
+        state_journal.close()
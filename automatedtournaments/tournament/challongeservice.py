@@ -1,9 +1,44 @@
-from typing import List
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
 
 import aiohttp
 
+from automatedtournaments.metrics import REGISTRY
+from automatedtournaments.validatorstore import ValidatorStore
+from .openmatchindex import OpenMatchIndex
+from .participantindex import ParticipantIndex
+from .requestscheduler import RequestScheduler, PRIORITY_INTERACTIVE, RETRYABLE_STATUSES
+from .singleflight import SingleFlight
+from .tournamentstate import TournamentState
+from .ttlcache import TtlCache
+
 BASE_URL = "https://api.challonge.com/v1"
 
+DEFAULT_CACHE_TTLS = {
+    "tournament": 5.0,
+    "participants": 5.0,
+    "matches": 5.0,
+    "participant_index": 60.0,
+    "open_match_index": 120.0,
+}
+
+# Challonge does not document a limit for bulk_add, so large rosters are sent in chunks of this many participants.
+BULK_ADD_CHUNK_SIZE = 100
+
+# Resources read together from one tournament show request with participants and matches embedded.
+BUNDLED_RESOURCES = ("tournament", "participants", "matches")
+
+
+class ChallongeUnavailableError(Exception):
+
+    def __init__(self, status: int):
+        super().__init__("Challonge responded with status {}".format(status))
+        self.status = status
+
+
+# Failures after which a write may or may not have been applied.
+UPSTREAM_FAILURES = (ChallongeUnavailableError, aiohttp.ClientError, asyncio.TimeoutError)
+
 
 class ChallongeService:
 
@@ -11,43 +46,119 @@ class ChallongeService:
             self,
             client_session: aiohttp.ClientSession,
             challonge_subdomain: str,
-            challonge_api_key: str):
+            challonge_api_key: str,
+            cache_ttls: Dict[str, float]=None,
+            request_scheduler: RequestScheduler=None,
+            base_url: str=BASE_URL):
 
-        self._web_client = client_session
+        self._base_url = base_url
+        self._scheduler = request_scheduler if request_scheduler else RequestScheduler(client_session)
         self._challonge_subdomain = challonge_subdomain
         self._challonge_api_key = challonge_api_key
 
-    async def get_tournament_data(self, tournament_id: str):
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + ".json"
+        self._single_flight = SingleFlight()
+        self._validators = ValidatorStore()
+        self._cache = TtlCache()
+        self._cache_ttls = dict(DEFAULT_CACHE_TTLS)
+        if cache_ttls:
+            self._cache_ttls.update(cache_ttls)
+
+        self._participant_indexes = {}
+        self._open_match_indexes = {}
+
+        REGISTRY.add_collector(self._collect_metrics)
+
+    def close(self) -> None:
+        REGISTRY.remove_collector(self._collect_metrics)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return self._cache.stats()
+
+    def scheduler_stats(self) -> Dict[str, int]:
+        return self._scheduler.stats()
+
+    def _collect_metrics(self) -> None:
+        scheduler_stats = REGISTRY.gauge(
+            "challonge_scheduler", "Challonge request scheduler counters and queue depth.", ("stat",))
+        for stat, value in self.scheduler_stats().items():
+            scheduler_stats.set(value, stat=stat)
+
+        cache_stats = REGISTRY.gauge(
+            "challonge_cache", "Challonge read cache hits, misses and invalidations.", ("resource", "stat"))
+        for resource, counters in self.cache_stats().items():
+            for stat, value in counters.items():
+                cache_stats.set(value, resource=resource, stat=stat)
+
+        conditional_stats = REGISTRY.gauge(
+            "challonge_conditional_reads", "Challonge reads answered 304 Not Modified or with a new body.", ("stat",))
+        for stat, value in self._validators.stats().items():
+            conditional_stats.set(value, stat=stat)
+
+    async def get_tournament_data(self, tournament_id: str, priority: int=PRIORITY_INTERACTIVE):
+        return await self._get_cached("tournament", tournament_id, self._fetch_tournament_data, priority)
+
+    async def _fetch_tournament_data(self, tournament_id: str, priority: int):
+        # State checks only need the tournament itself, so they leave the participants and matches out of the response.
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + ".json"
         query_params = {"api_key": self._challonge_api_key}
-        async with self._web_client.get(url, params=query_params) as resp:
-            return await resp.json()
 
-    async def does_tournament_exist(self, tournament_id: str) -> bool:
-        tournament_data = await self.get_tournament_data(tournament_id)
+        return await self._get_json(url, query_params, priority, "tournament")
 
-        return "tournament" in tournament_data
+    async def _fetch_tournament_bundle(self, tournament_id: str, priority: int) -> dict:
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + ".json"
+        query_params = {
+            "api_key": self._challonge_api_key,
+            "include_participants": "1",
+            "include_matches": "1"
+        }
 
-    async def has_tournament_started(self, tournament_id: str) -> bool:
-        tournament_data = await self.get_tournament_data(tournament_id)
+        generations = dict(
+            (resource, self._cache.generation((resource, tournament_id))) for resource in BUNDLED_RESOURCES)
+        open_match_index = self._get_open_match_index(tournament_id)
+        open_match_version = open_match_index.version
+        resp_data = await self._get_json(url, query_params, priority, "tournament")
 
-        if "tournament" not in tournament_data:
-            return False
+        if "tournament" not in resp_data:
+            bundle = {"tournament": resp_data, "participants": [], "matches": []}
+        else:
+            tournament_data = dict(resp_data["tournament"])
+            participants = tournament_data.pop("participants", [])
+            matches = tournament_data.pop("matches", [])
 
-        return bool(tournament_data["tournament"].get("started_at", None))
+            for participant in participants:
+                self._annotate_participant(participant["participant"])
 
-    async def has_tournament_finished(self, tournament_id: str) -> bool:
-        tournament_data = await self.get_tournament_data(tournament_id)
+            bundle = {
+                "tournament": {"tournament": tournament_data},
+                "participants": participants,
+                "matches": self._annotate_matches(matches, participants),
+            }
 
-        if "tournament" not in tournament_data:
-            return False
+        open_match_index.rebuild(bundle["matches"], open_match_version)
+
+        # Whichever resource missed, the other two came along in the same response and are cached with it.
+        for resource in BUNDLED_RESOURCES:
+            self._cache.put(
+                (resource, tournament_id), bundle[resource], self._cache_ttls.get(resource, 0), generations[resource])
+
+        return bundle
+
+    async def get_tournament_state(self, tournament_id: str, priority: int=PRIORITY_INTERACTIVE) -> TournamentState:
+        return TournamentState(await self.get_tournament_data(tournament_id, priority))
 
-        return bool(tournament_data["tournament"].get("completed_at", None))
+    async def does_tournament_exist(self, tournament_id: str) -> bool:
+        return (await self.get_tournament_state(tournament_id)).exists
+
+    async def has_tournament_started(self, tournament_id: str) -> bool:
+        return (await self.get_tournament_state(tournament_id)).started
+
+    async def has_tournament_finished(self, tournament_id: str) -> bool:
+        return (await self.get_tournament_state(tournament_id)).finished
 
     async def create_tournament(
-            self, tournament_id: str, tournament_name: str, start_time: str, tournament_settings: dict) -> None:
+            self, tournament_id: str, tournament_name: str, start_time: str, tournament_settings: dict) -> dict:
 
-        url = BASE_URL + "/tournaments.json"
+        url = self._base_url + "/tournaments.json"
         query_params = {
             "api_key": self._challonge_api_key,
             "tournament[name]": tournament_name,
@@ -60,80 +171,174 @@ class ChallongeService:
 
         query_params.update(tournament_settings)
 
-        async with self._web_client.post(url, params=query_params) as _:
-            pass
+        try:
+            success, resp_data = await self._mutate(
+                "POST", url, query_params, "tournaments", tournament_id, BUNDLED_RESOURCES)
+        except UPSTREAM_FAILURES:
+            # Callers always create under a freshly issued id, so a tournament found there after a lost response is
+            # the one this request created.
+            if not (await self.get_tournament_state(tournament_id)).exists:
+                raise
+
+            return await self.get_tournament_data(tournament_id)
+
+        self._participant_indexes.pop(tournament_id, None)
+        self._open_match_indexes.pop(tournament_id, None)
+
+        return resp_data if success else {}
+
+    async def update_tournament(self, tournament_id: str, tournament_name: str, start_time: str) -> dict:
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + ".json"
+        query_params = {
+            "api_key": self._challonge_api_key,
+            "tournament[name]": tournament_name,
+        }
+
+        if start_time:
+            query_params["tournament[start_at]"] = start_time
+
+        success, resp_data = await self._mutate("PUT", url, query_params, "tournament", tournament_id, ("tournament",))
 
-    async def destroy_tournament(self, tournament_id: str) -> None:
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + ".json"
+        return resp_data if success else {}
+
+    async def destroy_tournament(self, tournament_id: str) -> bool:
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + ".json"
         query_params = {
             "api_key": self._challonge_api_key,
         }
 
-        async with self._web_client.delete(url, params=query_params) as _:
-            pass
+        success, _ = await self._mutate("DELETE", url, query_params, "tournament", tournament_id, BUNDLED_RESOURCES)
+
+        self._participant_indexes.pop(tournament_id, None)
+        self._open_match_indexes.pop(tournament_id, None)
 
-    async def start_tournament(self, tournament_id: str) -> None:
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/start.json"
+        return success
+
+    async def start_tournament(self, tournament_id: str) -> bool:
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/start.json"
         query_params = {"api_key": self._challonge_api_key}
 
-        async with self._web_client.post(url, params=query_params) as _:
-            pass
+        success, _ = await self._mutate(
+            "POST", url, query_params, "tournament_start", tournament_id, BUNDLED_RESOURCES)
+
+        return success
 
-    async def finish_tournament(self, tournament_id: str) -> None:
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/finalize.json"
+    async def finish_tournament(self, tournament_id: str) -> bool:
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/finalize.json"
         query_params = {"api_key": self._challonge_api_key}
 
-        async with self._web_client.post(url, params=query_params) as _:
-            pass
+        success, _ = await self._mutate(
+            "POST", url, query_params, "tournament_finalize", tournament_id, BUNDLED_RESOURCES)
+
+        return success
 
     async def is_user_signed_up(self, tournament_id: str, discord_id: str) -> bool:
         return bool(await self._get_participant_id(tournament_id, discord_id))
 
     async def is_user_checked_in(self, tournament_id: str, discord_id: str) -> bool:
-        participant_id = await self._get_participant_id(tournament_id, discord_id)
+        participant = await self._get_participant(tournament_id, discord_id)
 
-        if not participant_id:
+        if not participant:
             return False
 
+        return bool(participant.get("checked_in", False))
+
+    async def sign_up_player(self, tournament_id: str, discord_id: str, challonge_id: str, name: str) -> bool:
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/participants.json"
+        query_params = {
+            "api_key": self._challonge_api_key,
+            "participant[challonge_username]": challonge_id,
+            "participant[name]": name,
+            "participant[misc]": discord_id
+        }
+
+        success, resp_data = await self._mutate(
+            "POST", url, query_params, "participants", tournament_id, ("participants",))
+
+        if "participant" in resp_data:
+            self._get_participant_index(tournament_id).put(self._annotate_participant(resp_data["participant"]))
+
+        return success
+
+    async def bulk_sign_up_players(
+            self,
+            tournament_id: str,
+            players: List[Tuple[str, str, str]],
+            max_concurrent_sign_ups: int=8) -> Tuple[List[str], List[str]]:
+        added_discord_ids = []
+        unknown_discord_ids = []
+        semaphore = asyncio.Semaphore(max_concurrent_sign_ups)
+
+        async def sign_up(discord_id: str, challonge_id: str, name: str) -> bool:
+            async with semaphore:
+                return await self.sign_up_player(tournament_id, discord_id, challonge_id, name)
+
+        for start in range(0, len(players), BULK_ADD_CHUNK_SIZE):
+            chunk = players[start:start + BULK_ADD_CHUNK_SIZE]
+
+            try:
+                participants = await self._bulk_add_participants(tournament_id, chunk)
+            except UPSTREAM_FAILURES:
+                unknown_discord_ids += [discord_id for discord_id, _, _ in chunk]
+                continue
+
+            if participants is not None:
+                added_discord_ids += [participant["discord_id"] for participant in participants]
+                continue
+
+            # Challonge turns down the whole chunk over a single bad entry, so everyone in it is added on their own.
+            results = await asyncio.gather(*(sign_up(*player) for player in chunk), return_exceptions=True)
+
+            for (discord_id, _, _), result in zip(chunk, results):
+                if isinstance(result, UPSTREAM_FAILURES):
+                    unknown_discord_ids.append(discord_id)
+                elif isinstance(result, BaseException):
+                    raise result
+                elif result:
+                    added_discord_ids.append(discord_id)
+
+        return added_discord_ids, unknown_discord_ids
+
+    async def _bulk_add_participants(self, tournament_id: str, players: List[Tuple[str, str, str]]) -> List[dict]:
         url = (
-            BASE_URL +
+            self._base_url +
             "/tournaments/" +
             self._challonge_subdomain +
             "-" +
             tournament_id +
-            "/participants/" +
-            participant_id +
-            ".json")
+            "/participants/bulk_add.json")
         query_params = {"api_key": self._challonge_api_key}
+        body = {
+            "participants": [
+                {"challonge_username": challonge_id, "name": name, "misc": discord_id}
+                for discord_id, challonge_id, name
+                in players]
+        }
 
-        async with self._web_client.get(url, params=query_params) as resp:
-            resp_data = await resp.json()
+        success, resp_data = await self._mutate(
+            "POST", url, query_params, "participants_bulk_add", tournament_id, ("participants",), body)
 
-        if "participant" not in resp_data:
-            return False
+        if not success or not isinstance(resp_data, list):
+            return None
 
-        return resp_data["participant"].get("checked_in", False)
+        participant_index = self._get_participant_index(tournament_id)
+        participants = []
 
-    async def sign_up_player(self, tournament_id: str, discord_id: str, challonge_id: str, name: str) -> None:
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/participants.json"
-        query_params = {
-            "api_key": self._challonge_api_key,
-            "participant[challonge_username]": challonge_id,
-            "participant[name]": name,
-            "participant[misc]": discord_id
-        }
+        for participant in resp_data:
+            participant_inner = self._annotate_participant(participant["participant"])
+            participant_index.put(participant_inner)
+            participants.append(participant_inner)
 
-        async with self._web_client.post(url, params=query_params) as _:
-            pass
+        return participants
 
-    async def check_in_player(self, tournament_id: str, discord_id: str) -> None:
+    async def check_in_player(self, tournament_id: str, discord_id: str) -> bool:
         participant_id = await self._get_participant_id(tournament_id, discord_id)
 
         if not participant_id:
-            return
+            return False
 
         url = (
-            BASE_URL +
+            self._base_url +
             "/tournaments/" +
             self._challonge_subdomain +
             "-" +
@@ -143,17 +348,22 @@ class ChallongeService:
             "/check_in.json")
         query_params = {"api_key": self._challonge_api_key}
 
-        async with self._web_client.post(url, params=query_params) as _:
-            pass
+        success, resp_data = await self._mutate(
+            "POST", url, query_params, "participant_check_in", tournament_id, ("participants",))
+
+        if "participant" in resp_data:
+            self._get_participant_index(tournament_id).put(self._annotate_participant(resp_data["participant"]))
 
-    async def forfeit_player(self, tournament_id: str, discord_id: str) -> None:
+        return success
+
+    async def forfeit_player(self, tournament_id: str, discord_id: str) -> bool:
         participant_id = await self._get_participant_id(tournament_id, discord_id)
 
         if not participant_id:
-            return
+            return False
 
         url = (
-            BASE_URL +
+            self._base_url +
             "/tournaments/" +
             self._challonge_subdomain +
             "-" +
@@ -163,8 +373,21 @@ class ChallongeService:
             ".json")
         query_params = {"api_key": self._challonge_api_key}
 
-        async with self._web_client.delete(url, params=query_params) as _:
-            pass
+        success, resp_data = await self._mutate(
+            "DELETE", url, query_params, "participant", tournament_id, ("participants", "matches"))
+
+        self._get_open_match_index(tournament_id).clear()
+
+        if "participant" in resp_data:
+            participant_index = self._get_participant_index(tournament_id)
+
+            # Once a tournament is underway Challonge keeps forfeited participants, marking them inactive.
+            if resp_data["participant"].get("active", True):
+                participant_index.remove(discord_id)
+            else:
+                participant_index.put(self._annotate_participant(resp_data["participant"]))
+
+        return success
 
     async def open_matches_for_player(self, tournament_id: str, discord_id: str) -> List[dict]:
         participant_id = await self._get_participant_id(tournament_id, discord_id)
@@ -172,15 +395,17 @@ class ChallongeService:
         if not participant_id:
             return []
 
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/matches.json"
+        url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/matches.json"
         query_params = {
             "api_key": self._challonge_api_key,
             "state": "open",
             "participant_id": participant_id
         }
 
-        async with self._web_client.get(url, params=query_params) as resp:
-            result = await resp.json()
+        result = await self._get_json(url, query_params, PRIORITY_INTERACTIVE, "matches")
+
+        if not isinstance(result, list):
+            return []
 
         for match in result:
             if str(match["match"]["player1_id"]) == participant_id:
@@ -190,15 +415,18 @@ class ChallongeService:
 
         return result
 
+    def get_indexed_open_match(self, tournament_id: str, discord_id: str) -> dict:
+        return self._get_open_match_index(tournament_id).get(discord_id)
+
     async def submit_match_result(
             self,
             tournament_id: str,
             match_id: str,
             winner_participant_id: str,
-            score_csv: str) -> None:
+            score_csv: str) -> bool:
 
         url = (
-            BASE_URL +
+            self._base_url +
             "/tournaments/" +
             self._challonge_subdomain +
             "-" +
@@ -212,39 +440,76 @@ class ChallongeService:
             "match[winner_id]": winner_participant_id
         }
 
-        async with self._web_client.put(url, params=query_params) as _:
-            pass
+        # The match is no longer open once it has a result, and if the PUT failed it may not have been open at all.
+        self._get_open_match_index(tournament_id).remove_match(match_id)
+
+        success, _ = await self._mutate("PUT", url, query_params, "match", tournament_id, ("matches",))
+
+        self._get_open_match_index(tournament_id).remove_match(match_id)
+
+        return success
 
     async def _get_participant_id(self, tournament_id: str, discord_id: str) -> str:
-        participants = await self.get_participants_in_tournament(tournament_id)
+        participant = await self._get_participant(tournament_id, discord_id)
 
-        participant_id = ""
-        for participant in participants:
-            if participant["participant"].get("misc", "") == discord_id:
-                participant_id = str(participant["participant"]["id"])
-                break
+        if not participant:
+            return ""
 
-        return participant_id
+        return str(participant["id"])
 
-    async def get_participants_in_tournament(self, tournament_id) -> List[dict]:
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/participants.json"
-        query_params = {"api_key": self._challonge_api_key}
-        async with self._web_client.get(url, params=query_params) as resp:
-            participants = await resp.json()
+    async def _get_participant(self, tournament_id: str, discord_id: str) -> dict:
+        participant_index = self._get_participant_index(tournament_id)
 
-        for participant in participants:
-            participant_inner = participant["participant"]
-            participant_inner["discord_id"] = participant_inner.get("misc", "")
+        if participant_index.is_stale():
+            version = participant_index.version
+            participants = await self.get_participants_in_tournament(tournament_id)
+            participant_index.rebuild(participants, version)
 
-        return participants
+            # A write landed while the participants were read, so the index kept only its own entries. The list that
+            # was read still answers for everyone else.
+            if participant_index.is_stale() and not participant_index.get(discord_id):
+                return next(
+                    (participant["participant"]
+                     for participant
+                     in participants
+                     if participant["participant"].get("misc", "") == discord_id),
+                    None)
 
-    async def get_matches_in_tournament(self, tournament_id: str) -> List:
-        url = BASE_URL + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id + "/matches.json"
-        query_params = {"api_key": self._challonge_api_key}
-        async with self._web_client.get(url, params=query_params) as resp:
-            matches = await resp.json()
+        return participant_index.get(discord_id)
+
+    def _get_participant_index(self, tournament_id: str) -> ParticipantIndex:
+        if tournament_id not in self._participant_indexes:
+            self._participant_indexes[tournament_id] = ParticipantIndex(self._cache_ttls["participant_index"])
+
+        return self._participant_indexes[tournament_id]
+
+    def _get_open_match_index(self, tournament_id: str) -> OpenMatchIndex:
+        if tournament_id not in self._open_match_indexes:
+            self._open_match_indexes[tournament_id] = OpenMatchIndex(self._cache_ttls["open_match_index"])
+
+        return self._open_match_indexes[tournament_id]
+
+    async def get_participants_in_tournament(
+            self, tournament_id: str, priority: int=PRIORITY_INTERACTIVE) -> List[dict]:
+        return await self._get_cached(
+            "participants", tournament_id, self._fetch_participants_in_tournament, priority)
+
+    async def _fetch_participants_in_tournament(self, tournament_id: str, priority: int) -> List[dict]:
+        return (await self._fetch_tournament_bundle(tournament_id, priority))["participants"]
+
+    @staticmethod
+    def _annotate_participant(participant_inner: dict) -> dict:
+        participant_inner["discord_id"] = participant_inner.get("misc", "")
+        return participant_inner
+
+    async def get_matches_in_tournament(self, tournament_id: str, priority: int=PRIORITY_INTERACTIVE) -> List:
+        return await self._get_cached("matches", tournament_id, self._fetch_matches_in_tournament, priority)
 
-        participants = await self.get_participants_in_tournament(tournament_id)
+    async def _fetch_matches_in_tournament(self, tournament_id: str, priority: int) -> List:
+        return (await self._fetch_tournament_bundle(tournament_id, priority))["matches"]
+
+    @staticmethod
+    def _annotate_matches(matches: List[dict], participants: List[dict]) -> List[dict]:
         discord_id_lookup = dict(
             (participant["participant"]["id"], participant["participant"]["misc"])
             for participant
@@ -256,3 +521,68 @@ class ChallongeService:
             match_inner["player2_discord_id"] = discord_id_lookup.get(match_inner["player2_id"], None)
 
         return matches
+
+    async def _get_cached(
+            self, resource: str, tournament_id: str, fetch: Callable[[str, int], Awaitable], priority: int):
+        key = (resource, tournament_id)
+
+        found, value = self._cache.get(key)
+        if found:
+            return value
+
+        generation = self._cache.generation(key)
+        value = await fetch(tournament_id, priority)
+        self._cache.put(key, value, self._cache_ttls.get(resource, 0), generation)
+
+        return value
+
+    def _invalidate(self, tournament_id: str, *resources: str) -> None:
+        self._cache.invalidate(*((resource, tournament_id) for resource in resources))
+
+        # Requests already in flight may have been answered before the write, so later callers must not join them.
+        tournament_url = self._base_url + "/tournaments/" + self._challonge_subdomain + "-" + tournament_id
+        self._single_flight.forget(
+            lambda key: key[0].startswith(tournament_url + ".") or key[0].startswith(tournament_url + "/"))
+
+    async def _get_json(self, url: str, query_params: dict, priority: int, endpoint: str):
+        key = (url, tuple(sorted(query_params.items())))
+
+        async def fetch():
+            status, resp_data = await self._scheduler.request(
+                "GET", url, priority, endpoint=endpoint, validators=self._validators, params=query_params)
+
+            # Error payloads such as a missing tournament are answers in their own right; exhausted retries are not.
+            if status in RETRYABLE_STATUSES:
+                raise ChallongeUnavailableError(status)
+
+            return resp_data if resp_data is not None else {}
+
+        return await self._single_flight.do(key, fetch)
+
+    async def _mutate(
+            self,
+            method: str,
+            url: str,
+            query_params: dict,
+            endpoint: str,
+            tournament_id: str,
+            resources: Tuple[str, ...],
+            json_body: dict=None) -> Tuple[bool, Any]:
+        try:
+            status, resp_data = await self._scheduler.request(
+                method, url, PRIORITY_INTERACTIVE, endpoint=endpoint, params=query_params, json=json_body)
+
+            if status in RETRYABLE_STATUSES:
+                raise ChallongeUnavailableError(status)
+        except UPSTREAM_FAILURES:
+            # The write may have been applied before its response was lost, so the indexes cannot be trusted either.
+            self._participant_indexes.pop(tournament_id, None)
+            self._open_match_indexes.pop(tournament_id, None)
+            raise
+        finally:
+            self._invalidate(tournament_id, *resources)
+
+        success = 200 <= status <= 299
+
+        # Most writes answer with one wrapped record, bulk writes with a list of them.
+        return success, resp_data if success and isinstance(resp_data, (dict, list)) else {}
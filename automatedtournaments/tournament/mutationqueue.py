@@ -0,0 +1,210 @@
+import asyncio
+import logging
+from typing import Callable, List
+
+from automatedtournaments.metrics import REGISTRY
+from .challongeservice import ChallongeService, UPSTREAM_FAILURES
+from .requestscheduler import PRIORITY_BACKGROUND
+from .statejournal import StateJournal
+
+logger = logging.getLogger(__name__)
+
+SIGN_UP = "sign_up"
+CHECK_IN = "check_in"
+
+
+class MutationsPendingError(Exception):
+
+    def __init__(self):
+        super().__init__("Some sign-ups and check-ins did not reach Challonge")
+
+
+# Sign-ups and check-ins acknowledged before they reach Challonge. Each intent is written to the state journal first,
+# then a background worker applies whatever has queued up: sign-ups in one bulk_add, check-ins concurrently. The
+# participants are read back before and after each batch, so a batch retried after a lost response does not add anyone
+# twice. Intents whose response was lost without taking effect are tried again with the next batch, and intents that
+# Challonge turned down are handed to on_failure.
+class MutationQueue:
+
+    def __init__(
+            self,
+            challonge_service: ChallongeService,
+            state_journal: StateJournal,
+            tournament_key: str,
+            on_failure: Callable[[dict, str], None],
+            batch_delay: float=0.5,
+            retry_delay: float=5.0,
+            max_attempts: int=5,
+            max_concurrent_check_ins: int=8):
+        self._challonge_service = challonge_service
+        self._state_journal = state_journal
+        self._tournament_key = tournament_key
+        self._on_failure = on_failure
+        self._batch_delay = batch_delay
+        self._retry_delay = retry_delay
+        self._max_attempts = max_attempts
+        self._max_concurrent_check_ins = max_concurrent_check_ins
+
+        self._intents = state_journal.intents(tournament_key)
+        self._lock = asyncio.Lock()
+        self._worker = None
+
+        REGISTRY.add_collector(self._collect_metrics)
+
+    def is_pending(self, tournament_id: str, action: str, discord_id: str) -> bool:
+        return any(
+            intent["tournament_id"] == tournament_id and
+            intent["action"] == action and
+            intent["discord_id"] == discord_id
+            for intent
+            in self._intents)
+
+    def pending_count(self) -> int:
+        return len(self._intents)
+
+    def enqueue(self, tournament_id: str, action: str, discord_id: str, data: dict) -> None:
+        seq = self._state_journal.add_intent(self._tournament_key, tournament_id, action, discord_id, data)
+        self._intents.append(
+            {"seq": seq, "tournament_id": tournament_id, "action": action, "discord_id": discord_id, "data": data})
+
+        self.resume()
+
+    def discard(self, tournament_id: str) -> None:
+        for intent in [intent for intent in self._intents if intent["tournament_id"] == tournament_id]:
+            self._remove(intent)
+
+    def resume(self) -> None:
+        if self._intents and (self._worker is None or self._worker.done()):
+            self._worker = asyncio.ensure_future(self._run())
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+
+        REGISTRY.remove_collector(self._collect_metrics)
+        self._queued_intents_gauge().remove(tournament_key=self._tournament_key)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            batch = list(self._intents)
+
+            for tournament_id in sorted(set(intent["tournament_id"] for intent in batch)):
+                await self._apply(
+                    tournament_id, [intent for intent in batch if intent["tournament_id"] == tournament_id])
+
+            # What is left lost its response without reaching Challonge, so it is safe to send again.
+            if any(intent in self._intents for intent in batch):
+                raise MutationsPendingError()
+
+    async def _run(self) -> None:
+        attempt = 0
+
+        while self._intents:
+            await asyncio.sleep(self._batch_delay if not attempt else self._retry_delay * attempt)
+
+            try:
+                await self.flush()
+                attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                # Giving up here would strand intents that players have already been told went through.
+                attempt += 1
+                logger.warning("Failed to apply queued sign-ups and check-ins (attempt %d)", attempt, exc_info=error)
+
+                if attempt >= self._max_attempts:
+                    for intent in list(self._intents):
+                        self._fail(intent, "UPSTREAM_UNAVAILABLE")
+
+                    attempt = 0
+
+    async def _apply(self, tournament_id: str, intents: List[dict]) -> None:
+        participants = await self._read_participants(tournament_id)
+        pending_intents = []
+
+        for intent in intents:
+            if self._is_applied(intent, participants):
+                self._remove(intent)
+            else:
+                pending_intents.append(intent)
+
+        if not pending_intents:
+            return
+
+        sign_up_intents = [intent for intent in pending_intents if intent["action"] == SIGN_UP]
+        check_in_intents = [intent for intent in pending_intents if intent["action"] == CHECK_IN]
+        unknown_discord_ids = set()
+
+        if sign_up_intents:
+            _, unknown_sign_ups = await self._challonge_service.bulk_sign_up_players(
+                tournament_id,
+                [(intent["discord_id"], intent["data"]["challonge_id"], intent["data"]["name"])
+                 for intent
+                 in sign_up_intents])
+            unknown_discord_ids.update((SIGN_UP, discord_id) for discord_id in unknown_sign_ups)
+
+        # Challonge turns down a check-in for a player it does not have yet, so a check-in behind a sign-up whose
+        # outcome is unknown is held back and tried again with that sign-up.
+        waiting_discord_ids = set(discord_id for action, discord_id in unknown_discord_ids if action == SIGN_UP)
+        unknown_discord_ids.update(
+            (CHECK_IN, intent["discord_id"])
+            for intent
+            in check_in_intents
+            if intent["discord_id"] in waiting_discord_ids)
+        check_in_intents = [intent for intent in check_in_intents if intent["discord_id"] not in waiting_discord_ids]
+
+        semaphore = asyncio.Semaphore(self._max_concurrent_check_ins)
+
+        async def check_in(discord_id: str) -> bool:
+            async with semaphore:
+                return await self._challonge_service.check_in_player(tournament_id, discord_id)
+
+        results = await asyncio.gather(
+            *(check_in(intent["discord_id"]) for intent in check_in_intents), return_exceptions=True)
+
+        for intent, result in zip(check_in_intents, results):
+            if isinstance(result, UPSTREAM_FAILURES):
+                unknown_discord_ids.add((CHECK_IN, intent["discord_id"]))
+            elif isinstance(result, BaseException):
+                raise result
+
+        participants = await self._read_participants(tournament_id)
+
+        for intent in pending_intents:
+            if self._is_applied(intent, participants):
+                self._remove(intent)
+            elif (intent["action"], intent["discord_id"]) not in unknown_discord_ids:
+                self._fail(intent, "UPSTREAM_ERROR")
+
+    async def _read_participants(self, tournament_id: str) -> dict:
+        participants = await self._challonge_service.get_participants_in_tournament(tournament_id, PRIORITY_BACKGROUND)
+
+        return dict(
+            (participant["participant"]["discord_id"], participant["participant"]) for participant in participants)
+
+    @staticmethod
+    def _is_applied(intent: dict, participants: dict) -> bool:
+        participant = participants.get(intent["discord_id"], None)
+
+        if intent["action"] == CHECK_IN:
+            return bool(participant and participant.get("checked_in", False))
+
+        return participant is not None
+
+    def _fail(self, intent: dict, error: str) -> None:
+        self._remove(intent)
+        self._on_failure(intent, error)
+
+    def _remove(self, intent: dict) -> None:
+        if intent in self._intents:
+            self._intents.remove(intent)
+
+        self._state_journal.remove_intent(intent["seq"])
+
+    def _collect_metrics(self) -> None:
+        self._queued_intents_gauge().set(self.pending_count(), tournament_key=self._tournament_key)
+
+    @staticmethod
+    def _queued_intents_gauge():
+        return REGISTRY.gauge(
+            "queued_intents", "Sign-ups and check-ins waiting to be applied to Challonge.", ("tournament_key",))
@@ -0,0 +1,58 @@
+import time
+from typing import Callable, List
+
+
+class OpenMatchIndex:
+
+    def __init__(self, ttl: float, clock: Callable[[], float]=time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._open_matches = {}
+        self._built_at = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or self._clock() - self._built_at >= self._ttl
+
+    def rebuild(self, matches: List[dict], version: int) -> None:
+        # Matches fetched before a result was submitted would reopen the completed match, so they are discarded.
+        if version != self._version:
+            return
+
+        self._open_matches = {}
+        for match in matches:
+            match_inner = match["match"]
+
+            if match_inner.get("state", "") != "open":
+                continue
+
+            for slot in ("player1", "player2"):
+                discord_id = match_inner.get(slot + "_discord_id", None)
+
+                if discord_id:
+                    self._open_matches[discord_id] = match_inner
+
+        self._built_at = self._clock()
+
+    def get(self, discord_id: str) -> dict:
+        if self.is_stale():
+            return None
+
+        return self._open_matches.get(discord_id, None)
+
+    def remove_match(self, match_id: str) -> None:
+        self._open_matches = dict(
+            (discord_id, match_inner)
+            for discord_id, match_inner
+            in self._open_matches.items()
+            if str(match_inner["id"]) != match_id)
+        self._version += 1
+
+    def clear(self) -> None:
+        self._open_matches = {}
+        self._built_at = None
+        self._version += 1
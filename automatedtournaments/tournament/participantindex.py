@@ -0,0 +1,45 @@
+import time
+from typing import Callable, List
+
+
+class ParticipantIndex:
+
+    def __init__(self, ttl: float, clock: Callable[[], float]=time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._participants = {}
+        self._built_at = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or self._clock() - self._built_at >= self._ttl
+
+    def rebuild(self, participants: List[dict], version: int) -> None:
+        # Participants fetched before an incremental update would undo that update, so they are discarded.
+        if version != self._version:
+            return
+
+        self._participants = dict(
+            (participant["participant"].get("misc", ""), participant["participant"])
+            for participant
+            in participants
+            if participant["participant"].get("misc", ""))
+        self._built_at = self._clock()
+
+    def get(self, discord_id: str) -> dict:
+        return self._participants.get(discord_id, None)
+
+    def put(self, participant: dict) -> None:
+        discord_id = participant.get("misc", "")
+
+        if discord_id:
+            self._participants[discord_id] = participant
+            self._version += 1
+
+    def remove(self, discord_id: str) -> None:
+        self._participants.pop(discord_id, None)
+        self._version += 1
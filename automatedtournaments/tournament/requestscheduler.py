@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import itertools
+import json
+import random
+from typing import Any, Dict, Tuple
+
+import aiohttp
+
+from automatedtournaments.metrics import REGISTRY
+from automatedtournaments.ratelimit import TokenBucket
+from automatedtournaments.validatorstore import ValidatorStore
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# A write that timed out or got a 5xx may already have been applied, so only reads are sent again after those. Writes
+# are only retried when they certainly were not applied: throttled, or the connection was never opened.
+SAFE_METHODS = frozenset(["GET", "HEAD"])
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "challonge_request_duration_seconds", "Time taken by each Challonge request attempt.", ("endpoint", "method"))
+RESPONSES = REGISTRY.counter(
+    "challonge_responses_total", "Challonge responses by endpoint and status.", ("endpoint", "method", "status"))
+
+
+class RetryBudget:
+
+    def __init__(self, ratio: float, capacity: float):
+        self._ratio = ratio
+        self._capacity = capacity
+        self._balance = capacity
+
+    def deposit(self) -> None:
+        self._balance = min(self._capacity, self._balance + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        if self._balance < 1:
+            return False
+
+        self._balance -= 1
+        return True
+
+
+class RequestScheduler:
+
+    def __init__(
+            self,
+            client_session: aiohttp.ClientSession,
+            requests_per_second: float=5.0,
+            burst: float=10.0,
+            max_attempts: int=5,
+            base_backoff: float=0.5,
+            max_backoff: float=30.0,
+            retry_budget_ratio: float=0.2,
+            retry_budget_capacity: float=20.0):
+        self._web_client = client_session
+        self._bucket = TokenBucket(requests_per_second, burst)
+        self._retry_budget = RetryBudget(retry_budget_ratio, retry_budget_capacity)
+        self._max_attempts = max_attempts
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._dispatcher = None
+
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "retry_budget_exhausted": 0,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["queue_depth"] = sum(1 for _, _, waiter in self._waiters if not waiter.done())
+        return stats
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            priority: int=PRIORITY_INTERACTIVE,
+            endpoint: str="",
+            validators: ValidatorStore=None,
+            **kwargs) -> Tuple[int, Any]:
+        self._stats["requests"] += 1
+        self._retry_budget.deposit()
+
+        validator_key = None
+        if validators is not None and method == "GET":
+            validator_key = (url, tuple(sorted(kwargs.get("params", {}).items())))
+            etag, cached_body = validators.get(validator_key)
+
+            if etag:
+                kwargs["headers"] = dict(kwargs.get("headers", None) or {}, **{"If-None-Match": etag})
+
+        attempt = 1
+        while True:
+            await self._acquire(priority)
+
+            try:
+                with REQUEST_DURATION.time(endpoint=endpoint, method=method):
+                    async with self._web_client.request(method, url, **kwargs) as resp:
+                        status = resp.status
+                        retry_after = self._parse_retry_after(resp.headers.get("Retry-After", ""))
+                        response_etag = resp.headers.get("ETag", "")
+                        body = await resp.text() if status != 304 else ""
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                RESPONSES.inc(endpoint=endpoint, method=method, status="error")
+
+                if not self._is_retryable_error(method, error) or not self._may_retry(attempt):
+                    raise
+
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            RESPONSES.inc(endpoint=endpoint, method=method, status=str(status))
+
+            if status == 429:
+                self._stats["throttled"] += 1
+
+                # The quota is shared by every request, so a throttled response holds back the whole queue.
+                self._bucket.pause(retry_after if retry_after is not None else self._backoff(attempt))
+            elif status >= 500:
+                self._stats["server_errors"] += 1
+
+            if validator_key is not None and status == 304:
+                validators.record_not_modified()
+                return 200, cached_body
+
+            if not self._is_retryable_status(method, status) or not self._may_retry(attempt):
+                parsed_body = self._parse_body(body)
+
+                if validator_key is not None and status == 200:
+                    validators.put(validator_key, response_etag, parsed_body)
+
+                return status, parsed_body
+
+            await asyncio.sleep(retry_after if retry_after is not None else self._backoff(attempt))
+            attempt += 1
+
+    async def _acquire(self, priority: int) -> None:
+        if not self._waiters and self._bucket.try_take() == 0:
+            return
+
+        waiter = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        await waiter
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = self._bucket.try_take()
+
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+
+            _, _, waiter = heapq.heappop(self._waiters)
+            waiter.set_result(None)
+
+    @staticmethod
+    def _is_retryable_error(method: str, error: Exception) -> bool:
+        return method in SAFE_METHODS or isinstance(error, aiohttp.ClientConnectorError)
+
+    @staticmethod
+    def _is_retryable_status(method: str, status: int) -> bool:
+        return status in RETRYABLE_STATUSES if method in SAFE_METHODS else status == 429
+
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self._max_attempts:
+            return False
+
+        if not self._retry_budget.try_withdraw():
+            self._stats["retry_budget_exhausted"] += 1
+            return False
+
+        self._stats["retries"] += 1
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self._max_backoff, self._base_backoff * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def _parse_retry_after(retry_after: str) -> float:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_body(body: str) -> Any:
+        if not body:
+            return None
+
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
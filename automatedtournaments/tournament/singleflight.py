@@ -0,0 +1,27 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable]) -> Any:
+        call = self._calls.get(key, None)
+
+        if call is None:
+            call = asyncio.ensure_future(fetch())
+            self._calls[key] = call
+            call.add_done_callback(lambda finished_call: self._remove(key, finished_call))
+
+        # Shielded so that one caller being cancelled does not cancel the request for everyone sharing it.
+        return await asyncio.shield(call)
+
+    def forget(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def _remove(self, key: Hashable, call: asyncio.Future) -> None:
+        if self._calls.get(key, None) is call:
+            del self._calls[key]
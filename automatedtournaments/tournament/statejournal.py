@@ -0,0 +1,157 @@
+import json
+import sqlite3
+import time
+from typing import Dict, List
+
+TOURNAMENT_CREATED = "tournament_created"
+TOURNAMENT_DESTROYED = "tournament_destroyed"
+TOURNAMENT_STARTED = "tournament_started"
+TOURNAMENT_FINISHED = "tournament_finished"
+
+SNAPSHOT = "snapshot"
+
+TOURNAMENT_STATUSES = {
+    TOURNAMENT_CREATED: "created",
+    TOURNAMENT_DESTROYED: "destroyed",
+    TOURNAMENT_STARTED: "started",
+    TOURNAMENT_FINISHED: "finished",
+}
+
+# Tournaments in these states still have players waiting on them. The others only hold on to their key.
+ACTIVE_STATUSES = frozenset([TOURNAMENT_STATUSES[TOURNAMENT_CREATED], TOURNAMENT_STATUSES[TOURNAMENT_STARTED]])
+
+
+# Append-only SQLite log of controller state transitions. replay() folds it into the latest state per tournament key
+# and compacts the log down to one snapshot row per key, dropping destroyed tournaments, so startup cost stays flat
+# however long the app has run.
+# Entries are a few hundred bytes written in WAL mode, which is cheap enough to do inline on the event loop.
+class StateJournal:
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "tournament_key TEXT NOT NULL, "
+            "event TEXT NOT NULL, "
+            "data TEXT NOT NULL, "
+            "recorded_at REAL NOT NULL)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS issued_tournament_ids ("
+            "tournament_id TEXT PRIMARY KEY, "
+            "issued_at REAL NOT NULL)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS pooled_tournaments ("
+            "tournament_id TEXT PRIMARY KEY, "
+            "pooled_at REAL NOT NULL)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS intents ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "tournament_key TEXT NOT NULL, "
+            "tournament_id TEXT NOT NULL, "
+            "action TEXT NOT NULL, "
+            "discord_id TEXT NOT NULL, "
+            "data TEXT NOT NULL, "
+            "recorded_at REAL NOT NULL)")
+
+    def append(self, tournament_key: str, event: str, data: dict) -> None:
+        self._connection.execute(
+            "INSERT INTO journal (tournament_key, event, data, recorded_at) VALUES (?, ?, ?, ?)",
+            (tournament_key, event, json.dumps(data), time.time()))
+
+    def record_tournament_id(self, tournament_id: str) -> bool:
+        cursor = self._connection.execute(
+            "INSERT OR IGNORE INTO issued_tournament_ids (tournament_id, issued_at) VALUES (?, ?)",
+            (tournament_id, time.time()))
+
+        return cursor.rowcount == 1
+
+    def add_pooled_tournament(self, tournament_id: str) -> None:
+        self._connection.execute(
+            "INSERT OR IGNORE INTO pooled_tournaments (tournament_id, pooled_at) VALUES (?, ?)",
+            (tournament_id, time.time()))
+
+    def remove_pooled_tournament(self, tournament_id: str) -> None:
+        self._connection.execute("DELETE FROM pooled_tournaments WHERE tournament_id = ?", (tournament_id,))
+
+    def pooled_tournaments(self) -> List[str]:
+        return [
+            tournament_id
+            for tournament_id,
+            in self._connection.execute("SELECT tournament_id FROM pooled_tournaments ORDER BY pooled_at")]
+
+    def add_intent(self, tournament_key: str, tournament_id: str, action: str, discord_id: str, data: dict) -> int:
+        cursor = self._connection.execute(
+            "INSERT INTO intents (tournament_key, tournament_id, action, discord_id, data, recorded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (tournament_key, tournament_id, action, discord_id, json.dumps(data), time.time()))
+
+        return cursor.lastrowid
+
+    def remove_intent(self, seq: int) -> None:
+        self._connection.execute("DELETE FROM intents WHERE seq = ?", (seq,))
+
+    def intents(self, tournament_key: str) -> List[dict]:
+        return [
+            {
+                "seq": seq,
+                "tournament_id": tournament_id,
+                "action": action,
+                "discord_id": discord_id,
+                "data": json.loads(data),
+            }
+            for seq, tournament_id, action, discord_id, data
+            in self._connection.execute(
+                "SELECT seq, tournament_id, action, discord_id, data FROM intents WHERE tournament_key = ? "
+                "ORDER BY seq",
+                (tournament_key,))]
+
+    def replay(self) -> Dict[str, dict]:
+        states = {}
+
+        for tournament_key, event, data in self._connection.execute(
+                "SELECT tournament_key, event, data FROM journal ORDER BY seq"):
+            data = json.loads(data)
+
+            if event == SNAPSHOT or event == TOURNAMENT_CREATED:
+                state = {}
+            else:
+                state = states.get(tournament_key, {})
+
+            state.update(data)
+
+            if event in TOURNAMENT_STATUSES:
+                state["status"] = TOURNAMENT_STATUSES[event]
+
+            states[tournament_key] = state
+
+        states = dict(
+            (tournament_key, state)
+            for tournament_key, state
+            in states.items()
+            if state.get("status", "") != TOURNAMENT_STATUSES[TOURNAMENT_DESTROYED])
+
+        self._compact(states)
+
+        return states
+
+    def forget(self, tournament_key: str) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM journal WHERE tournament_key = ?", (tournament_key,))
+            self._connection.execute("DELETE FROM intents WHERE tournament_key = ?", (tournament_key,))
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _compact(self, states: Dict[str, dict]) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM journal")
+
+            for tournament_key, state in states.items():
+                self._connection.execute(
+                    "INSERT INTO journal (tournament_key, event, data, recorded_at) VALUES (?, ?, ?, ?)",
+                    (tournament_key, SNAPSHOT, json.dumps(state), time.time()))
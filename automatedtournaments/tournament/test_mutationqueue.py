@@ -0,0 +1,209 @@
+import asyncio
+import unittest
+
+from .challongeservice import ChallongeUnavailableError
+from .mutationqueue import CHECK_IN, SIGN_UP, MutationQueue, MutationsPendingError
+from .statejournal import StateJournal
+
+TOURNAMENT_ID = "tournament"
+
+
+# Keeps participants in memory and fails the players named in lost_before (the write never lands), lost_after (the
+# write lands but its response is lost) or rejected (Challonge turns the write down).
+class StubChallongeService:
+
+    def __init__(self):
+        self.participants = {}
+        self.lost_before = set()
+        self.lost_after = set()
+        self.rejected = set()
+        self.read_failures = []
+        self.bulk_calls = 0
+
+    async def get_participants_in_tournament(self, tournament_id: str, priority: int=0) -> list:
+        if self.read_failures:
+            raise self.read_failures.pop(0)
+
+        return [{"participant": dict(participant)} for participant in self.participants.values()]
+
+    async def bulk_sign_up_players(self, tournament_id: str, players: list) -> tuple:
+        self.bulk_calls += 1
+        added_discord_ids = []
+        unknown_discord_ids = []
+
+        for discord_id, challonge_id, name in players:
+            if discord_id in self.rejected:
+                continue
+
+            if discord_id in self.lost_before:
+                self.lost_before.remove(discord_id)
+                unknown_discord_ids.append(discord_id)
+                continue
+
+            self.participants[discord_id] = {"discord_id": discord_id, "name": name, "checked_in": False}
+
+            if discord_id in self.lost_after:
+                self.lost_after.remove(discord_id)
+                unknown_discord_ids.append(discord_id)
+            else:
+                added_discord_ids.append(discord_id)
+
+        return added_discord_ids, unknown_discord_ids
+
+    async def check_in_player(self, tournament_id: str, discord_id: str) -> bool:
+        if discord_id in self.rejected or discord_id not in self.participants:
+            return False
+
+        if discord_id in self.lost_before:
+            self.lost_before.remove(discord_id)
+            raise ChallongeUnavailableError(503)
+
+        self.participants[discord_id]["checked_in"] = True
+        return True
+
+
+class MutationQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.challonge_service = StubChallongeService()
+        self.state_journal = StateJournal(":memory:")
+        self.failures = []
+        self.queues = []
+
+    def tearDown(self):
+        for queue in self.queues:
+            queue.close()
+
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.state_journal.close()
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    # The worker stays out of the way unless a test asks for it, so flushes happen exactly where the test calls them.
+    def new_queue(self, batch_delay: float=60.0) -> MutationQueue:
+        queue = MutationQueue(
+            self.challonge_service,
+            self.state_journal,
+            "key",
+            lambda intent, error: self.failures.append((intent["discord_id"], intent["action"], error)),
+            batch_delay=batch_delay,
+            retry_delay=0.0)
+        self.queues.append(queue)
+
+        return queue
+
+    def sign_up(self, queue: MutationQueue, *discord_ids: str) -> None:
+        for discord_id in discord_ids:
+            queue.enqueue(TOURNAMENT_ID, SIGN_UP, discord_id, {"challonge_id": "c" + discord_id, "name": discord_id})
+
+    def test_flush_applies_sign_ups_in_one_batch(self):
+        queue = self.new_queue()
+        self.sign_up(queue, "1", "2", "3")
+
+        self.loop.run_until_complete(queue.flush())
+
+        self.assertEqual(sorted(self.challonge_service.participants), ["1", "2", "3"])
+        self.assertEqual(self.challonge_service.bulk_calls, 1)
+        self.assertEqual(queue.pending_count(), 0)
+        self.assertEqual(self.state_journal.intents("key"), [])
+
+    def test_rejected_intent_is_reported_and_others_applied(self):
+        queue = self.new_queue()
+        self.challonge_service.rejected.add("2")
+        self.sign_up(queue, "1", "2", "3")
+
+        self.loop.run_until_complete(queue.flush())
+
+        self.assertEqual(sorted(self.challonge_service.participants), ["1", "3"])
+        self.assertEqual(self.failures, [("2", SIGN_UP, "UPSTREAM_ERROR")])
+        self.assertEqual(queue.pending_count(), 0)
+
+    def test_intent_lost_before_reaching_challonge_stays_pending(self):
+        queue = self.new_queue()
+        self.challonge_service.lost_before.add("2")
+        self.sign_up(queue, "1", "2")
+
+        with self.assertRaises(MutationsPendingError):
+            self.loop.run_until_complete(queue.flush())
+
+        self.assertTrue(queue.is_pending(TOURNAMENT_ID, SIGN_UP, "2"))
+        self.assertFalse(queue.is_pending(TOURNAMENT_ID, SIGN_UP, "1"))
+        self.assertEqual(self.failures, [])
+
+        self.loop.run_until_complete(queue.flush())
+
+        self.assertEqual(sorted(self.challonge_service.participants), ["1", "2"])
+        self.assertEqual(queue.pending_count(), 0)
+
+    def test_intent_applied_despite_lost_response_is_not_sent_again(self):
+        queue = self.new_queue()
+        self.challonge_service.lost_after.add("1")
+        self.sign_up(queue, "1")
+
+        self.loop.run_until_complete(queue.flush())
+        self.loop.run_until_complete(queue.flush())
+
+        self.assertEqual(self.challonge_service.bulk_calls, 1)
+        self.assertEqual(self.failures, [])
+        self.assertEqual(queue.pending_count(), 0)
+
+    def test_failed_check_in_does_not_fail_the_others(self):
+        queue = self.new_queue()
+        self.sign_up(queue, "1", "2", "3")
+        self.loop.run_until_complete(queue.flush())
+
+        self.challonge_service.lost_before.add("2")
+        self.challonge_service.rejected.add("3")
+        for discord_id in ("1", "2", "3"):
+            queue.enqueue(TOURNAMENT_ID, CHECK_IN, discord_id, {})
+
+        with self.assertRaises(MutationsPendingError):
+            self.loop.run_until_complete(queue.flush())
+
+        self.assertTrue(self.challonge_service.participants["1"]["checked_in"])
+        self.assertEqual(self.failures, [("3", CHECK_IN, "UPSTREAM_ERROR")])
+        self.assertTrue(queue.is_pending(TOURNAMENT_ID, CHECK_IN, "2"))
+
+    def test_check_in_behind_an_unknown_sign_up_stays_pending(self):
+        queue = self.new_queue()
+        self.challonge_service.lost_before.add("2")
+        self.sign_up(queue, "1", "2")
+        for discord_id in ("1", "2"):
+            queue.enqueue(TOURNAMENT_ID, CHECK_IN, discord_id, {})
+
+        with self.assertRaises(MutationsPendingError):
+            self.loop.run_until_complete(queue.flush())
+
+        self.assertEqual(self.failures, [])
+        self.assertTrue(queue.is_pending(TOURNAMENT_ID, CHECK_IN, "2"))
+
+        self.loop.run_until_complete(queue.flush())
+
+        self.assertTrue(self.challonge_service.participants["2"]["checked_in"])
+        self.assertEqual(queue.pending_count(), 0)
+
+    def test_intents_are_replayed_from_the_journal(self):
+        queue = self.new_queue()
+        self.sign_up(queue, "1", "2")
+        queue.close()
+
+        restarted_queue = self.new_queue()
+
+        self.assertTrue(restarted_queue.is_pending(TOURNAMENT_ID, SIGN_UP, "1"))
+        self.loop.run_until_complete(restarted_queue.flush())
+
+        self.assertEqual(sorted(self.challonge_service.participants), ["1", "2"])
+        self.assertEqual(self.state_journal.intents("key"), [])
+
+    def test_worker_keeps_going_after_unexpected_errors(self):
+        queue = self.new_queue(batch_delay=0.0)
+        self.challonge_service.read_failures = [RuntimeError("unexpected"), ChallongeUnavailableError(503)]
+
+        self.sign_up(queue, "1")
+        self.loop.run_until_complete(asyncio.wait_for(queue._worker, 5.0))
+
+        self.assertEqual(sorted(self.challonge_service.participants), ["1"])
+        self.assertEqual(queue.pending_count(), 0)
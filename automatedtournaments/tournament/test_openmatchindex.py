@@ -0,0 +1,54 @@
+import unittest
+
+from .openmatchindex import OpenMatchIndex
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def match(match_id: int, state: str, player1_discord_id: str, player2_discord_id: str) -> dict:
+    return {
+        "match": {
+            "id": match_id,
+            "state": state,
+            "player1_discord_id": player1_discord_id,
+            "player2_discord_id": player2_discord_id,
+        }
+    }
+
+
+class OpenMatchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.index = OpenMatchIndex(120.0, self.clock)
+
+    def test_both_players_of_an_open_match_find_it(self):
+        self.index.rebuild([match(1, "complete", "1", "2"), match(2, "open", "1", "3")], self.index.version)
+
+        self.assertEqual(self.index.get("1")["id"], 2)
+        self.assertEqual(self.index.get("3")["id"], 2)
+        self.assertIsNone(self.index.get("2"))
+
+    def test_index_answers_nothing_once_it_expires(self):
+        self.index.rebuild([match(1, "open", "1", "2")], self.index.version)
+        self.clock.now = 120.0
+
+        self.assertIsNone(self.index.get("1"))
+
+    def test_reported_match_is_not_reopened_by_a_fetch_from_before_the_report(self):
+        self.index.rebuild([match(1, "open", "1", "2"), match(2, "open", "3", "4")], self.index.version)
+        version = self.index.version
+
+        self.index.remove_match("1")
+        self.index.rebuild([match(1, "open", "1", "2"), match(2, "open", "3", "4")], version)
+
+        self.assertIsNone(self.index.get("1"))
+        self.assertIsNone(self.index.get("2"))
+        self.assertEqual(self.index.get("3")["id"], 2)
@@ -0,0 +1,55 @@
+import unittest
+
+from .participantindex import ParticipantIndex
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def participant(participant_id: int, discord_id: str) -> dict:
+    return {"participant": {"id": participant_id, "misc": discord_id}}
+
+
+class ParticipantIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.index = ParticipantIndex(60.0, self.clock)
+
+    def test_rebuilt_index_finds_participants_by_discord_id(self):
+        self.index.rebuild([participant(1, "100"), participant(2, "")], self.index.version)
+
+        self.assertEqual(self.index.get("100"), {"id": 1, "misc": "100"})
+        self.assertIsNone(self.index.get(""))
+        self.assertFalse(self.index.is_stale())
+
+    def test_index_goes_stale_after_its_ttl(self):
+        self.assertTrue(self.index.is_stale())
+
+        self.index.rebuild([], self.index.version)
+        self.clock.now = 60.0
+
+        self.assertTrue(self.index.is_stale())
+
+    def test_rebuild_read_before_an_update_is_discarded(self):
+        version = self.index.version
+        self.index.put({"id": 2, "misc": "200"})
+
+        self.index.rebuild([participant(1, "100")], version)
+
+        self.assertEqual(self.index.get("200"), {"id": 2, "misc": "200"})
+        self.assertIsNone(self.index.get("100"))
+        self.assertTrue(self.index.is_stale())
+
+    def test_removed_participant_is_gone(self):
+        self.index.rebuild([participant(1, "100")], self.index.version)
+
+        self.index.remove("100")
+
+        self.assertIsNone(self.index.get("100"))
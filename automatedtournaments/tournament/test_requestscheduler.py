@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+
+import aiohttp
+
+from automatedtournaments.validatorstore import ValidatorStore
+from .requestscheduler import RequestScheduler
+
+
+class ScriptedResponse:
+
+    def __init__(self, status: int, body: str="{}", headers: dict=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        return False
+
+
+# Answers each request with the next scripted outcome, raising it if it is an exception.
+class ScriptedSession:
+
+    def __init__(self, outcomes: list):
+        self._outcomes = list(outcomes)
+        self.methods = []
+        self.headers = []
+
+    def request(self, method: str, url: str, **kwargs):
+        self.methods.append(method)
+        self.headers.append(kwargs.get("headers", None) or {})
+        outcome = self._outcomes.pop(0)
+
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        return outcome
+
+
+class RequestSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def request(self, method: str, outcomes: list, validators: ValidatorStore=None):
+        session = ScriptedSession(outcomes)
+        scheduler = RequestScheduler(session, requests_per_second=1000.0, burst=1000.0, base_backoff=0.0)
+
+        return session, self.loop.run_until_complete(
+            scheduler.request(method, "http://challonge.test/resource", validators=validators))
+
+    def test_get_is_retried_after_server_error(self):
+        session, (status, body) = self.request("GET", [ScriptedResponse(503), ScriptedResponse(200, '{"ok": 1}')])
+
+        self.assertEqual((status, body), (200, {"ok": 1}))
+        self.assertEqual(len(session.methods), 2)
+
+    def test_get_is_retried_after_timeout(self):
+        session, (status, _) = self.request("GET", [asyncio.TimeoutError(), ScriptedResponse(200)])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(session.methods), 2)
+
+    def test_write_is_not_retried_after_server_error(self):
+        session, (status, _) = self.request("POST", [ScriptedResponse(502), ScriptedResponse(200)])
+
+        self.assertEqual(status, 502)
+        self.assertEqual(len(session.methods), 1)
+
+    def test_write_is_not_retried_after_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            self.request("PUT", [asyncio.TimeoutError(), ScriptedResponse(200)])
+
+    def test_write_is_not_retried_after_disconnect(self):
+        with self.assertRaises(aiohttp.ServerDisconnectedError):
+            self.request("DELETE", [aiohttp.ServerDisconnectedError(), ScriptedResponse(200)])
+
+    def test_write_is_retried_when_throttled(self):
+        session, (status, _) = self.request("POST", [ScriptedResponse(429), ScriptedResponse(200)])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(session.methods), 2)
+
+    def test_write_is_retried_when_connection_was_never_opened(self):
+        refused = aiohttp.ClientConnectorError(None, ConnectionRefusedError(111, "Connection refused"))
+        session, (status, _) = self.request("POST", [refused, ScriptedResponse(200)])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(session.methods), 2)
+
+    def test_not_modified_get_is_answered_from_the_validator_store(self):
+        validators = ValidatorStore()
+        self.request("GET", [ScriptedResponse(200, '{"ok": 1}', {"ETag": '"v1"'})], validators)
+
+        session, (status, body) = self.request("GET", [ScriptedResponse(304)], validators)
+
+        self.assertEqual((status, body), (200, {"ok": 1}))
+        self.assertEqual(session.headers, [{"If-None-Match": '"v1"'}])
+        self.assertEqual(validators.stats(), {"not_modified": 1, "modified": 1})
+
+    def test_response_without_etag_is_not_revalidated(self):
+        validators = ValidatorStore()
+        self.request("GET", [ScriptedResponse(200, '{"ok": 1}', {"ETag": '"v1"'})], validators)
+        self.request("GET", [ScriptedResponse(200, '{"ok": 2}')], validators)
+
+        session, _ = self.request("GET", [ScriptedResponse(200)], validators)
+
+        self.assertEqual(session.headers, [{}])
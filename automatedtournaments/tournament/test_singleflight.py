@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+from .singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.single_flight = SingleFlight()
+        self.fetches = 0
+        self.release = asyncio.Event()
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    async def fetch(self) -> int:
+        self.fetches += 1
+        await self.release.wait()
+        return self.fetches
+
+    def test_concurrent_callers_share_one_fetch(self):
+        async def run():
+            callers = [asyncio.ensure_future(self.single_flight.do("key", self.fetch)) for _ in range(3)]
+            await asyncio.sleep(0)
+            self.release.set()
+            return await asyncio.gather(*callers)
+
+        self.assertEqual(self.loop.run_until_complete(run()), [1, 1, 1])
+        self.assertEqual(self.fetches, 1)
+
+    def test_finished_fetch_is_not_reused(self):
+        self.release.set()
+
+        self.loop.run_until_complete(self.single_flight.do("key", self.fetch))
+
+        self.assertEqual(self.loop.run_until_complete(self.single_flight.do("key", self.fetch)), 2)
+
+    def test_cancelled_caller_does_not_cancel_the_shared_fetch(self):
+        async def run():
+            first = asyncio.ensure_future(self.single_flight.do("key", self.fetch))
+            second = asyncio.ensure_future(self.single_flight.do("key", self.fetch))
+            await asyncio.sleep(0)
+
+            first.cancel()
+            self.release.set()
+            return await second
+
+        self.assertEqual(self.loop.run_until_complete(run()), 1)
+
+    def test_forgotten_fetch_is_not_joined(self):
+        async def run():
+            first = asyncio.ensure_future(self.single_flight.do("key", self.fetch))
+            await asyncio.sleep(0)
+
+            self.single_flight.forget(lambda key: key == "key")
+            second = asyncio.ensure_future(self.single_flight.do("key", self.fetch))
+            await asyncio.sleep(0)
+
+            self.release.set()
+            return await asyncio.gather(first, second)
+
+        self.assertEqual(self.loop.run_until_complete(run()), [2, 2])
+        self.assertEqual(self.fetches, 2)
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from . import statejournal
+from .statejournal import StateJournal
+from .tournamentcontrollerregistry import TournamentControllerRegistry
+
+
+class StateJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "journal.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replay_folds_events_into_the_latest_state(self):
+        state_journal = StateJournal(self.path)
+        state_journal.append("key", statejournal.TOURNAMENT_CREATED, {"tournament_id": "first", "name": "First"})
+        state_journal.append("key", statejournal.TOURNAMENT_STARTED, {})
+        state_journal.append("key", statejournal.TOURNAMENT_FINISHED, {})
+        state_journal.append("key", statejournal.TOURNAMENT_CREATED, {"tournament_id": "second", "name": "Second"})
+
+        self.assertEqual(
+            state_journal.replay(), {"key": {"tournament_id": "second", "name": "Second", "status": "created"}})
+
+    def test_state_survives_a_restart(self):
+        state_journal = StateJournal(self.path)
+        state_journal.append("key", statejournal.TOURNAMENT_CREATED, {"tournament_id": "tournament"})
+        state_journal.append("key", statejournal.TOURNAMENT_STARTED, {})
+        state_journal.close()
+
+        restarted_journal = StateJournal(self.path)
+
+        self.assertEqual(restarted_journal.replay(), {"key": {"tournament_id": "tournament", "status": "started"}})
+
+    def test_compacted_journal_replays_the_same_state(self):
+        state_journal = StateJournal(self.path)
+        state_journal.append("key", statejournal.TOURNAMENT_CREATED, {"tournament_id": "tournament"})
+        state_journal.append("key", statejournal.TOURNAMENT_STARTED, {})
+        first_replay = state_journal.replay()
+
+        state_journal.append("key", statejournal.TOURNAMENT_FINISHED, {})
+        state_journal.close()
+
+        restarted_journal = StateJournal(self.path)
+        first_replay["key"]["status"] = "finished"
+
+        self.assertEqual(restarted_journal.replay(), first_replay)
+
+    def test_registry_restores_controllers_after_a_restart(self):
+        state_journal = StateJournal(self.path)
+        state_journal.append("server", statejournal.TOURNAMENT_CREATED, {"tournament_id": "tournament"})
+        state_journal.append("server", statejournal.TOURNAMENT_STARTED, {})
+        state_journal.close()
+
+        restarted_journal = StateJournal(self.path)
+        registry = TournamentControllerRegistry(None, None, None, {}, state_journal=restarted_journal)
+
+        self.assertEqual(registry.tournament_keys(), ["server"])
+        self.assertTrue(registry.get("server").is_active())
+        self.assertIs(registry.resolve("server"), registry.get("server"))
+
+        restarted_journal.close()
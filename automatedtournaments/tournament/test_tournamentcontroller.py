@@ -0,0 +1,147 @@
+import asyncio
+import unittest
+
+from .challongeservice import ChallongeUnavailableError
+from .tournamentcontroller import TournamentController
+from .tournamentidgenerator import TournamentIdGenerator
+from .tournamentstate import TournamentState
+
+TOURNAMENT_ID = "tournament"
+
+
+def match(match_id: int, state: str) -> dict:
+    return {
+        "match": {
+            "id": match_id,
+            "state": state,
+            "player1_id": 11,
+            "player2_id": 12,
+            "player1_discord_id": "1",
+            "player2_discord_id": "2",
+        }
+    }
+
+
+# Serves one underway tournament whose matches and open match index are set by each test, and records the upstream
+# reads and submitted results.
+class StubChallongeService:
+
+    def __init__(self, matches: list, indexed_open_match: dict):
+        self.matches = matches
+        self.indexed_open_match = indexed_open_match
+        self.reads = []
+        self.submitted = []
+
+    async def get_tournament_state(self, tournament_id: str, priority: int=0) -> TournamentState:
+        self.reads.append("tournament")
+        return TournamentState({"tournament": {"started_at": "2026-01-01T00:00:00Z", "completed_at": None}})
+
+    def get_indexed_open_match(self, tournament_id: str, discord_id: str) -> dict:
+        return self.indexed_open_match
+
+    async def is_user_signed_up(self, tournament_id: str, discord_id: str) -> bool:
+        self.reads.append("participants")
+        return True
+
+    async def open_matches_for_player(self, tournament_id: str, discord_id: str) -> list:
+        self.reads.append("matches")
+        return [entry for entry in self.matches if entry["match"]["state"] == "open"]
+
+    async def get_matches_in_tournament(self, tournament_id: str, priority: int=0) -> list:
+        return self.matches
+
+    async def submit_match_result(self, tournament_id: str, match_id: str, winner_id: str, score_csv: str) -> bool:
+        self.submitted.append((match_id, winner_id, score_csv))
+        return True
+
+
+# Hands out no pooled tournament, either by raising the scripted error or by answering empty.
+class StubTournamentPool:
+
+    def __init__(self, error: Exception=None):
+        self.error = error
+
+    async def claim(self, tournament_name: str, start_time: str) -> tuple:
+        if self.error:
+            raise self.error
+
+        return "", {}
+
+
+class StubCreatingChallongeService:
+
+    def __init__(self):
+        self.created = []
+
+    async def create_tournament(self, tournament_id: str, name: str, start_time: str, settings: dict) -> dict:
+        self.created.append(tournament_id)
+        return {"tournament": {"url": tournament_id}}
+
+
+class RecordResultTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def record_victory(self, challonge_service: StubChallongeService, discord_id: str) -> tuple:
+        controller = TournamentController(None, challonge_service, None, {})
+        controller.restore({"tournament_id": TOURNAMENT_ID})
+
+        return self.loop.run_until_complete(controller.record_victory(discord_id))
+
+    def test_indexed_match_is_reported_without_any_reads(self):
+        challonge_service = StubChallongeService([match(5, "open")], match(5, "open")["match"])
+
+        self.assertEqual(self.record_victory(challonge_service, "2"), (True, ""))
+        self.assertEqual(challonge_service.submitted, [("5", "12", "0-1")])
+        self.assertEqual(challonge_service.reads, [])
+
+    def test_player_missing_from_the_index_goes_through_the_full_checks(self):
+        challonge_service = StubChallongeService([match(5, "complete"), match(6, "open")], None)
+
+        self.assertEqual(self.record_victory(challonge_service, "1"), (True, ""))
+        self.assertEqual(challonge_service.submitted, [("6", "11", "1-0")])
+        self.assertEqual(challonge_service.reads, ["tournament", "participants", "matches"])
+
+    def test_player_without_an_open_match_is_told_so(self):
+        challonge_service = StubChallongeService([match(5, "complete")], None)
+
+        self.assertEqual(self.record_victory(challonge_service, "2"), (False, "NO_OPEN_MATCHES_FOR_PLAYER"))
+        self.assertEqual(challonge_service.submitted, [])
+
+
+class CreateTournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def create_tournament(self, tournament_pool: StubTournamentPool) -> tuple:
+        challonge_service = StubCreatingChallongeService()
+        controller = TournamentController(
+            TournamentIdGenerator(), challonge_service, None, {}, tournament_pool=tournament_pool)
+
+        return challonge_service, self.loop.run_until_complete(controller.create_tournament("2026-01-01T00:00:00Z"))
+
+    def test_empty_pool_falls_back_to_creating_a_tournament(self):
+        challonge_service, (tournament_data, error) = self.create_tournament(StubTournamentPool())
+
+        self.assertEqual(error, "")
+        self.assertEqual(tournament_data, {"tournament": {"url": challonge_service.created[0]}})
+
+    def test_failed_claim_falls_back_to_creating_a_tournament(self):
+        challonge_service, (tournament_data, error) = self.create_tournament(
+            StubTournamentPool(ChallongeUnavailableError(503)))
+
+        self.assertEqual(error, "")
+        self.assertEqual(len(challonge_service.created), 1)
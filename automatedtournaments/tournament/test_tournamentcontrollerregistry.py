@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+
+from automatedtournaments.testing.inmemoryuserdatabase import InMemoryUserDatabase
+from . import statejournal
+from .statejournal import StateJournal
+from .tournamentcontrollerregistry import DEFAULT_TOURNAMENT_KEY, TournamentControllerRegistry
+
+
+class TournamentControllerRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_journal = StateJournal(":memory:")
+
+    def tearDown(self):
+        self.state_journal.close()
+
+    def journal(self, tournament_key: str, *events: str) -> None:
+        self.state_journal.append(tournament_key, statejournal.TOURNAMENT_CREATED, {"tournament_id": tournament_key})
+
+        for event in events:
+            self.state_journal.append(tournament_key, event, {})
+
+    def new_registry(self, max_tournaments: int=256) -> TournamentControllerRegistry:
+        return TournamentControllerRegistry(
+            None, None, None, {}, max_tournaments=max_tournaments, state_journal=self.state_journal)
+
+    def test_unknown_key_resolves_to_the_default_tournament(self):
+        self.journal(DEFAULT_TOURNAMENT_KEY)
+        registry = self.new_registry()
+
+        self.assertIs(registry.resolve("server"), registry.get(DEFAULT_TOURNAMENT_KEY))
+        self.assertEqual(registry.tournament_keys(), [DEFAULT_TOURNAMENT_KEY])
+
+    def test_unknown_key_without_a_default_tournament_stays_detached(self):
+        registry = self.new_registry()
+
+        self.assertFalse(registry.resolve("server").is_active())
+        self.assertEqual(registry.tournament_keys(), [])
+
+    def test_key_resolves_to_its_own_tournament_until_it_finishes(self):
+        self.journal(DEFAULT_TOURNAMENT_KEY)
+        self.journal("running", statejournal.TOURNAMENT_STARTED)
+        self.journal("finished", statejournal.TOURNAMENT_STARTED, statejournal.TOURNAMENT_FINISHED)
+        registry = self.new_registry()
+
+        self.assertIs(registry.resolve("running"), registry.get("running"))
+        self.assertIs(registry.resolve("finished"), registry.get(DEFAULT_TOURNAMENT_KEY))
+
+    def test_finished_keys_are_evicted_when_their_slot_is_needed(self):
+        self.journal("running")
+        self.journal("finished", statejournal.TOURNAMENT_STARTED, statejournal.TOURNAMENT_FINISHED)
+        registry = self.new_registry(max_tournaments=2)
+
+        controller, error = registry.get_or_create("new")
+
+        self.assertTrue(controller)
+        self.assertEqual(error, "")
+        self.assertEqual(sorted(registry.tournament_keys()), ["new", "running"])
+        self.assertEqual(sorted(self.state_journal.replay()), ["running"])
+
+    def test_active_keys_are_not_evicted(self):
+        self.journal("first")
+        self.journal("second", statejournal.TOURNAMENT_STARTED)
+        registry = self.new_registry(max_tournaments=2)
+
+        self.assertEqual(registry.get_or_create("new"), (None, "TOURNAMENT_LIMIT_REACHED"))
+
+    def test_released_key_without_a_tournament_is_dropped(self):
+        registry = self.new_registry()
+        registry.get_or_create("server")
+
+        registry.release("server")
+
+        self.assertEqual(registry.tournament_keys(), [])
+
+    def test_destroyed_keys_are_dropped_on_replay(self):
+        self.journal("kept")
+        self.journal("destroyed", statejournal.TOURNAMENT_DESTROYED)
+
+        self.assertEqual(self.new_registry().tournament_keys(), ["kept"])
+        self.assertEqual(sorted(self.state_journal.replay()), ["kept"])
+
+    def test_invalidated_profile_is_read_again(self):
+        user_database = InMemoryUserDatabase({"1": {"challonge_username": "old"}})
+        registry = TournamentControllerRegistry(None, None, user_database, {})
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        try:
+            loop.run_until_complete(user_database.get_profile("1"))
+            user_database.members["1"]["challonge_username"] = "new"
+
+            registry.invalidate_profile("1")
+
+            self.assertEqual(loop.run_until_complete(user_database.get_profile("1")), ("new", ""))
+        finally:
+            loop.run_until_complete(user_database.close())
+            loop.close()
+            asyncio.set_event_loop(None)
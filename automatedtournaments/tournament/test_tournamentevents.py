@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+from . import statejournal, tournamentevents
+from .statejournal import StateJournal
+from .tournamentapp import TournamentApp
+from .tournamentcontrollerregistry import DEFAULT_TOURNAMENT_KEY, TournamentControllerRegistry
+from .tournamentevents import TournamentEventBus
+
+
+def drain(queue: asyncio.Queue) -> list:
+    events = []
+
+    while not queue.empty():
+        events.append(queue.get_nowait())
+
+    return events
+
+
+class TournamentEventBusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.bus = TournamentEventBus(history_size=4, queue_size=2)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def publish(self, count: int) -> list:
+        return [self.bus.publish(tournamentevents.MATCH_OPENED, {"match": number}) for number in range(count)]
+
+    def test_reconnect_replays_the_events_after_the_last_one_seen(self):
+        events = self.publish(3)
+
+        queue = self.bus.subscribe(events[0]["id"])
+
+        self.assertEqual(drain(queue), events[1:])
+
+    def test_new_subscriber_gets_no_history(self):
+        self.publish(3)
+
+        self.assertEqual(drain(self.bus.subscribe()), [])
+
+    def test_id_from_another_stream_replays_the_whole_history(self):
+        events = self.publish(2)
+        other_bus = TournamentEventBus()
+
+        # The same sequence number from a bus created before a restart must not hide this bus's early events.
+        stale_event = other_bus.publish(tournamentevents.MATCH_OPENED, {})
+        queue = self.bus.subscribe(stale_event["id"])
+
+        self.assertNotEqual(other_bus.epoch, self.bus.epoch)
+        self.assertEqual(drain(queue), events)
+
+    def test_subscriber_that_falls_behind_is_dropped(self):
+        queue = self.bus.subscribe()
+
+        self.publish(3)
+
+        self.assertEqual(drain(queue), [None])
+        self.assertEqual(self.bus.publish(tournamentevents.MATCH_OPENED, {})["id"], self.bus.epoch + "-4")
+        self.assertTrue(queue.empty())
+
+
+class EventStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.state_journal = StateJournal(":memory:")
+        self.state_journal.append(
+            DEFAULT_TOURNAMENT_KEY, statejournal.TOURNAMENT_CREATED, {"tournament_id": "tournament"})
+        self.registry = TournamentControllerRegistry(None, None, None, {}, state_journal=self.state_journal)
+
+        self.server = TestServer(TournamentApp(self.registry))
+        self.loop.run_until_complete(self.server.start_server())
+
+    def tearDown(self):
+        # Shutting down ends the open event streams, which closing the test server alone does not, and the extra pass of
+        # the loop lets their handlers return.
+        self.loop.run_until_complete(self.server.runner.shutdown())
+        self.loop.run_until_complete(self.server.close())
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.state_journal.close()
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    async def read_events(self, last_event_id: str, count: int) -> list:
+        lines = []
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                    self.server.make_url("/events"), headers={"Last-Event-ID": last_event_id}) as resp:
+                self.assertEqual(resp.headers["Content-Type"], "text/event-stream")
+
+                while len(lines) < count * 4:
+                    lines.append((await resp.content.readline()).decode("utf-8"))
+
+        return lines
+
+    def test_stream_replays_missed_events_in_event_stream_framing(self):
+        events = self.registry.get(DEFAULT_TOURNAMENT_KEY).events
+        first = events.publish(tournamentevents.MATCH_OPENED, {"match": 1})
+        second = events.publish(tournamentevents.MATCH_COMPLETED, {"match": 1})
+
+        lines = self.loop.run_until_complete(asyncio.wait_for(self.read_events(first["id"], 1), 5.0))
+
+        self.assertEqual(lines, [
+            "id: {}\n".format(second["id"]),
+            "event: match_completed\n",
+            'data: {"match": 1}\n',
+            "\n",
+        ])
+
+    def test_stream_of_an_unknown_tournament_is_refused(self):
+        async def get_status() -> int:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.server.make_url("/tournaments/unknown/events")) as resp:
+                    return resp.status
+
+        self.assertEqual(self.loop.run_until_complete(get_status()), 409)
@@ -0,0 +1,49 @@
+import unittest
+
+from .statejournal import StateJournal
+from .tournamentidgenerator import CHARS, TournamentIdGenerator, encode_base62
+
+
+# Draws the suffix characters from a fixed script, so a test can make two ids collide.
+class ScriptedRandom:
+
+    def __init__(self, script: str):
+        self._script = list(script)
+
+    def choice(self, _: str) -> str:
+        return self._script.pop(0)
+
+
+class TournamentIdGeneratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_journal = StateJournal(":memory:")
+
+    def tearDown(self):
+        self.state_journal.close()
+
+    def new_generator(self, suffixes: str) -> TournamentIdGenerator:
+        generator = TournamentIdGenerator(self.state_journal, clock=lambda: 1500000000.0)
+        generator._random = ScriptedRandom(suffixes)
+
+        return generator
+
+    def test_base62_encoding_is_fixed_width_and_ordered(self):
+        self.assertEqual(encode_base62(0, 3), "000")
+        self.assertEqual(encode_base62(61, 3), "00z")
+        self.assertEqual(encode_base62(62, 3), "010")
+        self.assertLess(encode_base62(1500000000000, 7), encode_base62(1500000000001, 7))
+
+    def test_id_is_a_timestamp_and_a_random_suffix(self):
+        tournament_id = self.new_generator("abcd").next_id()
+
+        self.assertEqual(tournament_id, encode_base62(1500000000000, 7) + "abcd")
+        self.assertTrue(all(char in CHARS for char in tournament_id))
+
+    def test_id_issued_before_a_restart_is_not_reissued(self):
+        first_id = self.new_generator("abcd").next_id()
+
+        second_id = self.new_generator("abcdabce").next_id()
+
+        self.assertNotEqual(first_id, second_id)
+        self.assertTrue(second_id.endswith("abce"))
@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+
+from .challongeservice import ChallongeUnavailableError
+from .statejournal import StateJournal
+from .tournamentidgenerator import TournamentIdGenerator
+from .tournamentpool import TournamentPool
+
+
+# Creates every tournament it is asked for, answers each update with the next scripted outcome, and records what was
+# created and destroyed.
+class StubChallongeService:
+
+    def __init__(self, *update_outcomes):
+        self.update_outcomes = list(update_outcomes)
+        self.created = []
+        self.destroyed = []
+
+    async def create_tournament(self, tournament_id: str, name: str, start_time: str, settings: dict) -> dict:
+        self.created.append(tournament_id)
+        return {"tournament": {"url": tournament_id}}
+
+    async def update_tournament(self, tournament_id: str, name: str, start_time: str) -> dict:
+        outcome = self.update_outcomes.pop(0)
+
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        return outcome
+
+    async def destroy_tournament(self, tournament_id: str) -> bool:
+        self.destroyed.append(tournament_id)
+        return True
+
+
+class TournamentPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.state_journal = StateJournal(":memory:")
+        self.tournament_pool = None
+
+    def tearDown(self):
+        self.tournament_pool.close()
+        self.state_journal.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def new_pool(self, challonge_service: StubChallongeService) -> TournamentPool:
+        self.tournament_pool = TournamentPool(
+            TournamentIdGenerator(self.state_journal), challonge_service, {}, size=2, state_journal=self.state_journal)
+        self.tournament_pool.refill()
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+        return self.tournament_pool
+
+    def claim(self, tournament_pool: TournamentPool) -> tuple:
+        return self.loop.run_until_complete(tournament_pool.claim("The Zealot Cup", "2026-01-01T00:00:00Z"))
+
+    def test_claimed_tournament_leaves_the_pool_and_is_replaced(self):
+        challonge_service = StubChallongeService({"tournament": {"name": "The Zealot Cup"}})
+        tournament_pool = self.new_pool(challonge_service)
+        pooled_ids = self.state_journal.pooled_tournaments()
+
+        tournament_id, tournament_data = self.claim(tournament_pool)
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+        self.assertEqual(tournament_id, pooled_ids[0])
+        self.assertEqual(tournament_data, {"tournament": {"name": "The Zealot Cup"}})
+        self.assertNotIn(tournament_id, self.state_journal.pooled_tournaments())
+        self.assertEqual(tournament_pool.ready_count(), 2)
+        self.assertEqual(len(challonge_service.created), 3)
+
+    def test_rejected_claim_deletes_the_pooled_tournament(self):
+        challonge_service = StubChallongeService({})
+        tournament_pool = self.new_pool(challonge_service)
+        pooled_id = self.state_journal.pooled_tournaments()[0]
+
+        self.assertEqual(self.claim(tournament_pool), ("", {}))
+        self.assertEqual(challonge_service.destroyed, [pooled_id])
+        self.assertNotIn(pooled_id, self.state_journal.pooled_tournaments())
+
+    def test_claim_that_may_not_have_landed_keeps_the_tournament_pooled(self):
+        challonge_service = StubChallongeService(ChallongeUnavailableError(503))
+        tournament_pool = self.new_pool(challonge_service)
+        pooled_ids = self.state_journal.pooled_tournaments()
+
+        with self.assertRaises(ChallongeUnavailableError):
+            self.claim(tournament_pool)
+
+        self.assertEqual(tournament_pool.ready_count(), 2)
+        self.assertEqual(self.state_journal.pooled_tournaments(), pooled_ids)
+        self.assertEqual(challonge_service.destroyed, [])
@@ -0,0 +1,57 @@
+import unittest
+
+from .ttlcache import TtlCache
+
+KEY = ("matches", "tournament")
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TtlCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TtlCache(self.clock)
+
+    def test_entry_expires_after_its_ttl(self):
+        self.cache.put(KEY, ["match"], 5.0)
+
+        self.clock.now = 4.9
+        self.assertEqual(self.cache.get(KEY), (True, ["match"]))
+
+        self.clock.now = 5.0
+        self.assertEqual(self.cache.get(KEY), (False, None))
+
+    def test_value_fetched_before_an_invalidation_is_not_stored(self):
+        generation = self.cache.generation(KEY)
+        self.cache.invalidate(KEY)
+
+        self.cache.put(KEY, ["stale match"], 5.0, generation)
+
+        self.assertEqual(self.cache.get(KEY), (False, None))
+
+    def test_value_fetched_after_an_invalidation_is_stored(self):
+        self.cache.put(KEY, ["old match"], 5.0)
+        self.cache.invalidate(KEY)
+
+        self.cache.put(KEY, ["new match"], 5.0, self.cache.generation(KEY))
+
+        self.assertEqual(self.cache.get(KEY), (True, ["new match"]))
+
+    def test_stats_are_kept_per_resource(self):
+        self.cache.put(KEY, ["match"], 5.0)
+        self.cache.get(KEY)
+        self.cache.get(("participants", "tournament"))
+        self.cache.invalidate(KEY)
+
+        self.assertEqual(self.cache.stats(), {
+            "matches": {"hits": 1, "misses": 0, "invalidations": 1},
+            "participants": {"hits": 0, "misses": 1, "invalidations": 0},
+        })
@@ -1,33 +1,105 @@
-from aiohttp.web import Application, Response, Request, json_response, json_response
+import asyncio
+import json
+from typing import List
 
+from aiohttp.web import Application, Response, Request, StreamResponse, json_response
+
+from automatedtournaments.aiohttpcompat import middleware
+from automatedtournaments.metrics import instrument_app
+from .challongeservice import UPSTREAM_FAILURES
+from .requestscheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
 from .tournamentcontroller import TournamentController
+from .tournamentcontrollerregistry import DEFAULT_TOURNAMENT_KEY, TournamentControllerRegistry
+
+PRIORITY_HEADER = "X-Request-Priority"
+
+EVENT_STREAM_KEEPALIVE = 15.0
+
+
+@middleware
+async def upstream_unavailable_middleware(request: Request, handler) -> Response:
+    try:
+        return await handler(request)
+    except UPSTREAM_FAILURES:
+        return json_response(data={"error": "UPSTREAM_UNAVAILABLE"}, status=503)
+
+
+def request_priority(request: Request) -> int:
+    if request.headers.get(PRIORITY_HEADER, "") == "background":
+        return PRIORITY_BACKGROUND
+
+    return PRIORITY_INTERACTIVE
+
+
+def tournament_key(request: Request) -> str:
+    return request.match_info.get("tournament_key", DEFAULT_TOURNAMENT_KEY)
+
+
+async def roster(request: Request) -> List[str]:
+
+    if "application/json" in request.content_type:
+        request_data = await request.json()
+    else:
+        request_data = {}
+
+    discord_ids = request_data.get("discord_ids", []) if isinstance(request_data, dict) else []
+
+    return [str(discord_id) for discord_id in discord_ids if discord_id] if isinstance(discord_ids, list) else []
 
 
 class TournamentApp(Application):
 
-    def __init__(self, tournament_controller: TournamentController):
-        super().__init__()
+    def __init__(
+            self,
+            tournament_controllers: TournamentControllerRegistry,
+            event_stream_keepalive: float=EVENT_STREAM_KEEPALIVE):
+        super().__init__(middlewares=[upstream_unavailable_middleware])
+        instrument_app(self)
+
+        self._controllers = tournament_controllers
+        self._event_stream_keepalive = event_stream_keepalive
+
+        self.router.add_get("/tournaments", self.tournaments)
+        self.router.add_post("/profiles/{discord_id}/invalidate", self.invalidate_profile)
+
+        # The unprefixed routes act on the default tournament key.
+        for prefix in ("", "/tournaments/{tournament_key}"):
+            self.router.add_get(prefix + "/", self.index)
+            self.router.add_get(prefix + "/matches", self.matches)
+            self.router.add_get(prefix + "/participants", self.participants)
+            self.router.add_get(prefix + "/events", self.events)
+
+            self.router.add_post(prefix + "/create", self.create)
+            self.router.add_post(prefix + "/destroy", self.destroy)
+            self.router.add_post(prefix + "/start", self.start)
+            self.router.add_post(prefix + "/finish", self.finish)
+
+            self.router.add_post(prefix + "/signup/{discord_id}", self.sign_up)
+            self.router.add_post(prefix + "/forfeit/{discord_id}", self.forfeit)
+            self.router.add_post(prefix + "/checkin/{discord_id}", self.check_in)
 
-        self._controller = tournament_controller
+            self.router.add_post(prefix + "/signup", self.bulk_sign_up)
+            self.router.add_post(prefix + "/checkin", self.bulk_check_in)
 
-        self.router.add_get("/", self.index)
-        self.router.add_get("/matches", self.matches)
-        self.router.add_get("/participants", self.participants)
+            self.router.add_post(prefix + "/victory/{discord_id}", self.record_victory)
+            self.router.add_post(prefix + "/loss/{discord_id}", self.record_loss)
 
-        self.router.add_post("/create", self.create)
-        self.router.add_post("/destroy", self.destroy)
-        self.router.add_post("/start", self.start)
-        self.router.add_post("/finish", self.finish)
+        self.on_startup.append(self._fill_tournament_pool)
+        self.on_startup.append(self._resume_mutations)
+        self.on_shutdown.append(self._close_event_streams)
+        self.on_shutdown.append(self._close_tournament_pool)
+        self.on_shutdown.append(self._close_mutations)
 
-        self.router.add_post("/signup/{discord_id}", self.sign_up)
-        self.router.add_post("/forfeit/{discord_id}", self.forfeit)
-        self.router.add_post("/checkin/{discord_id}", self.check_in)
+    async def tournaments(self, _: Request) -> Response:
+        return json_response(data={"tournaments": self._controllers.tournament_keys()})
 
-        self.router.add_post("/victory/{discord_id}", self.record_victory)
-        self.router.add_post("/loss/{discord_id}", self.record_loss)
+    async def invalidate_profile(self, request: Request) -> Response:
+        self._controllers.invalidate_profile(request.match_info["discord_id"])
 
-    async def index(self, _: Request) -> Response:
-        result, error = await self._controller.get_active_tournament()
+        return json_response()
+
+    async def index(self, request: Request) -> Response:
+        result, error = await self._controller(request).get_active_tournament(request_priority(request))
 
         if result:
             return json_response(result)
@@ -43,31 +115,40 @@ class TournamentApp(Application):
 
         start_time = request_data.get("start_time", "") if request_data else ""
 
-        status, error = await self._controller.create_tournament(start_time)
+        controller, error = self._controllers.get_or_create(tournament_key(request))
 
-        if status:
-            return json_response()
+        if not controller:
+            return json_response(data={"error": error}, status=409)
+
+        try:
+            tournament_data, error = await controller.create_tournament(start_time)
+        finally:
+            # A key is only held on to for a tournament, so a failed create on a new key leaves no trace.
+            self._controllers.release(tournament_key(request))
+
+        if tournament_data:
+            return json_response(data=tournament_data)
 
         return json_response(data={"error": error}, status=409)
 
-    async def destroy(self, _: Request) -> Response:
-        status, error = await self._controller.destroy_tournament()
+    async def destroy(self, request: Request) -> Response:
+        status, error = await self._controller(request).destroy_tournament()
 
         if status:
             return json_response()
 
         return json_response(data={"error": error}, status=409)
 
-    async def start(self, _: Request) -> Response:
-        status, error = await self._controller.start_tournament()
+    async def start(self, request: Request) -> Response:
+        status, error = await self._controller(request).start_tournament()
 
         if status:
             return json_response()
 
         return json_response(data={"error": error}, status=409)
 
-    async def finish(self, _: Request) -> Response:
-        status, error = await self._controller.finish_tournament()
+    async def finish(self, request: Request) -> Response:
+        status, error = await self._controller(request).finish_tournament()
 
         if status:
             return json_response()
@@ -75,7 +156,7 @@ class TournamentApp(Application):
         return json_response(data={"error": error}, status=409)
 
     async def sign_up(self, request: Request) -> Response:
-        status, error = await self._controller.sign_up_player(request.match_info.get("discord_id", ""))
+        status, error = await self._resolve(request).sign_up_player(request.match_info.get("discord_id", ""))
 
         if status:
             return json_response()
@@ -83,15 +164,31 @@ class TournamentApp(Application):
         return json_response(data={"error": error}, status=409)
 
     async def check_in(self, request: Request) -> Response:
-        status, error = await self._controller.check_in_player(request.match_info.get("discord_id", ""))
+        status, error = await self._resolve(request).check_in_player(request.match_info.get("discord_id", ""))
 
         if status:
             return json_response()
 
         return json_response(data={"error": error}, status=409)
 
+    async def bulk_sign_up(self, request: Request) -> Response:
+        result, error = await self._controller(request).bulk_sign_up_players(await roster(request))
+
+        if result:
+            return json_response(data=result)
+
+        return json_response(data={"error": error}, status=409)
+
+    async def bulk_check_in(self, request: Request) -> Response:
+        result, error = await self._controller(request).bulk_check_in_players(await roster(request))
+
+        if result:
+            return json_response(data=result)
+
+        return json_response(data={"error": error}, status=409)
+
     async def forfeit(self, request: Request) -> Response:
-        status, error = await self._controller.forfeit_player(request.match_info.get("discord_id", ""))
+        status, error = await self._resolve(request).forfeit_player(request.match_info.get("discord_id", ""))
 
         if status:
             return json_response()
@@ -99,7 +196,7 @@ class TournamentApp(Application):
         return json_response(data={"error": error}, status=409)
 
     async def record_victory(self, request: Request) -> Response:
-        status, error = await self._controller.record_victory(request.match_info.get("discord_id", ""))
+        status, error = await self._resolve(request).record_victory(request.match_info.get("discord_id", ""))
 
         if status:
             return json_response()
@@ -107,25 +204,83 @@ class TournamentApp(Application):
         return json_response(data={"error": error}, status=409)
 
     async def record_loss(self, request: Request) -> Response:
-        status, error = await self._controller.record_loss(request.match_info.get("discord_id", ""))
+        status, error = await self._resolve(request).record_loss(request.match_info.get("discord_id", ""))
 
         if status:
             return json_response()
 
         return json_response(data={"error": error}, status=409)
 
-    async def matches(self, _: Request) -> Response:
-        result, error = await self._controller.get_matches_in_tournament()
+    async def matches(self, request: Request) -> Response:
+        result, error = await self._controller(request).get_matches_in_tournament(request_priority(request))
 
         if result:
             return json_response(data=result)
 
         return json_response(data={"error": error}, status=409)
 
-    async def participants(self, _: Request) -> Response:
-        result, error = await self._controller.get_participants_in_tournament()
+    async def participants(self, request: Request) -> Response:
+        result, error = await self._controller(request).get_participants_in_tournament(request_priority(request))
 
         if result:
             return json_response(data=result)
 
         return json_response(data={"error": error}, status=409)
+
+    async def events(self, request: Request) -> StreamResponse:
+        if tournament_key(request) not in self._controllers.tournament_keys():
+            return json_response(data={"error": "TOURNAMENT_NOT_CREATED"}, status=409)
+
+        controller = self._controllers.get(tournament_key(request))
+
+        response = StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        queue = controller.events.subscribe(request.headers.get("Last-Event-ID", ""))
+
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self._event_stream_keepalive)
+                except asyncio.TimeoutError:
+                    await response.write(b": keepalive\n\n")
+                    continue
+
+                # The bus ends the queue with None when this subscriber falls too far behind or the app shuts down.
+                if event is None:
+                    break
+
+                await response.write("id: {}\nevent: {}\ndata: {}\n\n".format(
+                    event["id"], event["type"], json.dumps(event["data"])).encode("utf-8"))
+        except ConnectionResetError:
+            pass
+        finally:
+            controller.events.unsubscribe(queue)
+
+        return response
+
+    def _controller(self, request: Request) -> TournamentController:
+        return self._controllers.get(tournament_key(request))
+
+    def _resolve(self, request: Request) -> TournamentController:
+        return self._controllers.resolve(tournament_key(request))
+
+    async def _fill_tournament_pool(self, _: Application) -> None:
+        if self._controllers.tournament_pool:
+            self._controllers.tournament_pool.refill()
+
+    async def _close_tournament_pool(self, _: Application) -> None:
+        if self._controllers.tournament_pool:
+            self._controllers.tournament_pool.close()
+
+    async def _resume_mutations(self, _: Application) -> None:
+        for key in self._controllers.tournament_keys():
+            self._controllers.get(key).resume_mutations()
+
+    async def _close_mutations(self, _: Application) -> None:
+        for key in self._controllers.tournament_keys():
+            self._controllers.get(key).close_mutations()
+
+    async def _close_event_streams(self, _: Application) -> None:
+        for key in self._controllers.tournament_keys():
+            self._controllers.get(key).events.close_subscribers()
@@ -1,9 +1,23 @@
-from typing import Tuple
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import List, Tuple
 
 from .tournamentidgenerator import TournamentIdGenerator
-from .challongeservice import ChallongeService
+from .tournamentstate import TournamentState
+from .challongeservice import ChallongeService, UPSTREAM_FAILURES
+from .requestscheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from . import mutationqueue, statejournal, tournamentevents
+from .mutationqueue import MutationQueue, MutationsPendingError
+from .statejournal import StateJournal
+from .tournamentevents import TournamentEventBus
+from .tournamentpool import TournamentPool
 from automatedtournaments.db import UserDatabase
 
+logger = logging.getLogger(__name__)
+
+MATCH_STATE_ORDER = {"pending": 0, "open": 1, "complete": 2}
+
 
 class TournamentController:
 
@@ -12,145 +26,447 @@ class TournamentController:
             tournament_id_generator: TournamentIdGenerator,
             challonge_service: ChallongeService,
             user_database: UserDatabase,
-            default_tournament_settings: dict):
+            default_tournament_settings: dict,
+            event_bus: TournamentEventBus=None,
+            state_journal: StateJournal=None,
+            tournament_key: str="",
+            max_concurrent_check_ins: int=8,
+            tournament_pool: TournamentPool=None,
+            write_behind: bool=False):
         self._challonge_service = challonge_service
         self._tournament_id_generator = tournament_id_generator
         self._user_database = user_database
         self._default_tournament_settings = default_tournament_settings
 
+        self.events = event_bus if event_bus is not None else TournamentEventBus()
+
+        self._state_journal = state_journal
+        self._tournament_key = tournament_key
+        self._max_concurrent_check_ins = max_concurrent_check_ins
+        self._tournament_pool = tournament_pool
+
+        # Acknowledging sign-ups and check-ins before Challonge has them is only safe when they are journaled. Intents
+        # journaled before write-behind was switched off are still applied.
+        self._write_behind = bool(write_behind and state_journal)
+
+        if state_journal and (write_behind or state_journal.intents(tournament_key)):
+            self._mutation_queue = MutationQueue(
+                challonge_service,
+                state_journal,
+                tournament_key,
+                self._report_failed_intent,
+                max_concurrent_check_ins=max_concurrent_check_ins)
+        else:
+            self._mutation_queue = None
+
         self._tournament_id = None
+        self._status = ""
+        self._creating = False
+        self._match_states = {}
+
+    def restore(self, journaled_state: dict) -> None:
+        self._tournament_id = journaled_state.get("tournament_id", None)
+        self._status = journaled_state.get("status", "")
 
-    async def get_active_tournament(self) -> Tuple[dict, str]:
+    def is_active(self) -> bool:
+        if self._creating or (self._mutation_queue and self._mutation_queue.pending_count()):
+            return True
+
+        return bool(self._tournament_id) and self._status in statejournal.ACTIVE_STATUSES
+
+    def close(self) -> None:
+        self.events.close_subscribers()
+        self.close_mutations()
+
+    def resume_mutations(self) -> None:
+        if self._mutation_queue:
+            self._mutation_queue.resume()
+
+    def close_mutations(self) -> None:
+        if self._mutation_queue:
+            self._mutation_queue.close()
+
+    async def get_active_tournament(self, priority: int=PRIORITY_INTERACTIVE) -> Tuple[dict, str]:
         if not self._tournament_id:
             return {}, "TOURNAMENT_NOT_CREATED"
 
-        result = await self._challonge_service.get_tournament_data(self._tournament_id)
+        result = await self._challonge_service.get_tournament_data(self._tournament_id, priority)
 
         if not result:
             return {}, "UNKNOWN_ERROR"
 
         return result, ""
 
-    async def create_tournament(self, start_time: str) -> Tuple[bool, str]:
+    async def create_tournament(self, start_time: str) -> Tuple[dict, str]:
+        # The registry must not let go of the key while its new tournament is on the way.
+        self._creating = True
+
+        try:
+            return await self._create_tournament(start_time)
+        finally:
+            self._creating = False
+
+    async def _create_tournament(self, start_time: str) -> Tuple[dict, str]:
         if self._tournament_id:
-            if (await self._challonge_service.does_tournament_exist(self._tournament_id) and
-                    not await self._challonge_service.has_tournament_finished(self._tournament_id)):
-                return False, "TOURNAMENT_ONGOING"
+            state = await self._get_tournament_state()
 
-        for i in range(10):
-            self._tournament_id = self._tournament_id_generator.next_id()
+            if state.exists and not state.finished:
+                return {}, "TOURNAMENT_ONGOING"
 
-            if not await self._challonge_service.does_tournament_exist(self._tournament_id):
-                break
-        else:
-            return False, "TOURNAMENT_IDS_EXHAUSTED"
+            # Players from the previous tournament are the most likely to sign up to the next one.
+            if state.exists:
+                self._run_in_background(self._warm_profile_cache(self._tournament_id))
 
         tournament_name = self._tournament_id_generator.next_name()
+        self._match_states = {}
 
-        await self._challonge_service.create_tournament(
-            self._tournament_id, tournament_name, start_time, self._default_tournament_settings)
+        tournament_id, tournament_data = "", {}
+        if self._tournament_pool is not None:
+            # The pool only saves time, so any failure to claim from it falls back to creating a tournament.
+            try:
+                tournament_id, tournament_data = await self._tournament_pool.claim(tournament_name, start_time)
+            except UPSTREAM_FAILURES as error:
+                logger.warning("Failed to claim a pooled tournament: %r", error)
 
-        return True, ""
+        if not tournament_data:
+            tournament_id = self._tournament_id_generator.next_id()
+            tournament_data = await self._challonge_service.create_tournament(
+                tournament_id, tournament_name, start_time, self._default_tournament_settings)
+
+        # Issued ids are unique locally, so a rejected create is the only sign that someone else holds the id. That
+        # costs one probe and, if the id really is taken, one retry with a fresh id.
+        if not tournament_data and await self._challonge_service.does_tournament_exist(tournament_id):
+            tournament_id = self._tournament_id_generator.next_id()
+            tournament_data = await self._challonge_service.create_tournament(
+                tournament_id, tournament_name, start_time, self._default_tournament_settings)
+
+        if not tournament_data:
+            return {}, "UPSTREAM_ERROR"
+
+        self._tournament_id = tournament_id
+
+        self._record_state(
+            statejournal.TOURNAMENT_CREATED,
+            {"tournament_id": self._tournament_id, "name": tournament_name, "start_time": start_time})
+
+        return tournament_data, ""
 
     async def destroy_tournament(self) -> Tuple[bool, str]:
         if not self._tournament_id:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        await self._challonge_service.destroy_tournament(self._tournament_id)
+        if not await self._challonge_service.destroy_tournament(self._tournament_id):
+            return False, "UPSTREAM_ERROR"
+
+        if self._mutation_queue:
+            self._mutation_queue.discard(self._tournament_id)
+
+        self._record_state(statejournal.TOURNAMENT_DESTROYED, {})
 
         return True, ""
 
     async def start_tournament(self) -> Tuple[bool, str]:
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
+        state = await self._get_tournament_state()
+
+        if not state.exists:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        if await self._challonge_service.has_tournament_started(self._tournament_id):
+        if state.started:
             return False, "TOURNAMENT_STARTED"
 
-        await self._challonge_service.start_tournament(self._tournament_id)
+        # Queued players have already been told they are in, so they must reach Challonge before the bracket is drawn.
+        if self._mutation_queue:
+            try:
+                await self._mutation_queue.flush()
+            except MutationsPendingError:
+                return False, "UPSTREAM_UNAVAILABLE"
+
+        if not await self._challonge_service.start_tournament(self._tournament_id):
+            return False, "UPSTREAM_ERROR"
+
+        self._record_state(statejournal.TOURNAMENT_STARTED, {})
+        self.events.publish(tournamentevents.TOURNAMENT_STARTED, {"tournament_id": self._tournament_id})
+        self._run_in_background(self._refresh_matches(self._tournament_id))
 
         return True, ""
 
     async def finish_tournament(self) -> Tuple[bool, str]:
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
+        state = await self._get_tournament_state()
+
+        if not state.exists:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        if not await self._challonge_service.has_tournament_started(self._tournament_id):
+        if not state.started:
             return False, "TOURNAMENT_NOT_STARTED"
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
+        if state.finished:
             return False, "TOURNAMENT_FINISHED"
 
-        await self._challonge_service.finish_tournament(self._tournament_id)
+        if not await self._challonge_service.finish_tournament(self._tournament_id):
+            return False, "UPSTREAM_ERROR"
+
+        self._record_state(statejournal.TOURNAMENT_FINISHED, {})
+        self.events.publish(tournamentevents.TOURNAMENT_FINISHED, {"tournament_id": self._tournament_id})
 
         return True, ""
 
     async def sign_up_player(self, discord_id: str) -> Tuple[bool, str]:
-        challonge_id = await self._user_database.get_challonge_id(discord_id)
-        
+        challonge_id, name = await self._user_database.get_profile(discord_id)
+
         if not challonge_id:
             return False, "UNREGISTERED_USER"
 
-        name = await self._user_database.get_nickname(discord_id)
-
         if not name:
             name = challonge_id
 
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
+        state = await self._get_tournament_state()
+
+        if not state.exists:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        if await self._challonge_service.has_tournament_started(self._tournament_id):
+        if state.started:
             return False, "TOURNAMENT_STARTED"
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
+        if state.finished:
             return False, "TOURNAMENT_FINISHED"
 
-        if await self._challonge_service.is_user_signed_up(self._tournament_id, discord_id):
+        if await self._is_user_signed_up(discord_id):
             return False, "USER_SIGNED_UP"
-        
-        await self._challonge_service.sign_up_player(self._tournament_id, discord_id, challonge_id, name)
+
+        if self._write_behind:
+            self._mutation_queue.enqueue(
+                self._tournament_id, mutationqueue.SIGN_UP, discord_id, {"challonge_id": challonge_id, "name": name})
+        elif not await self._challonge_service.sign_up_player(self._tournament_id, discord_id, challonge_id, name):
+            return False, "UPSTREAM_ERROR"
+
+        self.events.publish(
+            tournamentevents.PARTICIPANT_SIGNED_UP,
+            {"tournament_id": self._tournament_id, "discord_id": discord_id, "name": name})
 
         return True, ""
 
+    async def bulk_sign_up_players(self, discord_ids: List[str]) -> Tuple[dict, str]:
+        state = await self._get_tournament_state()
+
+        if not state.exists:
+            return {}, "TOURNAMENT_NOT_CREATED"
+
+        if state.started:
+            return {}, "TOURNAMENT_STARTED"
+
+        if state.finished:
+            return {}, "TOURNAMENT_FINISHED"
+
+        profiles = await self._user_database.get_profiles(discord_ids)
+        participants = await self._challonge_service.get_participants_in_tournament(self._tournament_id)
+        signed_up_discord_ids = set(participant["participant"]["discord_id"] for participant in participants)
+
+        errors = {}
+        new_players = []
+
+        for discord_id in OrderedDict.fromkeys(discord_ids):
+            challonge_id, name = profiles.get(discord_id, ("", ""))
+
+            if not challonge_id:
+                errors[discord_id] = "UNREGISTERED_USER"
+            elif discord_id in signed_up_discord_ids:
+                errors[discord_id] = "USER_SIGNED_UP"
+            else:
+                new_players.append((discord_id, challonge_id, name if name else challonge_id))
+
+        if new_players:
+            added_discord_ids, unknown_discord_ids = await self._challonge_service.bulk_sign_up_players(
+                self._tournament_id, new_players)
+            added_discord_ids = set(added_discord_ids)
+
+            # Players whose response was lost may well have been added, which only the participant list can tell.
+            if unknown_discord_ids:
+                try:
+                    participants = await self._challonge_service.get_participants_in_tournament(self._tournament_id)
+                except UPSTREAM_FAILURES:
+                    participants = []
+
+                added_discord_ids.update(
+                    participant["participant"]["discord_id"]
+                    for participant
+                    in participants
+                    if participant["participant"]["discord_id"] in unknown_discord_ids)
+
+            for discord_id, _, name in new_players:
+                if discord_id in unknown_discord_ids and discord_id not in added_discord_ids:
+                    errors[discord_id] = "UPSTREAM_UNAVAILABLE"
+                    continue
+
+                if discord_id not in added_discord_ids:
+                    errors[discord_id] = "UPSTREAM_ERROR"
+                    continue
+
+                self.events.publish(
+                    tournamentevents.PARTICIPANT_SIGNED_UP,
+                    {"tournament_id": self._tournament_id, "discord_id": discord_id, "name": name})
+
+        return self._bulk_results(discord_ids, errors), ""
+
+    async def bulk_check_in_players(self, discord_ids: List[str]) -> Tuple[dict, str]:
+        state = await self._get_tournament_state()
+
+        if not state.exists:
+            return {}, "TOURNAMENT_NOT_CREATED"
+
+        if state.finished:
+            return {}, "TOURNAMENT_FINISHED"
+
+        participants = await self._challonge_service.get_participants_in_tournament(self._tournament_id)
+        participants_by_discord_id = dict(
+            (participant["participant"]["discord_id"], participant["participant"]) for participant in participants)
+
+        errors = {}
+        to_check_in = []
+
+        for discord_id in OrderedDict.fromkeys(discord_ids):
+            participant = participants_by_discord_id.get(discord_id, None)
+
+            if not participant:
+                errors[discord_id] = "USER_NOT_SIGNED_UP"
+            elif participant.get("checked_in", False):
+                errors[discord_id] = "USER_CHECKED_IN"
+            else:
+                to_check_in.append(discord_id)
+
+        semaphore = asyncio.Semaphore(self._max_concurrent_check_ins)
+
+        async def check_in(discord_id: str) -> bool:
+            async with semaphore:
+                return await self._challonge_service.check_in_player(self._tournament_id, discord_id)
+
+        results = await asyncio.gather(*(check_in(discord_id) for discord_id in to_check_in), return_exceptions=True)
+
+        for discord_id, result in zip(to_check_in, results):
+            if isinstance(result, UPSTREAM_FAILURES):
+                errors[discord_id] = "UPSTREAM_UNAVAILABLE"
+            elif isinstance(result, BaseException):
+                raise result
+            elif not result:
+                errors[discord_id] = "UPSTREAM_ERROR"
+
+        return self._bulk_results(discord_ids, errors), ""
+
     async def forfeit_player(self, discord_id: str) -> Tuple[bool, str]:
+        state = await self._get_tournament_state()
 
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
+        if not state.exists:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
+        if state.finished:
             return False, "TOURNAMENT_FINISHED"
 
+        # A queued sign-up or check-in applied after the forfeit would put the player back in, so it goes first.
+        if self._mutation_queue and (
+                self._mutation_queue.is_pending(self._tournament_id, mutationqueue.SIGN_UP, discord_id) or
+                self._mutation_queue.is_pending(self._tournament_id, mutationqueue.CHECK_IN, discord_id)):
+            try:
+                await self._mutation_queue.flush()
+            except MutationsPendingError:
+                return False, "UPSTREAM_UNAVAILABLE"
+
         if not await self._challonge_service.is_user_signed_up(self._tournament_id, discord_id):
             return False, "USER_NOT_SIGNED_UP"
 
-        await self._challonge_service.forfeit_player(self._tournament_id, discord_id)
+        if not await self._challonge_service.forfeit_player(self._tournament_id, discord_id):
+            return False, "UPSTREAM_ERROR"
+
+        if state.started:
+            self._run_in_background(self._refresh_matches(self._tournament_id))
 
         return True, ""
 
     async def check_in_player(self, discord_id: str) -> Tuple[bool, str]:
+        state = await self._get_tournament_state()
 
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
+        if not state.exists:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
+        if state.finished:
             return False, "TOURNAMENT_FINISHED"
 
-        if not await self._challonge_service.is_user_signed_up(self._tournament_id, discord_id):
+        if not await self._is_user_signed_up(discord_id):
             return False, "USER_NOT_SIGNED_UP"
 
-        if await self._challonge_service.is_user_checked_in(self._tournament_id, discord_id):
+        if await self._is_user_checked_in(discord_id):
             return False, "USER_CHECKED_IN"
 
-        await self._challonge_service.check_in_player(self._tournament_id, discord_id)
+        if self._write_behind:
+            self._mutation_queue.enqueue(self._tournament_id, mutationqueue.CHECK_IN, discord_id, {})
+        elif not await self._challonge_service.check_in_player(self._tournament_id, discord_id):
+            return False, "UPSTREAM_ERROR"
 
         return True, ""
 
     async def record_victory(self, discord_id: str) -> Tuple[bool, str]:
+        return await self._record_result(discord_id, True)
+
+    async def record_loss(self, discord_id: str) -> Tuple[bool, str]:
+        return await self._record_result(discord_id, False)
 
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
+    async def get_matches_in_tournament(self, priority: int=PRIORITY_INTERACTIVE) -> Tuple[dict, str]:
+        state = await self._get_tournament_state(priority)
+
+        if not state.exists:
             return False, "TOURNAMENT_NOT_CREATED"
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
+        if not state.started:
+            return False, "TOURNAMENT_NOT_STARTED"
+
+        if state.finished:
+            return False, "TOURNAMENT_FINISHED"
+
+        matches = await self._challonge_service.get_matches_in_tournament(self._tournament_id, priority)
+        self._publish_match_changes(self._tournament_id, matches)
+
+        return {"matches": matches}, ""
+
+    async def get_participants_in_tournament(self, priority: int=PRIORITY_INTERACTIVE) -> Tuple[dict, str]:
+        state = await self._get_tournament_state(priority)
+
+        if not state.exists:
+            return False, "TOURNAMENT_NOT_CREATED"
+
+        participants = await self._challonge_service.get_participants_in_tournament(self._tournament_id, priority)
+        return {"participants": participants}, ""
+
+    async def _get_tournament_state(self, priority: int=PRIORITY_INTERACTIVE) -> TournamentState:
+        if not self._tournament_id:
+            return TournamentState({})
+
+        return await self._challonge_service.get_tournament_state(self._tournament_id, priority)
+
+    async def _warm_profile_cache(self, tournament_id: str) -> None:
+        participants = await self._challonge_service.get_participants_in_tournament(
+            tournament_id, PRIORITY_BACKGROUND)
+
+        await self._user_database.get_profiles(
+            participant["participant"]["discord_id"]
+            for participant
+            in participants
+            if participant["participant"]["discord_id"])
+
+    async def _record_result(self, discord_id: str, won: bool) -> Tuple[bool, str]:
+        # A player's indexed open match is reported with the PUT alone. The index is rebuilt from every matches fetch
+        # and drops a match as soon as any result for it goes through, so it is never behind the cached matches. Only a
+        # match completed on Challonge directly, which then accepts the new score, stays indexed until it expires.
+        if self._tournament_id:
+            match = self._challonge_service.get_indexed_open_match(self._tournament_id, discord_id)
+
+            if match and await self._submit_result(match, discord_id, won):
+                self._run_in_background(self._refresh_matches(self._tournament_id))
+                return True, ""
+
+        state = await self._get_tournament_state()
+
+        if not state.exists:
+            return False, "TOURNAMENT_NOT_CREATED"
+
+        if state.finished:
             return False, "TOURNAMENT_FINISHED"
 
         if not await self._challonge_service.is_user_signed_up(self._tournament_id, discord_id):
@@ -161,72 +477,105 @@ class TournamentController:
         if not open_matches:
             return False, "NO_OPEN_MATCHES_FOR_PLAYER"
 
-        match = open_matches[0]["match"]
+        if not await self._submit_result(open_matches[0]["match"], discord_id, won):
+            return False, "UPSTREAM_ERROR"
 
-        if match.get("player1_discord_id", "") == discord_id:
+        self._run_in_background(self._refresh_matches(self._tournament_id))
+
+        return True, ""
+
+    async def _submit_result(self, match: dict, discord_id: str, won: bool) -> bool:
+        player1_won = (match.get("player1_discord_id", "") == discord_id) == won
+
+        if player1_won:
             score = "1-0"
             winner_id = str(match["player1_id"])
         else:
             score = "0-1"
             winner_id = str(match["player2_id"])
 
-        await self._challonge_service.submit_match_result(
+        return await self._challonge_service.submit_match_result(
             self._tournament_id,
             str(match["id"]),
             winner_id,
             score)
 
-        return True, ""
+    @staticmethod
+    def _bulk_results(discord_ids: List[str], errors: dict) -> dict:
+        results = {}
 
-    async def record_loss(self, discord_id: str) -> Tuple[bool, str]:
+        for discord_id in discord_ids:
+            if discord_id in errors:
+                results[discord_id] = {"success": False, "error": errors[discord_id]}
+            else:
+                results[discord_id] = {"success": True}
 
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
-            return False, "TOURNAMENT_NOT_CREATED"
+        return {"results": results}
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
-            return False, "TOURNAMENT_FINISHED"
+    async def _is_user_signed_up(self, discord_id: str) -> bool:
+        if self._mutation_queue and self._mutation_queue.is_pending(
+                self._tournament_id, mutationqueue.SIGN_UP, discord_id):
+            return True
 
-        if not await self._challonge_service.is_user_signed_up(self._tournament_id, discord_id):
-            return False, "USER_NOT_SIGNED_UP"
+        return await self._challonge_service.is_user_signed_up(self._tournament_id, discord_id)
 
-        open_matches = await self._challonge_service.open_matches_for_player(self._tournament_id, discord_id)
+    async def _is_user_checked_in(self, discord_id: str) -> bool:
+        if self._mutation_queue and self._mutation_queue.is_pending(
+                self._tournament_id, mutationqueue.CHECK_IN, discord_id):
+            return True
 
-        if not open_matches:
-            return False, "NO_OPEN_MATCHES_FOR_PLAYER"
+        return await self._challonge_service.is_user_checked_in(self._tournament_id, discord_id)
 
-        match = open_matches[0]["match"]
+    def _report_failed_intent(self, intent: dict, error: str) -> None:
+        self.events.publish(
+            tournamentevents.INTENT_FAILED,
+            {
+                "tournament_id": intent["tournament_id"],
+                "discord_id": intent["discord_id"],
+                "action": intent["action"],
+                "error": error,
+            })
 
-        if match.get("player1_discord_id", "") == discord_id:
-            score = "0-1"
-            winner_id = str(match["player2_id"])
-        else:
-            score = "1-0"
-            winner_id = str(match["player1_id"])
+    def _record_state(self, event: str, data: dict) -> None:
+        self._status = statejournal.TOURNAMENT_STATUSES.get(event, self._status)
 
-        await self._challonge_service.submit_match_result(
-            self._tournament_id,
-            str(match["id"]),
-            winner_id,
-            score)
+        if self._state_journal:
+            self._state_journal.append(self._tournament_key, event, data)
 
-        return True, ""
+    @staticmethod
+    def _run_in_background(coroutine) -> None:
+        asyncio.ensure_future(coroutine).add_done_callback(TournamentController._report_background_failure)
 
-    async def get_matches_in_tournament(self) -> Tuple[dict, str]:
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
-            return False, "TOURNAMENT_NOT_CREATED"
+    @staticmethod
+    def _report_background_failure(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background tournament task failed", exc_info=task.exception())
 
-        if not await self._challonge_service.has_tournament_started(self._tournament_id):
-            return False, "TOURNAMENT_NOT_STARTED"
+    async def _refresh_matches(self, tournament_id: str) -> None:
+        try:
+            matches = await self._challonge_service.get_matches_in_tournament(tournament_id, PRIORITY_BACKGROUND)
+        except UPSTREAM_FAILURES:
+            return
 
-        if await self._challonge_service.has_tournament_finished(self._tournament_id):
-            return False, "TOURNAMENT_FINISHED"
+        self._publish_match_changes(tournament_id, matches)
 
-        matches = await self._challonge_service.get_matches_in_tournament(self._tournament_id)
-        return {"matches": matches}, ""
+    def _publish_match_changes(self, tournament_id: str, matches: List[dict]) -> None:
+        if tournament_id != self._tournament_id:
+            return
 
-    async def get_participants_in_tournament(self) -> Tuple[dict, str]:
-        if not self._tournament_id or not await self._challonge_service.does_tournament_exist(self._tournament_id):
-            return False, "TOURNAMENT_NOT_CREATED"
+        # Matches only ever move forwards, so an older response arriving late cannot reopen a completed match.
+        for match in matches:
+            match_inner = match["match"]
+            previous_state = self._match_states.get(match_inner["id"], "pending")
 
-        participants = await self._challonge_service.get_participants_in_tournament(self._tournament_id)
-        return {"participants": participants}, ""
+            if MATCH_STATE_ORDER.get(match_inner["state"], 0) <= MATCH_STATE_ORDER.get(previous_state, 0):
+                continue
+
+            self._match_states[match_inner["id"]] = match_inner["state"]
+
+            if match_inner["state"] == "open":
+                event_type = tournamentevents.MATCH_OPENED
+            else:
+                event_type = tournamentevents.MATCH_COMPLETED
+
+            self.events.publish(event_type, {"tournament_id": tournament_id, "match": match_inner})
@@ -0,0 +1,114 @@
+import re
+from typing import List, Tuple
+
+from .challongeservice import ChallongeService
+from .statejournal import StateJournal
+from .tournamentcontroller import TournamentController
+from .tournamentidgenerator import TournamentIdGenerator
+from .tournamentpool import TournamentPool
+from automatedtournaments.db import UserDatabase
+
+DEFAULT_TOURNAMENT_KEY = "default"
+
+TOURNAMENT_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+# Holds one TournamentController per tournament key, e.g. a Discord server id or a division name. The controllers
+# share the Challonge service and user database, whose caches are already keyed by tournament, but each tracks its
+# own tournament and event stream. Keys are only taken by creating a tournament, and keys whose tournament has
+# finished or been destroyed are given up, journal and all, when their slot is needed.
+class TournamentControllerRegistry:
+
+    def __init__(
+            self,
+            tournament_id_generator: TournamentIdGenerator,
+            challonge_service: ChallongeService,
+            user_database: UserDatabase,
+            default_tournament_settings: dict,
+            max_tournaments: int=256,
+            state_journal: StateJournal=None,
+            tournament_pool: TournamentPool=None,
+            write_behind: bool=False):
+        self._tournament_id_generator = tournament_id_generator
+        self._challonge_service = challonge_service
+        self._user_database = user_database
+        self._default_tournament_settings = default_tournament_settings
+        self._max_tournaments = max_tournaments
+        self._state_journal = state_journal
+        self._write_behind = write_behind
+
+        self.tournament_pool = tournament_pool
+        self._controllers = {}
+
+        # Tournaments that were running when the process stopped are served again straight from the journal.
+        if state_journal:
+            for tournament_key, journaled_state in state_journal.replay().items():
+                controller = self._new_controller(tournament_key)
+                controller.restore(journaled_state)
+                self._controllers[tournament_key] = controller
+
+    def get(self, tournament_key: str) -> TournamentController:
+        if tournament_key in self._controllers:
+            return self._controllers[tournament_key]
+
+        # Unknown keys get a detached controller without a tournament, so every call reports TOURNAMENT_NOT_CREATED
+        # without the key taking up a slot.
+        return self._new_controller("")
+
+    def resolve(self, tournament_key: str) -> TournamentController:
+        controller = self._controllers.get(tournament_key, None)
+
+        # Players act through a key of their own, such as their Discord server, which only has a tournament of its
+        # own while one arranged for it is running. The rest of the time they play in the default tournament.
+        if (controller is None or not controller.is_active()) and DEFAULT_TOURNAMENT_KEY in self._controllers:
+            return self._controllers[DEFAULT_TOURNAMENT_KEY]
+
+        return controller if controller is not None else self._new_controller("")
+
+    def get_or_create(self, tournament_key: str) -> Tuple[TournamentController, str]:
+        if tournament_key in self._controllers:
+            return self._controllers[tournament_key], ""
+
+        if not TOURNAMENT_KEY_PATTERN.match(tournament_key):
+            return None, "INVALID_TOURNAMENT_KEY"
+
+        if len(self._controllers) >= self._max_tournaments:
+            for inactive_key in [key for key, controller in self._controllers.items() if not controller.is_active()]:
+                self._evict(inactive_key)
+
+        if len(self._controllers) >= self._max_tournaments:
+            return None, "TOURNAMENT_LIMIT_REACHED"
+
+        controller = self._new_controller(tournament_key)
+        self._controllers[tournament_key] = controller
+
+        return controller, ""
+
+    def release(self, tournament_key: str) -> None:
+        controller = self._controllers.get(tournament_key, None)
+
+        if controller is not None and not controller.is_active():
+            self._evict(tournament_key)
+
+    def tournament_keys(self) -> List[str]:
+        return list(self._controllers)
+
+    def invalidate_profile(self, discord_id: str) -> None:
+        self._user_database.invalidate_profile(discord_id)
+
+    def _evict(self, tournament_key: str) -> None:
+        self._controllers.pop(tournament_key).close()
+
+        if self._state_journal:
+            self._state_journal.forget(tournament_key)
+
+    def _new_controller(self, tournament_key: str) -> TournamentController:
+        return TournamentController(
+            self._tournament_id_generator,
+            self._challonge_service,
+            self._user_database,
+            self._default_tournament_settings,
+            state_journal=self._state_journal if tournament_key else None,
+            tournament_key=tournament_key,
+            tournament_pool=self.tournament_pool if tournament_key else None,
+            write_behind=self._write_behind)
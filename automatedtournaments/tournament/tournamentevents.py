@@ -0,0 +1,71 @@
+import asyncio
+import collections
+import itertools
+import random
+
+PARTICIPANT_SIGNED_UP = "participant_signed_up"
+MATCH_OPENED = "match_opened"
+MATCH_COMPLETED = "match_completed"
+TOURNAMENT_STARTED = "tournament_started"
+TOURNAMENT_FINISHED = "tournament_finished"
+INTENT_FAILED = "intent_failed"
+
+
+# Fans tournament events out to every subscriber's queue. The most recent events are kept so a subscriber that
+# reconnects with the id of the last event it saw does not miss anything in between. Ids are "<epoch>-<sequence>",
+# where the epoch is random per bus, so an id from before a restart or from a re-created tournament is never mistaken
+# for a position in this stream.
+class TournamentEventBus:
+
+    def __init__(self, history_size: int=256, queue_size: int=1024):
+        self.epoch = "{:x}".format(random.SystemRandom().getrandbits(48))
+        self._sequence = itertools.count(1)
+        self._history = collections.deque(maxlen=history_size)
+        self._queue_size = queue_size
+        self._subscribers = set()
+
+    def subscribe(self, last_event_id: str="") -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self._queue_size)
+
+        if last_event_id:
+            epoch, _, sequence = last_event_id.rpartition("-")
+
+            # Everything in this stream is newer than an event from another epoch.
+            last_sequence = int(sequence) if epoch == self.epoch and sequence.isdigit() else 0
+
+            for sequence, event in self._history:
+                if sequence > last_sequence:
+                    queue.put_nowait(event)
+
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event_type: str, data: dict) -> dict:
+        sequence = next(self._sequence)
+        event = {"id": "{}-{}".format(self.epoch, sequence), "type": event_type, "data": data}
+        self._history.append((sequence, event))
+
+        # A subscriber that stopped reading is dropped rather than allowed to grow without bound. Its queue is emptied
+        # and ends with None, so it resubscribes from the history instead of reading a gap.
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._subscribers.discard(queue)
+
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+        return event
+
+    def close_subscribers(self) -> None:
+        for queue in self._subscribers:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+        self._subscribers.clear()
@@ -1,6 +1,13 @@
 import random
+import string
+import time
+from typing import Callable
 
-CHARS = [chr(i) for i in range(ord('A'), ord('Z'))] + [chr(i) for i in range(ord('a'), ord('z'))]
+from .statejournal import StateJournal
+
+CHARS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+TIMESTAMP_LENGTH = 7
+SUFFIX_LENGTH = 4
 NAMES = [
     "Adept",
     "Arbiter",
@@ -78,11 +85,45 @@ NAMES = [
     "Zergling",
 ]
 
+
+def encode_base62(value: int, length: int) -> str:
+    digits = []
+
+    for _ in range(length):
+        value, digit = divmod(value, len(CHARS))
+        digits.append(CHARS[digit])
+
+    return "".join(reversed(digits))
+
+
+# Ids are a base62 millisecond timestamp followed by a random base62 suffix, so two ids can only collide when they are
+# issued in the same millisecond and draw the same suffix. Every id handed out is recorded, in the state journal when
+# there is one, so an id is never reissued by this deployment, even across restarts.
 class TournamentIdGenerator:
 
-    @staticmethod
-    def next_id() -> str:
-        return "".join(random.choice(CHARS) for _ in range(8))
+    def __init__(self, state_journal: StateJournal=None, clock: Callable[[], float]=time.time):
+        self._state_journal = state_journal
+        self._clock = clock
+        self._random = random.SystemRandom()
+        self._issued_ids = set()
+
+    def next_id(self) -> str:
+        while True:
+            tournament_id = encode_base62(int(self._clock() * 1000), TIMESTAMP_LENGTH) + "".join(
+                self._random.choice(CHARS) for _ in range(SUFFIX_LENGTH))
+
+            if self._record(tournament_id):
+                return tournament_id
+
+    def _record(self, tournament_id: str) -> bool:
+        if tournament_id in self._issued_ids:
+            return False
+
+        if self._state_journal is not None and not self._state_journal.record_tournament_id(tournament_id):
+            return False
+
+        self._issued_ids.add(tournament_id)
+        return True
 
     @staticmethod
     def next_name() -> str:
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Tuple
+
+from automatedtournaments.metrics import REGISTRY
+from .challongeservice import ChallongeService, UPSTREAM_FAILURES
+from .statejournal import StateJournal
+from .tournamentidgenerator import TournamentIdGenerator
+
+logger = logging.getLogger(__name__)
+
+POOLED_TOURNAMENT_NAME = "Upcoming Tournament"
+
+
+# Keeps a few unannounced tournaments created on Challonge ahead of time, so a new tournament only costs the update
+# that gives a pooled one its name and start time. Claimed tournaments are replaced in the background. Pooled ids are
+# kept in the state journal when there is one, so tournaments created before a restart are claimed rather than leaked.
+class TournamentPool:
+
+    def __init__(
+            self,
+            tournament_id_generator: TournamentIdGenerator,
+            challonge_service: ChallongeService,
+            tournament_settings: dict,
+            size: int=2,
+            state_journal: StateJournal=None):
+        self._tournament_id_generator = tournament_id_generator
+        self._challonge_service = challonge_service
+        self._tournament_settings = tournament_settings
+        self._size = size
+        self._state_journal = state_journal
+
+        self._ready_ids = state_journal.pooled_tournaments() if state_journal else []
+        self._refill_task = None
+
+        REGISTRY.add_collector(self._collect_metrics)
+
+    def ready_count(self) -> int:
+        return len(self._ready_ids)
+
+    def refill(self) -> None:
+        if len(self._ready_ids) < self._size and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.ensure_future(self._refill())
+
+    def close(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+
+        REGISTRY.remove_collector(self._collect_metrics)
+        self._ready_gauge().remove()
+
+    async def claim(self, tournament_name: str, start_time: str) -> Tuple[str, dict]:
+        if not self._ready_ids:
+            self.refill()
+            return "", {}
+
+        tournament_id = self._ready_ids.pop(0)
+
+        try:
+            tournament_data = await self._challonge_service.update_tournament(
+                tournament_id, tournament_name, start_time)
+        except UPSTREAM_FAILURES:
+            # Whether or not the update landed, nobody holds the tournament yet, so it can be claimed again.
+            self._ready_ids.insert(0, tournament_id)
+            raise
+
+        if self._state_journal:
+            self._state_journal.remove_pooled_tournament(tournament_id)
+
+        self.refill()
+
+        # Challonge turned the update down, so the pooled tournament is no use. It is deleted rather than left behind
+        # on the account, and the caller creates a tournament the normal way.
+        if not tournament_data:
+            await self._discard(tournament_id)
+            return "", {}
+
+        return tournament_id, tournament_data
+
+    async def _discard(self, tournament_id: str) -> None:
+        try:
+            destroyed = await self._challonge_service.destroy_tournament(tournament_id)
+        except UPSTREAM_FAILURES as error:
+            logger.warning("Failed to delete rejected pooled tournament %s: %r", tournament_id, error)
+            return
+
+        if not destroyed:
+            logger.warning("Failed to delete rejected pooled tournament %s", tournament_id)
+
+    async def _refill(self) -> None:
+        while len(self._ready_ids) < self._size:
+            tournament_id = self._tournament_id_generator.next_id()
+
+            try:
+                created = await self._challonge_service.create_tournament(
+                    tournament_id, POOLED_TOURNAMENT_NAME, "", self._tournament_settings)
+            except UPSTREAM_FAILURES as error:
+                logger.warning("Failed to create a pooled tournament: %r", error)
+                return
+
+            if not created:
+                return
+
+            if self._state_journal:
+                self._state_journal.add_pooled_tournament(tournament_id)
+
+            self._ready_ids.append(tournament_id)
+
+    def _collect_metrics(self) -> None:
+        self._ready_gauge().set(self.ready_count())
+
+    @staticmethod
+    def _ready_gauge():
+        return REGISTRY.gauge("tournament_pool_ready", "Pre-created tournaments ready to be claimed.")
@@ -0,0 +1,22 @@
+class TournamentState:
+
+    def __init__(self, tournament_data: dict):
+        self._tournament_data = tournament_data if tournament_data else {}
+
+    @property
+    def exists(self) -> bool:
+        return "tournament" in self._tournament_data
+
+    @property
+    def started(self) -> bool:
+        if not self.exists:
+            return False
+
+        return bool(self._tournament_data["tournament"].get("started_at", None))
+
+    @property
+    def finished(self) -> bool:
+        if not self.exists:
+            return False
+
+        return bool(self._tournament_data["tournament"].get("completed_at", None))
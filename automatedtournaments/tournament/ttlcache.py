@@ -0,0 +1,52 @@
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TtlCache:
+
+    def __init__(self, clock: Callable[[], float]=time.monotonic):
+        self._clock = clock
+        self._entries = {}
+        self._generations = {}
+        self._stats = {}
+
+    def get(self, key: Tuple[str, Hashable]) -> Tuple[bool, Any]:
+        entry = self._entries.get(key, None)
+
+        if entry is not None:
+            expires_at, value = entry
+
+            if self._clock() < expires_at:
+                self._record(key, "hits")
+                return True, value
+
+            del self._entries[key]
+
+        self._record(key, "misses")
+        return False, None
+
+    def generation(self, key: Tuple[str, Hashable]) -> int:
+        return self._generations.get(key, 0)
+
+    def put(self, key: Tuple[str, Hashable], value: Any, ttl: float, generation: int=None) -> None:
+        if ttl <= 0:
+            return
+
+        # A value fetched before the key was last invalidated may predate a write, so it must not be stored.
+        if generation is not None and generation != self.generation(key):
+            return
+
+        self._entries[key] = (self._clock() + ttl, value)
+
+    def invalidate(self, *keys: Tuple[str, Hashable]) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._generations[key] = self.generation(key) + 1
+            self._record(key, "invalidations")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return dict((resource, dict(counters)) for resource, counters in self._stats.items())
+
+    def _record(self, key: Tuple[str, Hashable], counter: str) -> None:
+        counters = self._stats.setdefault(key[0], {"hits": 0, "misses": 0, "invalidations": 0})
+        counters[counter] += 1
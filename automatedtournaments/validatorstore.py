@@ -0,0 +1,41 @@
+import collections
+from typing import Any, Dict, Hashable, Tuple
+
+
+# Remembers the ETag and parsed body of the last successful GET per request key, so a repeated read can be sent with
+# If-None-Match and a 304 answered from memory without downloading or decoding the payload again. Bounded LRU.
+class ValidatorStore:
+
+    def __init__(self, max_entries: int=1024):
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+
+        self._stats = {"not_modified": 0, "modified": 0}
+
+    def get(self, key: Hashable) -> Tuple[str, Any]:
+        entry = self._entries.get(key, None)
+
+        if entry is None:
+            return "", None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, etag: str, value: Any) -> None:
+        self._stats["modified"] += 1
+
+        if not etag:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (etag, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def record_not_modified(self) -> None:
+        self._stats["not_modified"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
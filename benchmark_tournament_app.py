@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import math
+import time
+
+import aiohttp
+import aiohttp.web
+
+from automatedtournaments.testing import FakeChallonge, InMemoryUserDatabase
+from automatedtournaments.tournament.challongeservice import ChallongeService
+from automatedtournaments.tournament.requestscheduler import RequestScheduler
+from automatedtournaments.tournament.tournamentapp import TournamentApp
+from automatedtournaments.tournament.tournamentcontrollerregistry import TournamentControllerRegistry
+from automatedtournaments.tournament.tournamentidgenerator import TournamentIdGenerator
+from automatedtournaments.tournament.tournamentpool import TournamentPool
+
+CHALLONGE_SUBDOMAIN = "bench"
+CHALLONGE_API_KEY = "bench-api-key"
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class LoadReport:
+
+    def __init__(self, fake_challonge: FakeChallonge):
+        self._fake_challonge = fake_challonge
+        self._phases = []
+
+    async def run_phase(self, name: str, requests: list, concurrency: int) -> list:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        failures = 0
+
+        async def timed(request):
+            nonlocal failures
+
+            async with semaphore:
+                started_at = time.perf_counter()
+                status, resp_data = await request()
+                latencies.append(time.perf_counter() - started_at)
+
+                if not 200 <= status <= 299:
+                    failures += 1
+
+                return resp_data
+
+        upstream_calls_before = self._fake_challonge.total_calls
+        started_at = time.perf_counter()
+        results = await asyncio.gather(*(timed(request) for request in requests))
+        elapsed = time.perf_counter() - started_at
+
+        for phase in self._phases:
+            if phase["name"] == name:
+                break
+        else:
+            phase = {"name": name, "latencies": [], "failures": 0, "elapsed": 0.0, "upstream_calls": 0}
+            self._phases.append(phase)
+
+        phase["latencies"] += latencies
+        phase["failures"] += failures
+        phase["elapsed"] += elapsed
+        phase["upstream_calls"] += self._fake_challonge.total_calls - upstream_calls_before
+
+        return results
+
+    def print(self) -> None:
+        print("{:<10} {:>8} {:>8} {:>10} {:>9} {:>9} {:>9} {:>14}".format(
+            "route", "requests", "failed", "req/s", "p50 ms", "p95 ms", "p99 ms", "upstream/req"))
+
+        for phase in self._phases:
+            latencies = phase["latencies"]
+            print("{:<10} {:>8} {:>8} {:>10.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>14.2f}".format(
+                phase["name"],
+                len(latencies),
+                phase["failures"],
+                len(latencies) / phase["elapsed"] if phase["elapsed"] else 0.0,
+                percentile(latencies, 0.50) * 1000,
+                percentile(latencies, 0.95) * 1000,
+                percentile(latencies, 0.99) * 1000,
+                phase["upstream_calls"] / len(latencies)))
+
+
+async def start_site(app: aiohttp.web.Application, port: int) -> aiohttp.web.AppRunner:
+    runner = aiohttp.web.AppRunner(app)
+    await runner.setup()
+    await aiohttp.web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    fake_challonge = FakeChallonge(
+        CHALLONGE_API_KEY,
+        latency=args.challonge_latency,
+        jitter=args.challonge_jitter,
+        error_rate=args.challonge_error_rate,
+        throttle_rate=args.challonge_throttle_rate,
+        retry_after=0.1,
+        lost_response_rate=args.challonge_lost_response_rate)
+    discord_ids = [str(100000000000000000 + player) for player in range(args.players)]
+    user_database = InMemoryUserDatabase(dict(
+        (discord_id, {"challonge_username": "player" + discord_id, "discord_display_name": "Player " + discord_id})
+        for discord_id
+        in discord_ids))
+
+    challonge_client = aiohttp.ClientSession()
+    tournament_id_generator = TournamentIdGenerator()
+    challonge_service = ChallongeService(
+        challonge_client,
+        CHALLONGE_SUBDOMAIN,
+        CHALLONGE_API_KEY,
+        request_scheduler=RequestScheduler(
+            challonge_client,
+            requests_per_second=args.challonge_rate,
+            burst=args.challonge_rate,
+            base_backoff=0.05),
+        base_url="http://127.0.0.1:{}/v1".format(args.challonge_port))
+    tournament_pool = TournamentPool(
+        tournament_id_generator, challonge_service, {}, size=args.pool_size) if args.pool_size else None
+    tournament_app = TournamentApp(
+        TournamentControllerRegistry(
+            tournament_id_generator, challonge_service, user_database, {}, tournament_pool=tournament_pool))
+
+    runners = [
+        await start_site(fake_challonge, args.challonge_port),
+        await start_site(tournament_app, args.app_port),
+    ]
+    base_url = "http://127.0.0.1:{}".format(args.app_port)
+
+    while tournament_pool and tournament_pool.ready_count() < args.pool_size:
+        await asyncio.sleep(0.01)
+
+    report = LoadReport(fake_challonge)
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as player_client:
+
+        def call(method: str, path: str, json_data: dict=None):
+            async def request():
+                async with player_client.request(method, base_url + path, json=json_data) as resp:
+                    return resp.status, await resp.json()
+
+            return request
+
+        await report.run_phase("create", [call("POST", "/create")], 1)
+        if args.bulk:
+            await report.run_phase("signup", [call("POST", "/signup", {"discord_ids": discord_ids})], 1)
+            await report.run_phase("checkin", [call("POST", "/checkin", {"discord_ids": discord_ids})], 1)
+        else:
+            await report.run_phase(
+                "signup", [call("POST", "/signup/" + discord_id) for discord_id in discord_ids], args.concurrency)
+            await report.run_phase(
+                "checkin", [call("POST", "/checkin/" + discord_id) for discord_id in discord_ids], args.concurrency)
+        await report.run_phase("start", [call("POST", "/start")], 1)
+
+        while True:
+            resp_data, = await report.run_phase("matches", [call("GET", "/matches")], 1)
+            open_matches = [
+                match["match"] for match in resp_data.get("matches", []) if match["match"]["state"] == "open"]
+
+            if not open_matches:
+                break
+
+            await report.run_phase(
+                "victory",
+                [call("POST", "/victory/" + match["player1_discord_id"]) for match in open_matches],
+                args.concurrency)
+
+        await report.run_phase("finish", [call("POST", "/finish")], 1)
+
+    report.print()
+    print("Upstream Challonge calls by endpoint:")
+    for endpoint, count in sorted(fake_challonge.calls.items()):
+        print("  {:>6}  {}".format(count, endpoint))
+    print("  {:>6}  answered 304 Not Modified".format(fake_challonge.not_modified))
+    print("Duplicate participants on Challonge: {}".format(fake_challonge.duplicate_participants()))
+
+    for runner in reversed(runners):
+        await runner.cleanup()
+
+    if tournament_pool:
+        tournament_pool.close()
+    challonge_service.close()
+    await user_database.close()
+    await challonge_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive TournamentApp through a full bracket against an in-process fake Challonge.")
+    parser.add_argument("--players", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--challonge-latency", type=float, default=0.05)
+    parser.add_argument("--challonge-jitter", type=float, default=0.02)
+    parser.add_argument("--challonge-error-rate", type=float, default=0.0)
+    parser.add_argument("--challonge-throttle-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--challonge-lost-response-rate",
+        type=float,
+        default=0.0,
+        help="Fail this fraction of writes after they were applied.")
+    parser.add_argument("--challonge-rate", type=float, default=1000.0)
+    parser.add_argument("--bulk", action="store_true", help="Sign up and check in everyone in one request each.")
+    parser.add_argument("--pool-size", type=int, default=0, help="Pre-create this many tournaments before /create.")
+    parser.add_argument("--challonge-port", type=int, default=23450)
+    parser.add_argument("--app-port", type=int, default=23451)
+
+    asyncio.get_event_loop().run_until_complete(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
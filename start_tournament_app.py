@@ -2,11 +2,14 @@ import json
 import os
 import pickle
 
-from automatedtournaments import start_tournament_app, UserDatabase
+from automatedtournaments import start_tournament_app, RestUserDatabase
 
 PORT = int(os.environ.get("PORT", "23444"))
 CHALLONGE_SUBDOMAIN = os.environ.get("CHALLONGESUBDOMAIN", "")
 CHALLONGE_API_KEY = os.environ.get("CHALLONGEAPIKEY", "")
+JOURNAL_PATH = os.environ.get("JOURNALPATH", "tournaments.sqlite3")
+TOURNAMENT_POOL_SIZE = int(os.environ.get("TOURNAMENTPOOLSIZE", "0"))
+WRITE_BEHIND = os.environ.get("WRITEBEHIND", "") == "1"
 
 
 def main():
@@ -16,8 +19,16 @@ def main():
     with open("challonge.json") as challonge_config_file:
         default_tournament_settings = json.load(challonge_config_file)
 
-    user_database = UserDatabase(db_config)
-    start_tournament_app(PORT, CHALLONGE_SUBDOMAIN, CHALLONGE_API_KEY, user_database, default_tournament_settings)
+    user_database = RestUserDatabase(db_config)
+    start_tournament_app(
+        PORT,
+        CHALLONGE_SUBDOMAIN,
+        CHALLONGE_API_KEY,
+        user_database,
+        default_tournament_settings,
+        JOURNAL_PATH,
+        TOURNAMENT_POOL_SIZE,
+        WRITE_BEHIND)
 
 
 if __name__ == "__main__":
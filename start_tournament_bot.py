@@ -14,7 +14,7 @@ def main():
     with open("firebase.cfg", 'rb') as db_config_file:
         db_config = pickle.load(db_config_file)
 
-    user_database = automatedtournaments.UserDatabase(db_config)
+    user_database = automatedtournaments.RestUserDatabase(db_config)
     automatedtournaments.start_tournament_bot(
         BOT_TOKEN,
         user_database,